@@ -1,13 +1,27 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.functional import SimpleLazyObject
+
 from user_profile.models import UserProfile, Notification
+from user_profile.notifications import RECENT_LIMIT, cached_recent_notifications, cached_unread_count
 
 def user_profile_and_notifications(request):
+    """
+    Профиль и уведомления для шапки страницы.
+    Все значения ленивые: запрос (или чтение кеша) выполняется, только если
+    шаблон к ним обращается, поэтому AJAX-фрагменты ничего не платят.
+    """
     context = {}
-    
+
     if request.user.is_authenticated:
-        context['user_profile'] = UserProfile.objects.get(user=request.user)
-        notifications = Notification.objects.filter(user=request.user)
-        context['notifications'] = notifications
-        context['unread_notifications_count'] = notifications.filter(is_read=False).count()
-        context['recent_notifications'] = notifications[:5]  # Последние 5 уведомлений
-    
-    return context
\ No newline at end of file
+        user = request.user
+        context['user_profile'] = SimpleLazyObject(lambda: UserProfile.objects.get(user=user))
+        context['notifications'] = Notification.objects.filter(user=user)  # queryset ленивый сам по себе
+        context['unread_notifications_count'] = SimpleLazyObject(lambda: cached_unread_count(user.pk))
+
+        recent = SimpleLazyObject(lambda: cached_recent_notifications(user.pk))
+        context['recent_notifications'] = SimpleLazyObject(lambda: recent[:RECENT_LIMIT])  # Последние 5 уведомлений
+        context['has_more_notifications'] = SimpleLazyObject(lambda: len(recent) > RECENT_LIMIT)
+        # Поток уведомлений (SSE) доступен только под ASGI-сервером
+        context['notifications_stream_enabled'] = isinstance(request, ASGIRequest)
+
+    return context
@@ -5,12 +5,24 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Приложение запускается под ASGI-сервером (docker-compose: uvicorn
+quicksolve.asgi:application), потому что поток уведомлений
+/notifications/stream/ (Server-Sent Events) работает только под ASGI: под
+WSGI ответ не отправляется, пока поток не закончится, поэтому страница не
+подключается к потоку, а сам эндпоинт отвечает 503. В режиме DEBUG
+статические файлы отдает ASGIStaticFilesHandler, как это делал runserver.
 """
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quicksolve.settings')
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    application = ASGIStaticFilesHandler(application)
@@ -97,6 +97,64 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# По умолчанию кеш в памяти процесса; CACHE_BACKEND/CACHE_LOCATION позволяют
+# переключиться, например, на django.core.cache.backends.filebased.FileBasedCache
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "quicksolve"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000)),
+        },
+    }
+}
+
+# Кеш прав доступа (workspace/permission_cache.py)
+PERMISSION_CACHE_ALIAS = "default"
+PERMISSION_CACHE_TIMEOUT = int(os.environ.get("PERMISSION_CACHE_TIMEOUT", 300))
+
+# Срок действия точечных приглашений в днях (0 - бессрочно, как раньше); просроченные
+# помечает manage.py expire_invitations (workspace/invitations.py). При включении
+# срока сразу перестают работать ожидающие приглашения старше него
+INVITATION_EXPIRY_DAYS = int(os.environ.get("INVITATION_EXPIRY_DAYS", 0))
+
+# Массовые уведомления (user_profile/notifications.py)
+NOTIFICATION_BULK_CHUNK_SIZE = int(os.environ.get("NOTIFICATION_BULK_CHUNK_SIZE", 1000))
+NOTIFICATION_BACKGROUND = bool(int(os.environ.get("NOTIFICATION_BACKGROUND", 0)))
+NOTIFICATION_BACKGROUND_THRESHOLD = int(os.environ.get("NOTIFICATION_BACKGROUND_THRESHOLD", 1000))
+NOTIFICATION_CACHE_ALIAS = "default"
+NOTIFICATION_CACHE_TIMEOUT = int(os.environ.get("NOTIFICATION_CACHE_TIMEOUT", 30))
+
+# Поток уведомлений SSE (user_profile/stream.py): auto - LISTEN/NOTIFY на
+# PostgreSQL, иначе брокер внутри процесса; local/postgresql - явный выбор
+NOTIFICATION_STREAM_BACKEND = os.environ.get("NOTIFICATION_STREAM_BACKEND", "auto")
+NOTIFICATION_STREAM_HEARTBEAT = int(os.environ.get("NOTIFICATION_STREAM_HEARTBEAT", 15))
+
+# Срок хранения прочитанных уведомлений в днях по уровням (None - хранить всегда)
+# и режим очистки manage.py prune_notifications: archive или delete
+NOTIFICATION_RETENTION_DAYS = {
+    "info": int(os.environ.get("NOTIFICATION_RETENTION_INFO_DAYS", 90)),
+    "warning": int(os.environ.get("NOTIFICATION_RETENTION_WARNING_DAYS", 180)),
+    "error": int(os.environ.get("NOTIFICATION_RETENTION_ERROR_DAYS", 365)),
+}
+NOTIFICATION_RETENTION_MODE = os.environ.get("NOTIFICATION_RETENTION_MODE", "delete")
+
+# Окно слияния похожих уведомлений в секундах по видам (0 или нет вида - не сливать):
+# непрочитанное уведомление того же вида, пользователя и объекта, созданное
+# в пределах окна, заменяется новой строкой со счетчиком и сводным сообщением.
+# Сводки для совершившего действие (*_summary) не сливаются: в них имена пользователей
+NOTIFICATION_COALESCE_WINDOWS = {
+    "role_promoted": 600,
+    "role_demoted": 600,
+    "membership_added": 600,
+    "membership_removed": 600,
+    "invitation": 600,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -195,4 +253,10 @@ EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = int(os.environ.get("EMAIL_USE_TLS", default=1))
 
+# Очередь писем (user_profile/outbox.py, manage.py run_email_worker)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get("EMAIL_OUTBOX_BATCH_SIZE", 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get("EMAIL_OUTBOX_RETRY_DELAY", 60))
+EMAIL_OUTBOX_MAX_RETRY_DELAY = int(os.environ.get("EMAIL_OUTBOX_MAX_RETRY_DELAY", 3600))
+
 ACCOUNT_EMAIL_VERIFICATION = os.environ.get("ACCOUNT_EMAIL_VERIFICATION", default="mandatory")
\ No newline at end of file
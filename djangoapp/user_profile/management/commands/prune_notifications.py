@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user_profile.models import Notification
+from user_profile.retention import RETENTION_DAYS, RETENTION_MODE, expired_notifications, prune_chunk
+
+
+class Command(BaseCommand):
+    help = 'Удаляет или архивирует прочитанные уведомления старше срока хранения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Срок хранения для всех уровней (вместо NOTIFICATION_RETENTION_DAYS)')
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--archive', action='store_true', help='Переносить в NotificationArchive')
+        mode.add_argument('--delete', action='store_true', help='Удалять без архива')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Строк в одной транзакции')
+        parser.add_argument('--sleep', type=float, default=0, help='Пауза между пачками в секундах')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать устаревшие уведомления')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным')
+        archive = options['archive'] or (not options['delete'] and RETENTION_MODE == 'archive')
+
+        total = 0
+        started = time.monotonic()
+        for level, _ in Notification.LEVELS:
+            days = options['days'] if options['days'] is not None else RETENTION_DAYS.get(level)
+            if days is None:
+                continue
+            queryset = expired_notifications(level, days)
+
+            if options['dry_run']:
+                self.stdout.write(f'{level}: старше {days} дн. - {queryset.count()}')
+                continue
+
+            level_started = time.monotonic()
+            pruned = 0
+            while True:
+                count = prune_chunk(queryset, options['chunk_size'], archive=archive)
+                if not count:
+                    break
+                pruned += count
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+
+            elapsed = time.monotonic() - level_started
+            total += pruned
+            self.stdout.write(
+                f'{level}: старше {days} дн. - {pruned} за {elapsed:.1f} с ({pruned / elapsed if elapsed else 0:.0f} строк/с)'
+            )
+
+        if not options['dry_run']:
+            elapsed = time.monotonic() - started
+            action = 'Перенесено в архив' if archive else 'Удалено'
+            self.stdout.write(self.style.SUCCESS(
+                f'{action}: {total} за {elapsed:.1f} с ({total / elapsed if elapsed else 0:.0f} строк/с)'
+            ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from user_profile.models import UserProfile
+from user_profile.notifications import actual_unread_count
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики непрочитанных уведомлений и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Профилей в одном UPDATE')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать расхождения')
+
+    def handle(self, *args, **options):
+        drifted = list(
+            UserProfile.objects.annotate(actual=actual_unread_count())
+            .exclude(unread_notifications_count=F('actual'))
+            .values_list('pk', 'user__username', 'unread_notifications_count', 'actual')
+        )
+
+        for _, username, stored, actual in drifted:
+            self.stdout.write(f'{username}: в счетчике {stored}, непрочитанных {actual}')
+
+        if not options['dry_run']:
+            # Значение пересчитывается внутри UPDATE, а не берется из выборки выше,
+            # чтобы не затереть уведомления, созданные за время работы команды
+            ids = [pk for pk, *_ in drifted]
+            chunk_size = options['chunk_size']
+            for start in range(0, len(ids), chunk_size):
+                UserProfile.objects.filter(pk__in=ids[start:start + chunk_size]).update(
+                    unread_notifications_count=actual_unread_count()
+                )
+
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(f'{action} расхождений: {len(drifted)}'))
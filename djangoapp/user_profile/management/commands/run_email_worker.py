@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user_profile.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди EmailOutbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Писем в одной пачке (по умолчанию EMAIL_OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--interval', type=float, default=5, help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true', help='Отправить все готовые письма и завершиться')
+
+    def handle(self, *args, **options):
+        total_sent = total_retried = total_failed = 0
+        try:
+            while True:
+                sent, retried, failed = send_pending(batch_size=options['batch_size'])
+                total_sent += sent
+                total_retried += retried
+                total_failed += failed
+                if sent or retried or failed:
+                    self.stdout.write(f'Отправлено: {sent}, отложено: {retried}, ошибок: {failed}')
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего отправлено: {total_sent}, отложено: {total_retried}, ошибок: {total_failed}'
+        ))
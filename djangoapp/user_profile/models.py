@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import uuid
 
 User = get_user_model()
@@ -18,6 +19,11 @@ class UserProfile(models.Model):
         null=True,
         verbose_name="Unique Code"
     )
+    # Число непрочитанных уведомлений. Меняется только через UPDATE с F()
+    # (см. user_profile/notifications.py), save() профиля его не перезаписывает.
+    # После добавления поля счетчики заполняются один раз командой
+    # manage.py reconcile_notification_counters
+    unread_notifications_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f'{self.user.username}'
@@ -30,6 +36,11 @@ class UserProfile(models.Model):
             while UserProfile.objects.filter(unique_code=code).exists():
                 code = str(uuid.uuid4())[:12].upper().replace('-', '')
             self.unique_code = code
+        if not self._state.adding and not kwargs.get('update_fields'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'unread_notifications_count'
+            ]
         super().save(*args, **kwargs)
 
 
@@ -46,9 +57,72 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     related_url = models.URLField(blank=True, null=True)
+    # Вид и объект уведомления для слияния похожих (NOTIFICATION_COALESCE_WINDOWS)
+    kind = models.CharField(max_length=50, blank=True, default='')
+    target = models.CharField(max_length=100, blank=True, default='')
+    # Сколько уведомлений слито в эту строку
+    count = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Непрочитанные уведомления пользователя по времени (счетчики, очистка)
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+            # Курсорная выборка по id (before_id / since_id)
+            models.Index(fields=['user', 'id'], name='notif_user_id_idx'),
+            # Поиск прочитанных уведомлений для очистки (manage.py prune_notifications)
+            models.Index(fields=['level', 'created_at'], condition=models.Q(is_read=True), name='notif_read_level_created_idx'),
+        ]
 
     def __str__(self):
-        return f"[{self.level.upper()}] {self.message[:50]}"
\ No newline at end of file
+        return f"[{self.level.upper()}] {self.message[:50]}"
+
+
+class NotificationArchive(models.Model):
+    """
+    Прочитанные уведомления, перенесенные из Notification по истечении срока
+    хранения (manage.py prune_notifications --archive). id совпадает с id
+    исходного уведомления.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    message = models.TextField()
+    level = models.CharField(max_length=10, choices=Notification.LEVELS)
+    created_at = models.DateTimeField()
+    related_url = models.URLField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"[{self.level.upper()}] {self.message[:50]}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Очередь исходящих писем. Строка пишется в той же транзакции, что и объект,
+    о котором сообщает письмо, а отправляет ее manage.py run_email_worker.
+    """
+    STATUSES = (
+        ('pending', 'В очереди'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Выборка писем, которые пора отправить
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.status}] {self.subject[:50]}"
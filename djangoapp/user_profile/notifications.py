@@ -0,0 +1,324 @@
+"""
+Массовая рассылка уведомлений.
+
+Уведомления пишутся через bulk_create пачками по NOTIFICATION_BULK_CHUNK_SIZE
+и только после фиксации текущей транзакции (transaction.on_commit): откат
+операции не оставляет уведомлений, а транзакция запроса не держит тысячи
+INSERT. Рассылки от NOTIFICATION_BACKGROUND_THRESHOLD получателей при
+включенном NOTIFICATION_BACKGROUND выполняются в фоновом потоке, и ответ
+не ждет их записи.
+
+Счетчик непрочитанных UserProfile.unread_notifications_count меняется в той же
+транзакции, что и уведомления: при создании (здесь и в сигнале post_save для
+одиночных create) и при отметке о прочтении (mark_read). Расхождения, а также
+нулевые счетчики профилей, созданных до появления поля, исправляет
+manage.py reconcile_notification_counters.
+
+Счетчик и последние уведомления для шапки страницы кешируются на
+NOTIFICATION_CACHE_TIMEOUT секунд. После фиксации любого изменения счетчика
+кеш пользователя сбрасывается, а его открытые потоки SSE (stream.py)
+получают сигнал.
+
+Уведомления с видом (kind) из NOTIFICATION_COALESCE_WINDOWS сливаются:
+если у пользователя есть непрочитанное уведомление того же вида и объекта
+(target), созданное в пределах окна, оно заменяется новой строкой с
+count + 1 и сводным сообщением.
+"""
+import logging
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import stream
+from .models import Notification, UserProfile
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, 'NOTIFICATION_BULK_CHUNK_SIZE', 1000)
+BACKGROUND = getattr(settings, 'NOTIFICATION_BACKGROUND', False)
+BACKGROUND_THRESHOLD = getattr(settings, 'NOTIFICATION_BACKGROUND_THRESHOLD', 1000)
+CACHE_ALIAS = getattr(settings, 'NOTIFICATION_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 30)
+COALESCE_WINDOWS = getattr(settings, 'NOTIFICATION_COALESCE_WINDOWS', {})
+
+# Сколько последних уведомлений показывает выпадающее меню
+RECENT_LIMIT = 5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Один фоновый поток на процесс: рассылки пишутся по очереди"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notifications')
+        return _executor
+
+
+def user_ids_of(users):
+    """id пользователей из queryset, списка объектов или списка id"""
+    if isinstance(users, QuerySet):
+        return list(users.values_list('pk', flat=True))
+    return [getattr(user, 'pk', user) for user in users]
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _unread_key(user_id):
+    return f'notifications:{user_id}:unread'
+
+
+def _recent_key(user_id):
+    return f'notifications:{user_id}:recent'
+
+
+def notifications_changed(user_ids):
+    """Сбрасывает кеш шапки и будит потоки SSE пользователей после фиксации транзакции"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def commit():
+        _cache().delete_many([key for user_id in user_ids for key in (_unread_key(user_id), _recent_key(user_id))])
+        stream.publish(user_ids)
+
+    transaction.on_commit(commit)
+
+
+def cached_unread_count(user_id):
+    """Число непрочитанных уведомлений из кеша или профиля"""
+    count = _cache().get(_unread_key(user_id))
+    if count is None:
+        count = get_unread_count(user_id)
+        _cache().set(_unread_key(user_id), count, CACHE_TIMEOUT)
+    return count
+
+
+def cached_recent_notifications(user_id):
+    """
+    Последние RECENT_LIMIT + 1 уведомлений (лишнее показывает, что есть еще)
+    в виде словарей из кеша или базы.
+    """
+    recent = _cache().get(_recent_key(user_id))
+    if recent is None:
+        recent = list(
+            Notification.objects.filter(user_id=user_id)
+            .values('id', 'message', 'level', 'is_read', 'created_at', 'related_url')[:RECENT_LIMIT + 1]
+        )
+        _cache().set(_recent_key(user_id), recent, CACHE_TIMEOUT)
+    return recent
+
+
+def change_unread_counts(deltas):
+    """
+    Меняет счетчики непрочитанных: deltas - {user_id: изменение}.
+    Пользователи с одинаковым изменением обновляются одним UPDATE.
+    """
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        UserProfile.objects.filter(user_id__in=user_ids).update(
+            unread_notifications_count=Greatest(F('unread_notifications_count') + delta, 0)
+        )
+        notifications_changed(user_ids)
+
+
+def actual_unread_count():
+    """Подзапрос: реальное число непрочитанных уведомлений пользователя профиля"""
+    unread = Notification.objects.filter(
+        user_id=OuterRef('user_id'),
+        is_read=False
+    ).order_by().values('user_id').annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(unread), 0)
+
+
+def get_unread_count(user):
+    """Число непрочитанных уведомлений пользователя (одно чтение профиля)"""
+    count = UserProfile.objects.filter(user_id=getattr(user, 'pk', user)).values_list('unread_notifications_count', flat=True).first()
+    return count or 0
+
+
+def mark_read(user, notifications=None):
+    """
+    Помечает прочитанными уведомления пользователя из queryset notifications
+    (по умолчанию - все) одним UPDATE. Возвращает (помечено, осталось непрочитанных).
+    """
+    if notifications is None:
+        notifications = Notification.objects.all()
+    with transaction.atomic():
+        # Блокировка профиля выстраивает отметки одного пользователя в очередь,
+        # поэтому число обновленных строк точно равно изменению счетчика
+        UserProfile.objects.select_for_update().filter(user=user).values_list('pk', flat=True).first()
+        updated = notifications.filter(user=user, is_read=False).update(is_read=True)
+        if updated:
+            change_unread_counts({user.pk: -updated})
+        return updated, get_unread_count(user)
+
+
+def delete_notifications(user, notifications):
+    """
+    Удаляет уведомления пользователя из queryset notifications.
+    Возвращает (удалено, осталось непрочитанных).
+    """
+    with transaction.atomic():
+        UserProfile.objects.select_for_update().filter(user=user).values_list('pk', flat=True).first()
+        notifications = notifications.filter(user=user)
+        # Непрочитанные удаляются отдельно, чтобы знать изменение счетчика без COUNT
+        unread_deleted = notifications.filter(is_read=False).delete()[0]
+        read_deleted = notifications.filter(is_read=True).delete()[0]
+        if unread_deleted:
+            change_unread_counts({user.pk: -unread_deleted})
+        elif read_deleted:
+            notifications_changed([user.pk])
+        return unread_deleted + read_deleted, get_unread_count(user)
+
+
+def coalesce_window(kind):
+    """Окно слияния вида уведомлений в секундах (0 - не сливать)"""
+    return COALESCE_WINDOWS.get(kind, 0) if kind else 0
+
+
+def digest_message(message, count):
+    """Сводное сообщение для count слитых уведомлений"""
+    return f'{message}\n(похожих уведомлений: {count})'
+
+
+def coalesce(notifications):
+    """
+    Сливает уведомления с уже существующими непрочитанными строками того же
+    пользователя, вида и объекта: старая строка удаляется, а новая получает
+    суммарный count и сводное сообщение. Новая строка - с новым id и
+    created_at, поэтому сводку видят поток SSE, API с since_id и меню
+    последних уведомлений.
+
+    Возвращает (уведомления для создания, {user_id: число удаленных непрочитанных}).
+    """
+    to_create = []
+    groups = defaultdict(dict)  # (kind, target) -> {user_id: notification}
+    for notification in notifications:
+        if not coalesce_window(notification.kind):
+            to_create.append(notification)
+            continue
+        group = groups[(notification.kind, notification.target)]
+        previous = group.get(notification.user_id)
+        if previous is not None:
+            # Повтор в одной пачке: остается последнее сообщение
+            notification.count += previous.count
+        group[notification.user_id] = notification
+
+    now = timezone.now()
+    replaced = Counter()
+    replaced_ids = []
+    for (kind, target), by_user in groups.items():
+        # Блокировка строк: их не пометят прочитанными, пока они заменяются
+        existing = Notification.objects.select_for_update().filter(
+            kind=kind,
+            target=target,
+            user_id__in=list(by_user),
+            is_read=False,
+            created_at__gte=now - timedelta(seconds=coalesce_window(kind)),
+        ).order_by('user_id', '-id').values_list('user_id', 'id', 'count')
+        latest = {}
+        for user_id, notification_id, count in existing:
+            latest.setdefault(user_id, (notification_id, count))
+
+        for user_id, notification in by_user.items():
+            if user_id in latest:
+                notification_id, count = latest[user_id]
+                notification.count += count
+                replaced_ids.append(notification_id)
+                replaced[user_id] += 1
+            if notification.count > 1:
+                notification.message = digest_message(notification.message, notification.count)
+            to_create.append(notification)
+
+    if replaced_ids:
+        Notification.objects.filter(pk__in=replaced_ids).delete()
+        # Число непрочитанных не меняется, но меню последних уведомлений - да
+        notifications_changed(list(replaced))
+    return to_create, replaced
+
+
+def write_notifications(notifications, chunk_size=None):
+    """Записывает уведомления пачками bulk_create и возвращает их число"""
+    chunk_size = chunk_size or CHUNK_SIZE
+    iterator = iter(notifications)
+    created = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return created
+        with transaction.atomic():
+            chunk, replaced = coalesce(chunk)
+            Notification.objects.bulk_create(chunk)
+            deltas = Counter(notification.user_id for notification in chunk if not notification.is_read)
+            deltas.subtract(replaced)
+            change_unread_counts(deltas)
+        created += len(chunk)
+
+
+def _write_in_background(notifications):
+    try:
+        write_notifications(notifications)
+    except Exception:
+        logger.exception('Не удалось записать уведомления в фоне')
+    finally:
+        # Соединения потока не переиспользуются запросами, закрываем их сразу
+        connections.close_all()
+
+
+def send_notifications(notifications, count=None, background=None, using=None):
+    """
+    Планирует запись уведомлений после фиксации текущей транзакции.
+
+    notifications - итерируемый объект несохраненных Notification (может быть
+    генератором, он будет пройден один раз при записи), count - число
+    получателей для выбора фонового режима.
+    """
+    if background is None:
+        background = BACKGROUND and count is not None and count >= BACKGROUND_THRESHOLD
+
+    def write():
+        if background:
+            _get_executor().submit(_write_in_background, notifications)
+        else:
+            write_notifications(notifications)
+
+    transaction.on_commit(write, using=using)
+
+
+def notify_many(users, message, level='info', related_url=None, kind='', target='', background=None):
+    """
+    Создает одинаковое уведомление для каждого пользователя.
+
+    users - queryset, список пользователей или их id. Получатели определяются
+    сразу (до удаления связанных строк в той же транзакции), а объекты
+    уведомлений строятся лениво во время записи. kind и target определяют
+    слияние похожих уведомлений (см. coalesce).
+    """
+    user_ids = user_ids_of(users)
+    if not user_ids:
+        return
+
+    notifications = (
+        Notification(
+            user_id=user_id, message=message, level=level, related_url=related_url, kind=kind, target=target
+        )
+        for user_id in user_ids
+    )
+    send_notifications(notifications, count=len(user_ids), background=background)
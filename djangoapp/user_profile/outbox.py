@@ -0,0 +1,132 @@
+"""
+Отправка писем через очередь EmailOutbox.
+
+queue_email только создает строку очереди, поэтому письмо появляется
+лишь вместе с зафиксированной транзакцией запроса. send_pending забирает
+пачку готовых к отправке строк через SELECT ... FOR UPDATE SKIP LOCKED
+(несколько воркеров не получат одно и то же письмо) и отправляет их через
+одно SMTP-соединение. Неудачные письма откладываются с экспоненциальной
+задержкой, после EMAIL_OUTBOX_MAX_ATTEMPTS попыток получают статус failed.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+MAX_RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600)
+
+
+def queue_email(subject, body, recipients, from_email=None):
+    """Ставит письмо в очередь (вызывать внутри транзакции изменения)"""
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or '',
+        recipients=list(recipients),
+    )
+
+
+def queue_emails(emails, from_email=None):
+    """
+    Ставит в очередь несколько писем одним bulk_create.
+    emails - итерируемый объект (subject, body, recipients).
+    """
+    return EmailOutbox.objects.bulk_create([
+        EmailOutbox(subject=subject, body=body, from_email=from_email or '', recipients=list(recipients))
+        for subject, body, recipients in emails
+    ])
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: RETRY_DELAY * 2^(n-1), не больше MAX_RETRY_DELAY"""
+    return timedelta(seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+def _claim(batch_size, using):
+    queryset = EmailOutbox.objects.using(using).filter(
+        status='pending',
+        next_attempt_at__lte=timezone.now(),
+    ).order_by('next_attempt_at', 'id')
+    if connections[using].features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    return list(queryset[:batch_size])
+
+
+def _message(row, connection):
+    return EmailMessage(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=row.recipients,
+        connection=connection,
+    )
+
+
+def send_pending(batch_size=None, using='default'):
+    """
+    Отправляет одну пачку писем из очереди.
+    Возвращает (отправлено, отложено, окончательно не отправлено).
+    """
+    batch_size = batch_size or BATCH_SIZE
+    sent_ids = []
+    failed = []
+
+    # Строки заблокированы до конца транзакции: пока пачка отправляется,
+    # другие воркеры их пропускают, а при падении воркера письма останутся в очереди
+    with transaction.atomic(using=using):
+        rows = _claim(batch_size, using)
+        if not rows:
+            return 0, 0, 0
+
+        mail_connection = get_connection(fail_silently=False)
+        try:
+            mail_connection.open()
+        except Exception as e:
+            logger.warning('Не удалось подключиться к почтовому серверу: %s', e)
+            failed = [(row, e) for row in rows]
+        else:
+            try:
+                for row in rows:
+                    try:
+                        mail_connection.send_messages([_message(row, mail_connection)])
+                    except Exception as e:
+                        failed.append((row, e))
+                    else:
+                        sent_ids.append(row.pk)
+            finally:
+                mail_connection.close()
+
+        now = timezone.now()
+        EmailOutbox.objects.using(using).filter(pk__in=sent_ids).update(
+            status='sent',
+            sent_at=now,
+            attempts=F('attempts') + 1,
+            last_error='',
+        )
+
+        retried = 0
+        for row, error in failed:
+            row.attempts += 1
+            row.last_error = str(error)
+            if row.attempts >= MAX_ATTEMPTS:
+                row.status = 'failed'
+            else:
+                row.next_attempt_at = now + retry_delay(row.attempts)
+                retried += 1
+        EmailOutbox.objects.using(using).bulk_update(
+            [row for row, _ in failed],
+            ['attempts', 'last_error', 'status', 'next_attempt_at'],
+        )
+
+    return len(sent_ids), retried, len(failed) - retried
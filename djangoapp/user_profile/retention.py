@@ -0,0 +1,42 @@
+"""
+Очистка прочитанных уведомлений по сроку хранения.
+
+Уведомления удаляются (или переносятся в NotificationArchive) пачками по
+chunk_size строк, каждая пачка - отдельная короткая транзакция, поэтому
+очистка большой таблицы не держит долгих блокировок. Непрочитанные
+уведомления не затрагиваются, и счетчики непрочитанных не меняются.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+
+RETENTION_DAYS = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {})
+RETENTION_MODE = getattr(settings, 'NOTIFICATION_RETENTION_MODE', 'delete')
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'message', 'level', 'created_at', 'related_url')
+
+
+def expired_notifications(level, days, now=None):
+    """Прочитанные уведомления уровня level старше days дней"""
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Notification.objects.filter(is_read=True, level=level, created_at__lt=cutoff).order_by()
+
+
+def prune_chunk(queryset, chunk_size, archive=False):
+    """Удаляет (архивирует) одну пачку строк queryset и возвращает ее размер"""
+    with transaction.atomic():
+        rows = list(queryset.values(*ARCHIVE_FIELDS)[:chunk_size])
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        if archive:
+            NotificationArchive.objects.bulk_create(
+                [NotificationArchive(**row) for row in rows],
+                ignore_conflicts=True
+            )
+        Notification.objects.filter(pk__in=ids).delete()
+        return len(ids)
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db import connections
+from django.db.models.signals import post_migrate, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserProfile
+from .models import UserProfile, Notification
+from .notifications import change_unread_counts
 
 User = get_user_model()
 
@@ -9,4 +11,29 @@ User = get_user_model()
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+        UserProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, raw=False, **kwargs):
+    """Увеличивает счетчик непрочитанных при создании уведомления через save()"""
+    if created and not raw and not instance.is_read:
+        change_unread_counts({instance.user_id: 1})
+
+
+@receiver(post_migrate)
+def create_user_email_index(sender, using, **kwargs):
+    """
+    Индекс auth_user.email для поиска приглашаемых по email.
+    Модель User принадлежит django.contrib.auth, поэтому индекс создается
+    после migrate (повторный вызов безопасен).
+    """
+    if sender.name == 'user_profile':
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE INDEX IF NOT EXISTS {} ON {} ({})'.format(
+                connection.ops.quote_name('auth_user_email_idx'),
+                connection.ops.quote_name(User._meta.db_table),
+                connection.ops.quote_name('email'),
+            ))
+
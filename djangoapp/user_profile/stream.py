@@ -0,0 +1,223 @@
+"""
+Поток уведомлений в реальном времени (Server-Sent Events).
+
+Каждое открытое соединение - асинхронный генератор, который ждет сигнала
+в asyncio.Queue, поэтому тысячи простаивающих клиентов не занимают потоков.
+Сигнал "у пользователя что-то изменилось" приходит от брокера:
+
+- PostgresBroadcaster: publish делает pg_notify, а один поток на процесс
+  слушает канал (LISTEN) и будит подписчиков. Работает с несколькими
+  процессами и серверами.
+- LocalBroadcaster: сигнал передается только внутри процесса (один сервер
+  с одним процессом, разработка, SQLite).
+
+Получив сигнал, поток сам читает новые уведомления (id больше последнего
+отправленного) и счетчик непрочитанных. id события - id последнего
+уведомления, так что переподключение с Last-Event-ID продолжает поток без
+пропусков.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+from .models import Notification, UserProfile
+
+logger = logging.getLogger(__name__)
+
+BACKEND = getattr(settings, 'NOTIFICATION_STREAM_BACKEND', 'auto')
+HEARTBEAT = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+RETRY = getattr(settings, 'NOTIFICATION_STREAM_RETRY', 5000)
+CHANNEL = 'quicksolve_notifications'
+
+# Сколько уведомлений отправляется за одно чтение из базы
+BATCH_SIZE = 50
+# Ограничение размера payload pg_notify (8000 байт)
+NOTIFY_IDS_PER_MESSAGE = 500
+
+
+class LocalBroadcaster:
+    """Подписки пользователей на изменения уведомлений внутри процесса"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Возвращает очередь, в которую приходит сигнал об изменениях"""
+        queue = asyncio.Queue(maxsize=1)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        self.start()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            self._subscribers[user_id] = {item for item in self._subscribers[user_id] if item[1] is not queue}
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    def start(self):
+        pass
+
+    def deliver(self, user_ids):
+        """Будит подписчиков; вызывается из любого потока"""
+        with self._lock:
+            targets = [item for user_id in user_ids for item in self._subscribers.get(user_id, ())]
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(_signal, queue)
+            except RuntimeError:
+                # Цикл событий уже закрыт, подписка будет снята генератором
+                pass
+
+    def publish(self, user_ids):
+        self.deliver(user_ids)
+
+
+class PostgresBroadcaster(LocalBroadcaster):
+    """Сигналы через LISTEN/NOTIFY: доходят до подписчиков во всех процессах"""
+
+    def __init__(self, using='default'):
+        super().__init__()
+        self.using = using
+        self._listener = None
+
+    def publish(self, user_ids):
+        user_ids = list(user_ids)
+        with connections[self.using].cursor() as cursor:
+            for start in range(0, len(user_ids), NOTIFY_IDS_PER_MESSAGE):
+                payload = ','.join(str(user_id) for user_id in user_ids[start:start + NOTIFY_IDS_PER_MESSAGE])
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+    def start(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='notifications-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+
+        while True:
+            try:
+                params = connections[self.using].get_connection_params()
+                connection = psycopg2.connect(**params)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                while True:
+                    if select.select([connection], [], [], HEARTBEAT) == ([], [], []):
+                        continue
+                    connection.poll()
+                    user_ids = set()
+                    while connection.notifies:
+                        payload = connection.notifies.pop(0).payload
+                        user_ids.update(int(user_id) for user_id in payload.split(',') if user_id)
+                    self.deliver(user_ids)
+            except Exception:
+                logger.exception('Соединение LISTEN потеряно, переподключение')
+                time.sleep(1)
+
+
+def _signal(queue):
+    # Очередь на один элемент: несколько изменений подряд сливаются в один сигнал
+    if queue.empty():
+        queue.put_nowait(True)
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            backend = BACKEND
+            if backend == 'auto':
+                backend = 'local'
+                if connections['default'].vendor == 'postgresql':
+                    # Слушатель LISTEN написан для psycopg2
+                    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+                    if not is_psycopg3:
+                        backend = 'postgresql'
+            _broadcaster = PostgresBroadcaster() if backend == 'postgresql' else LocalBroadcaster()
+        return _broadcaster
+
+
+def publish(user_ids):
+    """Сообщает открытым потокам пользователей об изменениях"""
+    try:
+        get_broadcaster().publish(user_ids)
+    except Exception:
+        logger.exception('Не удалось отправить сигнал потокам уведомлений')
+
+
+def latest_notification_id(user_id):
+    return Notification.objects.filter(user_id=user_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def load_changes(user_id, last_id):
+    """Новые уведомления после last_id и текущий счетчик непрочитанных"""
+    rows = list(
+        Notification.objects.filter(user_id=user_id, id__gt=last_id).order_by('id')
+        .values('id', 'message', 'level', 'is_read', 'created_at', 'related_url', 'count')[:BATCH_SIZE]
+    )
+    unread = UserProfile.objects.filter(user_id=user_id).values_list('unread_notifications_count', flat=True).first()
+    return rows, unread or 0
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False))
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(user_id, last_id=None):
+    """
+    Асинхронный генератор событий SSE для пользователя.
+    last_id - id последнего полученного уведомления (Last-Event-ID); если он
+    не передан, поток начинается с текущего момента.
+    """
+    broadcaster = get_broadcaster()
+    queue = broadcaster.subscribe(user_id)
+    try:
+        if last_id is None:
+            last_id = await sync_to_async(latest_notification_id)(user_id)
+        yield f'retry: {RETRY}\n\n'
+
+        unread = None
+        while True:
+            # Отправляем все, что накопилось, пачками по BATCH_SIZE
+            while True:
+                rows, count = await sync_to_async(load_changes)(user_id, last_id)
+                for row in rows:
+                    last_id = row['id']
+                    yield format_event('notification', row, last_id)
+                if count != unread:
+                    unread = count
+                    yield format_event('unread_count', {'count': unread}, last_id)
+                if len(rows) < BATCH_SIZE:
+                    break
+
+            # Ждем сигнала; при тишине шлем комментарий, чтобы прокси не закрыл соединение
+            while True:
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=HEARTBEAT)
+                    break
+                except asyncio.TimeoutError:
+                    yield ': heartbeat\n\n'
+    finally:
+        broadcaster.unsubscribe(user_id, queue)
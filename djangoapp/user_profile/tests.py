@@ -1,3 +1,202 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.db import connection, transaction
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import EmailOutbox, Notification, UserProfile
+from .notifications import notify_many
+from .outbox import MAX_ATTEMPTS, MAX_RETRY_DELAY, RETRY_DELAY, _claim, queue_emails, retry_delay, send_pending
+
+User = get_user_model()
+
+
+class NotificationCoalesceTest(TestCase):
+    """Слияние похожих уведомлений в сводную строку"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('user', 'user@example.com')
+
+    def notify(self, message, kind):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_many([self.user], message, kind=kind, target='team:1')
+
+    def unread_count(self):
+        return UserProfile.objects.get(user=self.user).unread_notifications_count
+
+    def test_digest_replaces_row_with_new_id(self):
+        self.notify('first', 'membership_added')
+        first = Notification.objects.get(user=self.user)
+        self.notify('second', 'membership_added')
+
+        digest = Notification.objects.get(user=self.user)
+        self.assertGreater(digest.pk, first.pk)
+        self.assertGreaterEqual(digest.created_at, first.created_at)
+        self.assertEqual(digest.count, 2)
+        self.assertTrue(digest.message.startswith('second'))
+        self.assertEqual(self.unread_count(), 1)
+
+    def test_different_actions_are_not_merged(self):
+        self.notify('added', 'membership_added')
+        self.notify('removed', 'membership_removed')
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(self.unread_count(), 2)
+
+    def test_summaries_are_not_merged(self):
+        self.notify('Вы повысили 3 пользователей', 'role_promoted_summary')
+        self.notify('Вы повысили 2 пользователей', 'role_promoted_summary')
+        self.assertEqual(Notification.objects.filter(user=self.user, count=1).count(), 2)
+
+
+class NotificationBatchTest(TestCase):
+    """Пакетные операции с уведомлениями"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('user', 'user@example.com')
+        self.client.force_login(self.user)
+
+    def test_invalid_before_date_is_rejected(self):
+        response = self.client.post(
+            reverse('mark_notifications_read'), {'before': '2024-02-30T00:00'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['success'])
+
+
+class EmailOutboxTest(TestCase):
+    """Отправка очереди писем: повторы с задержкой и выборка SKIP LOCKED"""
+
+    def queue(self, count=1):
+        return queue_emails([(f'Письмо {i}', 'Текст', [f'user{i}@example.com']) for i in range(count)])
+
+    def fail_for(self, recipient):
+        """Подменяет отправку так, что письма на recipient падают"""
+        original = locmem.EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            if recipient in messages[0].to:
+                raise OSError('550 mailbox unavailable')
+            return original(backend, messages)
+
+        return mock.patch.object(locmem.EmailBackend, 'send_messages', autospec=True, side_effect=send_messages)
+
+    def test_sends_batch_over_one_connection(self):
+        self.queue(3)
+        with mock.patch('user_profile.outbox.get_connection', wraps=get_connection) as connection_factory:
+            self.assertEqual(send_pending(), (3, 0, 0))
+        self.assertEqual(connection_factory.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(EmailOutbox.objects.exclude(status='sent').exists())
+        self.assertEqual(send_pending(), (0, 0, 0))
+
+    def test_failed_message_is_retried_with_backoff(self):
+        self.queue(2)
+        with self.fail_for('user1@example.com'):
+            started = timezone.now()
+            self.assertEqual(send_pending(), (1, 1, 0))
+        row = EmailOutbox.objects.get(recipients=['user1@example.com'])
+        self.assertEqual((row.status, row.attempts), ('pending', 1))
+        self.assertIn('550', row.last_error)
+        self.assertGreaterEqual(row.next_attempt_at, started + retry_delay(1))
+
+        # До срока повтора письмо не выбирается
+        self.assertEqual(send_pending(), (0, 0, 0))
+
+        # После MAX_ATTEMPTS неудач письмо получает статус failed
+        with self.fail_for('user1@example.com'):
+            for attempt in range(2, MAX_ATTEMPTS + 1):
+                EmailOutbox.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+                expected = (0, 0, 1) if attempt == MAX_ATTEMPTS else (0, 1, 0)
+                self.assertEqual(send_pending(), expected)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('failed', MAX_ATTEMPTS))
+        EmailOutbox.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_pending(), (0, 0, 0))
+
+    def test_connection_failure_defers_whole_batch(self):
+        self.queue(2)
+        with self.assertLogs('user_profile.outbox', 'WARNING'), \
+                mock.patch.object(locmem.EmailBackend, 'open', side_effect=OSError('connection refused')):
+            self.assertEqual(send_pending(), (0, 2, 0))
+        self.assertEqual(list(EmailOutbox.objects.values_list('attempts', flat=True)), [1, 1])
+        self.assertEqual(mail.outbox, [])
+
+    def test_retry_delay_doubles_up_to_limit(self):
+        self.assertEqual(retry_delay(1), timedelta(seconds=RETRY_DELAY))
+        self.assertEqual(retry_delay(3), timedelta(seconds=RETRY_DELAY * 4))
+        self.assertEqual(retry_delay(50), timedelta(seconds=MAX_RETRY_DELAY))
+
+    def test_claim_skips_locked_rows(self):
+        rows = self.queue(3)
+        EmailOutbox.objects.filter(pk=rows[0].pk).update(status='sent')
+        EmailOutbox.objects.filter(pk=rows[1].pk).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        original = QuerySet.select_for_update
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', True), \
+                mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=original) as select_for_update:
+            with transaction.atomic():
+                claimed = _claim(10, 'default')
+        select_for_update.assert_called_once_with(mock.ANY, skip_locked=True)
+        self.assertEqual([row.pk for row in claimed], [rows[2].pk])
+
+
+class NotificationCursorTest(TestCase):
+    """Курсоры before_id/since_id API уведомлений"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('user', 'user@example.com')
+        other = User.objects.create_user('other', 'other@example.com')
+        Notification.objects.bulk_create(
+            [Notification(user=self.user, message=f'{i}', is_read=i % 2 == 0) for i in range(7)]
+            + [Notification(user=other, message='other')]
+        )
+        self.ids = list(Notification.objects.filter(user=self.user).order_by('-id').values_list('id', flat=True))
+        self.client.force_login(self.user)
+
+    def fetch(self, **params):
+        return self.client.get(reverse('all_notifications'), params).json()
+
+    def test_before_id_pages_cover_history_once(self):
+        collected = []
+        page = self.fetch(limit=3)
+        collected += [row['id'] for row in page['notifications']]
+        while page['has_more']:
+            page = self.fetch(limit=3, before_id=page['next_before_id'])
+            collected += [row['id'] for row in page['notifications']]
+        self.assertEqual(collected, self.ids)
+        self.assertEqual([len(page['notifications']), page['next_before_id']], [1, None])
+
+    def test_exact_page_boundary(self):
+        page = self.fetch(limit=7)
+        self.assertFalse(page['has_more'])
+        self.assertIsNone(page['next_before_id'])
+        page = self.fetch(limit=6)
+        self.assertTrue(page['has_more'])
+        self.assertEqual(self.fetch(before_id=page['next_before_id'])['notifications'][0]['id'], self.ids[-1])
+
+    def test_since_id_returns_only_new_rows(self):
+        newest = self.ids[0]
+        page = self.fetch(since_id=newest)
+        self.assertEqual((page['notifications'], page['next_since_id']), ([], newest))
+
+        Notification.objects.bulk_create([Notification(user=self.user, message=f'new {i}') for i in range(3)])
+        page = self.fetch(since_id=newest, limit=2)
+        self.assertEqual(len(page['notifications']), 2)
+        self.assertTrue(page['has_more'])
+        page = self.fetch(since_id=page['next_since_id'], limit=2)
+        self.assertEqual([row['message'] for row in page['notifications']], ['new 2'])
+        self.assertFalse(page['has_more'])
 
-# Create your tests here.
+    def test_unread_filter_and_invalid_params(self):
+        page = self.fetch(unread=1)
+        unread_ids = Notification.objects.filter(user=self.user, is_read=False).order_by('-id').values_list('id', flat=True)
+        self.assertEqual([row['id'] for row in page['notifications']], list(unread_ids))
+        self.assertEqual(self.client.get(reverse('all_notifications'), {'before_id': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('all_notifications'), {'since_id': -1}).status_code, 400)
@@ -8,5 +8,8 @@ urlpatterns = [
     path('account/regenerate_code/', views.RegenerateUniqueCodeView.as_view(), name='regenerate_code'),
     path('notifications/<int:notification_id>/', views.NotificationDetailView.as_view(), name='notification_detail'),
     path('notifications/all/', views.AllNotificationsView.as_view(), name='all_notifications'),
+    path('notifications/stream/', views.NotificationStreamView.as_view(), name='notifications_stream'),
     path('notifications/<int:notification_id>/mark-read/', views.MarkNotificationReadView.as_view(), name='mark_notification_read'),
+    path('notifications/mark-read/', views.MarkNotificationsReadView.as_view(), name='mark_notifications_read'),
+    path('notifications/delete/', views.DeleteNotificationsView.as_view(), name='delete_notifications'),
 ]
\ No newline at end of file
@@ -4,7 +4,12 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from .models import User, UserProfile, Notification
 from .forms import UserProfileForm
-from django.http import JsonResponse
+from .notifications import delete_notifications, get_unread_count, mark_read
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .stream import event_stream
 import uuid
 
 class MyProfileView(LoginRequiredMixin, View):
@@ -108,26 +113,65 @@ class NotificationDetailView(LoginRequiredMixin, View):
         })
 
 class AllNotificationsView(LoginRequiredMixin, View):
-    """Получить все уведомления пользователя"""
+    """
+    Уведомления пользователя с курсорной пагинацией.
+    
+    before_id - более старые уведомления (от новых к старым),
+    since_id - появившиеся после последнего опроса (от старых к новым),
+    limit - размер страницы, unread=1 - только непрочитанные.
+    """
+    default_limit = 50
+    max_limit = 200
+    fields = ('id', 'message', 'level', 'is_read', 'created_at', 'related_url', 'count')
     
     def get(self, request):
+        try:
+            before_id = self.get_int_param(request, 'before_id')
+            since_id = self.get_int_param(request, 'since_id')
+            limit = self.get_int_param(request, 'limit') or self.default_limit
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid parameters'}, status=400)
+        
+        limit = max(1, min(limit, self.max_limit))
         notifications = Notification.objects.filter(user=request.user)
+        if request.GET.get('unread') in ('1', 'true'):
+            notifications = notifications.filter(is_read=False)
         
-        notifications_data = []
-        for notification in notifications:
-            notifications_data.append({
-                'id': notification.id,
-                'message': notification.message,
-                'level': notification.level,
-                'is_read': notification.is_read,
-                'created_at': notification.created_at,
-                'related_url': notification.related_url or ''
-            })
+        if since_id is not None:
+            notifications = notifications.filter(id__gt=since_id).order_by('id')
+        else:
+            if before_id is not None:
+                notifications = notifications.filter(id__lt=before_id)
+            notifications = notifications.order_by('-id')
         
-        return JsonResponse({
+        # Берем на одну строку больше, чтобы узнать, есть ли продолжение
+        rows = list(notifications.values(*self.fields)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        for row in rows:
+            row['related_url'] = row['related_url'] or ''
+        
+        data = {
             'success': True,
-            'notifications': notifications_data
-        })
+            'notifications': rows,
+            'has_more': has_more,
+            'unread_count': get_unread_count(request.user),
+        }
+        if since_id is not None:
+            data['next_since_id'] = rows[-1]['id'] if rows else since_id
+        else:
+            data['next_before_id'] = rows[-1]['id'] if rows and has_more else None
+        
+        return JsonResponse(data)
+    
+    def get_int_param(self, request, name):
+        value = request.GET.get(name)
+        if value in (None, ''):
+            return None
+        value = int(value)
+        if value < 0:
+            raise ValueError(name)
+        return value
 
 class MarkNotificationReadView(LoginRequiredMixin, View):
     """Пометить уведомление как прочитанное"""
@@ -138,7 +182,99 @@ class MarkNotificationReadView(LoginRequiredMixin, View):
             return JsonResponse({'success': False, 'error': 'Invalid request'})
         
         notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-        notification.is_read = True
-        notification.save()
+        _, unread_count = mark_read(request.user, Notification.objects.filter(pk=notification.pk))
+        
+        return JsonResponse({'success': True, 'unread_count': unread_count})
+
+
+class NotificationBatchMixin:
+    """
+    Выбор набора уведомлений пользователя из POST:
+    all=1 - все, ids[] - перечисленные, before - созданные раньше момента (ISO 8601).
+    """
+    
+    def get_selected_notifications(self, request):
+        """Возвращает queryset или None, если набор не указан или указан неверно"""
+        notifications = Notification.objects.filter(user=request.user)
+        
+        if request.POST.get('all') in ('1', 'true'):
+            return notifications
+        
+        ids = request.POST.getlist('ids[]')
+        if ids:
+            try:
+                return notifications.filter(id__in=[int(notification_id) for notification_id in ids])
+            except ValueError:
+                return None
+        
+        try:
+            before = parse_datetime(request.POST.get('before', ''))
+        except ValueError:
+            # Формат верный, но даты не существует (например, 2024-02-30)
+            return None
+        if before is not None:
+            if timezone.is_naive(before):
+                before = timezone.make_aware(before)
+            return notifications.filter(created_at__lt=before)
+        
+        return None
+
+
+class MarkNotificationsReadView(LoginRequiredMixin, NotificationBatchMixin, View):
+    """Пометить набор уведомлений прочитанными одним UPDATE"""
+    
+    def post(self, request):
+        if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({'success': False, 'error': 'Invalid request'})
+        
+        notifications = self.get_selected_notifications(request)
+        if notifications is None:
+            return JsonResponse({'success': False, 'error': 'No notifications selected'})
+        
+        updated, unread_count = mark_read(request.user, notifications)
+        
+        return JsonResponse({'success': True, 'updated_count': updated, 'unread_count': unread_count})
+
+
+class DeleteNotificationsView(LoginRequiredMixin, NotificationBatchMixin, View):
+    """Удалить набор уведомлений"""
+    
+    def post(self, request):
+        if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({'success': False, 'error': 'Invalid request'})
+        
+        notifications = self.get_selected_notifications(request)
+        if notifications is None:
+            return JsonResponse({'success': False, 'error': 'No notifications selected'})
+        
+        deleted, unread_count = delete_notifications(request.user, notifications)
+        
+        return JsonResponse({'success': True, 'deleted_count': deleted, 'unread_count': unread_count})
+
+
+class NotificationStreamView(View):
+    """Поток новых уведомлений и счетчика непрочитанных (Server-Sent Events)"""
+    
+    async def get(self, request):
+        # Под WSGI потоковый ответ из асинхронного генератора не отправляется до его
+        # завершения и навсегда занимает поток сервера
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'success': False, 'error': 'Stream requires an ASGI server'}, status=503)
+        
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+        
+        # EventSource передает Last-Event-ID при переподключении;
+        # параметр last_event_id позволяет продолжить поток после перезагрузки страницы
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        try:
+            last_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_id = None
         
-        return JsonResponse({'success': True})
\ No newline at end of file
+        return StreamingHttpResponse(
+            event_stream(user.pk, last_id),
+            content_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
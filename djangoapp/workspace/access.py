@@ -0,0 +1,201 @@
+"""
+Контекст прав доступа пользователя в рабочей области.
+
+AccessContext создается один раз на запрос для пары (пользователь, workspace)
+и загружает роль в workspace, роли во всех командах и настройки прав
+несколькими запросами (между запросами данные хранятся в permission_cache).
+Методы моделей (has_permission,
+is_team_visible_to_user, Task.can_user_edit* и т.д.) принимают его
+через аргумент access и отвечают из памяти.
+"""
+from . import permission_cache
+from .models import TeamMembership, TeamRoleAccess, Workspace, WorkspaceMembership, WorkspaceRoleAccess
+
+
+# Флаги прав пользователя на задачу, возвращаемые task_permissions
+TASK_PERMISSION_FLAGS = (
+    'can_edit',
+    'can_edit_content',
+    'can_edit_team',
+    'can_edit_assignee',
+    'can_edit_visibility',
+    'can_change_permissions',
+    'can_delete',
+    'is_special_editor',
+)
+
+
+class AccessContext:
+    """Права пользователя в рабочей области, загруженные один раз"""
+
+    def __init__(self, user, workspace):
+        self.user = user
+        self.workspace = workspace
+        self.workspace_role = None
+        self.team_roles = {}
+        self._workspace_access = None
+        self._team_accesses = None
+
+        if not user.is_authenticated:
+            return
+
+        self.workspace_role, self.team_roles = permission_cache.get_or_load(
+            workspace.pk,
+            f'user:{user.pk}',
+            self._load_roles
+        )
+
+    def _load_roles(self):
+        """Загружает роли пользователя в workspace и во всех его командах"""
+        membership = WorkspaceMembership.objects.filter(
+            workspace=self.workspace,
+            user=self.user
+        ).only('role').first()
+        team_roles = dict(
+            TeamMembership.objects.filter(
+                team__workspace=self.workspace,
+                user=self.user
+            ).values_list('team_id', 'role')
+        )
+        return membership.role if membership else None, team_roles
+
+    @classmethod
+    def for_request(cls, request, workspace):
+        """Возвращает контекст, закешированный на объекте запроса"""
+        contexts = getattr(request, '_access_contexts', None)
+        if contexts is None:
+            contexts = request._access_contexts = {}
+        if workspace.pk not in contexts:
+            contexts[workspace.pk] = cls(request.user, workspace)
+        return contexts[workspace.pk]
+
+    # === WORKSPACE ===
+
+    @property
+    def is_member(self):
+        return self.workspace_role is not None
+
+    @property
+    def is_owner(self):
+        return self.workspace_role == 'owner'
+
+    @property
+    def workspace_access(self):
+        """Настройки прав workspace (создаются при отсутствии, как и в представлениях)"""
+        if self._workspace_access is None:
+            self._workspace_access = permission_cache.get_or_load(
+                self.workspace.pk,
+                'workspace_access',
+                lambda: WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)[0]
+            )
+            self._workspace_access.workspace = self.workspace
+        return self._workspace_access
+
+    def has_workspace_permission(self, permission_type):
+        """Проверяет право пользователя в workspace"""
+        return self.workspace_access.has_permission(self.user, permission_type, access=self)
+
+    # === TEAMS ===
+
+    def team_role(self, team):
+        """Возвращает роль пользователя в команде"""
+        return self.team_roles.get(_team_id(team))
+
+    def is_team_member(self, team):
+        return _team_id(team) in self.team_roles
+
+    def is_team_leader(self, team):
+        return self.team_role(team) == 'leader'
+
+    @property
+    def team_accesses(self):
+        """Настройки прав всех команд workspace, загруженные одним запросом"""
+        if self._team_accesses is None:
+            self._team_accesses = dict(permission_cache.get_or_load(
+                self.workspace.pk,
+                'team_accesses',
+                lambda: {
+                    team_access.team_id: team_access
+                    for team_access in TeamRoleAccess.objects.filter(team__workspace=self.workspace)
+                }
+            ))
+        return self._team_accesses
+
+    def get_team_access(self, team):
+        """
+        Возвращает настройки прав команды.
+        Если настроек нет, возвращаются права по умолчанию без записи в базу.
+        """
+        team_id = _team_id(team)
+        team_access = self.team_accesses.get(team_id)
+        if team_access is None:
+            team_access = TeamRoleAccess(team_id=team_id)
+            team_access.set_default_permissions()
+            self.team_accesses[team_id] = team_access
+        return team_access
+
+    def has_team_permission(self, team, permission_type):
+        """Проверяет право пользователя в команде"""
+        return self.get_team_access(team).has_permission(self.user, permission_type, access=self)
+
+    def is_team_visible(self, team):
+        """Проверяет, видна ли команда пользователю"""
+        return self.get_team_access(team).is_team_visible_to_user(self.user, access=self)
+
+    def filter_visible_teams(self, teams):
+        """Оставляет в списке только видимые пользователю команды"""
+        return [team for team in teams if self.is_team_visible(team)]
+
+    def teams_with_permission(self, teams, permission_type):
+        """Оставляет в списке только команды, где у пользователя есть право"""
+        return [team for team in teams if self.has_team_permission(team, permission_type)]
+
+    # === TASKS ===
+
+    def can_delete_task(self, task):
+        """Проверяет право на удаление задачи (команды или workspace)"""
+        if task.team_id is not None:
+            return self.has_team_permission(task.team_id, 'can_delete_tasks')
+        return self.has_workspace_permission('can_delete_tasks')
+
+    def task_permissions(self, task):
+        """Возвращает все флаги TASK_PERMISSION_FLAGS для задачи без запросов к базе"""
+        user = self.user
+        return {
+            'can_edit': task.can_user_edit(user, access=self),
+            'can_edit_content': task.can_user_edit_content(user, access=self),
+            'can_edit_team': task.can_user_edit_team(user, access=self),
+            'can_edit_assignee': task.can_user_edit_assignee(user, access=self),
+            'can_edit_visibility': task.can_user_edit_visibility(user, access=self),
+            'can_change_permissions': task.can_user_change_permissions(user, access=self),
+            'can_delete': self.can_delete_task(task),
+            'is_special_editor': task.is_special_editor(user, access=self),
+        }
+
+
+def task_permission_matrix(tasks, user, access=None):
+    """
+    Возвращает {task.pk: {флаг: bool}} для списка или queryset задач.
+
+    Права загружаются один раз на рабочую область, поэтому число запросов
+    не зависит от количества задач. Переданный access используется для
+    задач своей рабочей области.
+    """
+    tasks = list(tasks)
+    contexts = {}
+    if access is not None:
+        contexts[access.workspace.pk] = access
+
+    missing_ids = {task.workspace_id for task in tasks} - set(contexts)
+    if missing_ids:
+        for workspace in Workspace.objects.filter(pk__in=missing_ids):
+            contexts[workspace.pk] = AccessContext(user, workspace)
+
+    return {
+        task.pk: contexts[task.workspace_id].task_permissions(task)
+        for task in tasks
+    }
+
+
+def _team_id(team):
+    return team if isinstance(team, int) else team.pk
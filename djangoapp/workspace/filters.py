@@ -0,0 +1,33 @@
+"""
+Фильтры списка задач, общие для TaskListView и manage.py check_task_query_plans.
+
+Условия по дедлайну строятся диапазонами по колонке deadline (а не
+deadline__date), чтобы запросы использовали индекс (workspace, deadline).
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+DEADLINE_FILTERS = [
+    ('expired', 'Просроченные'),
+    ('today', 'На сегодня'),
+    ('week', 'На неделю'),
+    ('future', 'Будущие'),
+]
+
+
+def deadline_q(name, now=None):
+    """Условие фильтра по дедлайну или None для неизвестного фильтра"""
+    now = now or timezone.now()
+    if name == 'expired':
+        return Q(deadline__lt=now)
+    if name == 'today':
+        # Границы текущего дня в часовом поясе пользователя
+        today_start = timezone.make_aware(datetime.combine(timezone.localdate(now), time.min))
+        return Q(deadline__gte=today_start, deadline__lt=today_start + timedelta(days=1))
+    if name == 'week':
+        return Q(deadline__range=[now, now + timedelta(days=7)])
+    if name == 'future':
+        return Q(deadline__gt=now)
+    return None
@@ -104,6 +104,7 @@ class TaskCreateForm(forms.ModelForm):
         self.team_from_get = kwargs.pop('team_from_get', None)
         self.can_create_in_workspace = kwargs.pop('can_create_in_workspace', False)
         self.user_teams_with_task_create_rights = kwargs.pop('user_teams_with_task_create_rights', [])
+        self.access = kwargs.pop('access', None)
         
         super().__init__(*args, **kwargs)
         
@@ -163,16 +164,22 @@ class TaskCreateForm(forms.ModelForm):
         
         # Проверка прав для создания задачи в выбранной команде
         if team:
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-            if not team_access.has_permission(self.user, 'can_create_tasks'):
+            if self.access is not None:
+                team_access = self.access.get_team_access(team)
+            else:
+                team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
+            if not team_access.has_permission(self.user, 'can_create_tasks', access=self.access):
                 self.add_error(
                     'team',
                     'У вас нет прав для создания задач в этой команде'
                 )
         else:
             # Проверка прав для создания задачи без команды (в workspace)
-            workspace_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
-            if not workspace_access.has_permission(self.user, 'can_create_tasks'):
+            if self.access is not None:
+                workspace_access = self.access.workspace_access
+            else:
+                workspace_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
+            if not workspace_access.has_permission(self.user, 'can_create_tasks', access=self.access):
                 self.add_error(
                     None,
                     'У вас нет прав для создания задач без команды'
@@ -0,0 +1,234 @@
+"""
+Массовый импорт задач из CSV или JSON.
+
+Участники workspace, команды и составы команд (TaskValidator) загружаются
+один раз, после чего все строки проверяются в памяти и записываются через
+bulk_create пачками внутри одной транзакции. Используется TaskImportView и командой
+manage.py import_tasks.
+"""
+import csv
+import io
+import json
+import secrets
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .access import AccessContext
+from .models import Task, Team, WorkspaceMembership
+from .validators import TaskValidator
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'да', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'нет', 'off'}
+BOOLEAN_FIELDS = ('visible', 'can_edit_content', 'can_edit_team', 'can_edit_assignee', 'can_edit_visibility')
+
+
+def parse_rows(content, file_format):
+    """
+    Разбирает CSV или JSON (список объектов) в список словарей.
+    Любой нечитаемый файл приводит к ValueError.
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if file_format == 'csv':
+        try:
+            return list(csv.DictReader(io.StringIO(content)))
+        except csv.Error as e:
+            raise ValueError(f'Ошибка CSV: {e}') from e
+    if file_format == 'json':
+        rows = json.loads(content)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError('JSON должен содержать список объектов задач')
+        return rows
+    raise ValueError('Неподдерживаемый формат файла')
+
+
+class TaskImportResult:
+    """Итог импорта: число созданных задач и ошибки по номерам строк"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.errors.append({'row': row_number, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'errors': self.errors}
+
+
+class TaskImporter:
+    """Проверяет и создает задачи workspace от имени пользователя"""
+    chunk_size = 1000
+
+    def __init__(self, workspace, user, access=None):
+        self.workspace = workspace
+        self.user = user
+        self.access = access if access is not None else AccessContext(user, workspace)
+
+        # Участники workspace: поиск по username и email, сначала точный,
+        # затем без учета регистра, если он указывает на одного участника
+        self.members_by_login = {}
+        members_by_lower_login = defaultdict(set)
+        memberships = list(WorkspaceMembership.objects.filter(workspace=workspace).values_list(
+            'user_id', 'user__username', 'user__email'
+        ))
+        for user_id, username, email in memberships:
+            self.members_by_login[username] = user_id
+            members_by_lower_login[username.lower()].add(user_id)
+        for user_id, username, email in memberships:
+            if email:
+                self.members_by_login.setdefault(email, user_id)
+                members_by_lower_login[email.lower()].add(user_id)
+        self.members_by_lower_login = {
+            login: user_ids.pop() if len(user_ids) == 1 else None
+            for login, user_ids in members_by_lower_login.items()
+        }
+
+        # Команды workspace по url_hash и названию, участники workspace и команд
+        self.teams = {}
+        for team in Team.objects.filter(workspace=workspace):
+            self.teams[team.url_hash] = team
+            self.teams.setdefault(team.name.lower(), team)
+        self.validator = TaskValidator.for_workspaces([workspace.pk])
+
+        self.status_values = {value for value, _ in Task.STATUS_CHOICES}
+        self.default_status = Task._meta.get_field('status').default
+        self.default_priority = Task._meta.get_field('priority').default
+        self.priority_values = {value for value, _ in Task.PRIORITY_CHOICES}
+        self.default_flags = {field: Task._meta.get_field(field).default for field in BOOLEAN_FIELDS}
+        self.can_create_in_workspace = self.access.has_workspace_permission('can_create_tasks')
+        self.timezone = timezone.get_current_timezone()
+
+    def build_task(self, row):
+        """Возвращает (Task, errors) для одной строки без запросов к базе"""
+        errors = {}
+        row = {key.strip(): value for key, value in row.items() if key}
+
+        title = str(row.get('title') or '').strip()
+        if not title:
+            errors['title'] = 'Название задачи обязательно'
+        elif len(title) > Task._meta.get_field('title').max_length:
+            errors['title'] = 'Слишком длинное название задачи'
+
+        status = str(row.get('status') or self.default_status).strip()
+        if status not in self.status_values:
+            errors['status'] = f'Неизвестный статус: {status}'
+
+        priority = str(row.get('priority') or self.default_priority).strip()
+        if priority not in self.priority_values:
+            errors['priority'] = f'Неизвестный приоритет: {priority}'
+
+        # Команда по url_hash или названию и право создавать в ней задачи
+        team = None
+        team_value = str(row.get('team') or '').strip()
+        if team_value:
+            team = self.teams.get(team_value) or self.teams.get(team_value.lower())
+            if team is None:
+                errors['team'] = 'Команда должна принадлежать той же рабочей области'
+            elif not self.access.has_team_permission(team, 'can_create_tasks'):
+                errors['team'] = 'У вас нет прав для создания задач в этой команде'
+        elif not self.can_create_in_workspace:
+            errors['team'] = 'У вас нет прав для создания задач без команды'
+
+        # Исполнитель по username или email
+        assignee_id = None
+        assignee_value = str(row.get('assignee') or '').strip()
+        if assignee_value:
+            assignee_id = self.members_by_login.get(assignee_value)
+            if assignee_id is None:
+                lower_login = assignee_value.lower()
+                assignee_id = self.members_by_lower_login.get(lower_login)
+                if lower_login not in self.members_by_lower_login:
+                    errors['assignee'] = 'Исполнитель должен быть участником рабочей области'
+                elif assignee_id is None:
+                    errors['assignee'] = f'Исполнитель {assignee_value} неоднозначен: укажите username или email с точным регистром'
+
+        deadline = None
+        deadline_value = str(row.get('deadline') or '').strip()
+        if deadline_value:
+            deadline = self.parse_deadline(deadline_value)
+            if deadline is None:
+                errors['deadline'] = f'Неверный формат дедлайна: {deadline_value}'
+
+        flags = {}
+        for field in BOOLEAN_FIELDS:
+            value = row.get(field)
+            if isinstance(value, bool):
+                flags[field] = value
+                continue
+            # Пустая ячейка равносильна отсутствующей колонке
+            value = str(value if value is not None else '').strip().lower()
+            if not value:
+                flags[field] = self.default_flags[field]
+            elif value in TRUE_VALUES:
+                flags[field] = True
+            elif value in FALSE_VALUES:
+                flags[field] = False
+            else:
+                errors[field] = f'Неверное логическое значение: {row.get(field)}'
+
+        if errors:
+            return None, errors
+
+        task = Task(
+            workspace_id=self.workspace.pk,
+            team=team,
+            title=title,
+            description=str(row.get('description') or ''),
+            status=status,
+            priority=priority,
+            assignee_id=assignee_id,
+            reporter_id=self.user.pk,
+            updated_by_id=self.user.pk,
+            deadline=deadline,
+            url_hash=secrets.token_hex(32),
+            **flags
+        )
+        # Проверки Task.clean на предзагруженных участниках
+        errors = self.validator.get_errors(task)
+        if errors:
+            return None, errors
+        return task, {}
+
+    def parse_deadline(self, value):
+        """ISO дата-время или дата; наивные значения считаются в текущем часовом поясе"""
+        try:
+            deadline = parse_datetime(value)
+            if deadline is None:
+                date = parse_date(value)
+                if date is None:
+                    return None
+                deadline = datetime.combine(date, time(23, 59))
+        except ValueError:
+            return None
+        if timezone.is_naive(deadline):
+            deadline = timezone.make_aware(deadline, self.timezone)
+        return deadline
+
+    def run(self, rows, skip_invalid=False, dry_run=False):
+        """
+        Проверяет все строки и создает задачи.
+        Если есть ошибки и skip_invalid=False, ничего не записывается.
+        Номера строк начинаются с 1 (без учета заголовка CSV).
+        """
+        result = TaskImportResult()
+        tasks = []
+        for row_number, row in enumerate(rows, start=1):
+            task, errors = self.build_task(row)
+            if errors:
+                result.add_error(row_number, errors)
+            else:
+                tasks.append(task)
+
+        if dry_run or (result.errors and not skip_invalid):
+            return result
+
+        with transaction.atomic():
+            for start in range(0, len(tasks), self.chunk_size):
+                Task.objects.bulk_create(tasks[start:start + self.chunk_size])
+        result.created = len(tasks)
+        return result
@@ -0,0 +1,89 @@
+"""
+Сроки действия приглашений.
+
+Точечное приглашение действует INVITATION_EXPIRY_DAYS дней с момента
+создания (0 - бессрочно), массовое - до mass_invitation_expires_at.
+Просроченные строки отсекаются в SQL при поиске по токену, поэтому
+приглашение перестает работать сразу, даже если manage.py
+expire_invitations еще не пометил его. Команда пачками переводит
+просроченные точечные приглашения в статус expired (индекс
+invitation_status_created_idx) и выключает просроченные массовые.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import IndividualInvitation, Workspace
+
+EXPIRY_DAYS = getattr(settings, 'INVITATION_EXPIRY_DAYS', 0)
+
+
+def individual_expiry_cutoff(now=None):
+    """Приглашения, созданные раньше этого момента, просрочены (None - бессрочно)"""
+    if not EXPIRY_DAYS:
+        return None
+    return (now or timezone.now()) - timedelta(days=EXPIRY_DAYS)
+
+
+def pending_individual_invitations(now=None):
+    """Ожидающие и не просроченные точечные приглашения"""
+    queryset = IndividualInvitation.objects.filter(status='pending')
+    cutoff = individual_expiry_cutoff(now)
+    if cutoff is not None:
+        queryset = queryset.filter(created_at__gte=cutoff)
+    return queryset
+
+
+def usable_mass_invitations(now=None):
+    """Рабочие области с активным, не просроченным и не исчерпанным массовым приглашением"""
+    return Workspace.objects.filter(
+        Q(mass_invitation_expires_at__isnull=True) | Q(mass_invitation_expires_at__gt=now or timezone.now()),
+        Q(mass_invitation_max_uses__isnull=True)
+        | Q(mass_invitation_max_uses=0)
+        | Q(mass_invitation_current_uses__lt=F('mass_invitation_max_uses')),
+        mass_invitation_is_active=True,
+    )
+
+
+def expired_individual_invitations(now=None):
+    """Ожидающие точечные приглашения старше срока действия"""
+    cutoff = individual_expiry_cutoff(now)
+    if cutoff is None:
+        return IndividualInvitation.objects.none()
+    return IndividualInvitation.objects.filter(status='pending', created_at__lt=cutoff).order_by()
+
+
+def expired_mass_invitations(now=None):
+    """Включенные массовые приглашения, срок которых истек"""
+    return Workspace.objects.filter(
+        mass_invitation_is_active=True,
+        mass_invitation_expires_at__lte=now or timezone.now(),
+    ).order_by()
+
+
+def fill_mass_invitation_expiry(using='default'):
+    """
+    Заполняет mass_invitation_expires_at у строк, созданных до появления поля.
+    Один UPDATE на каждое значение срока из DURATION_CHOICES.
+    """
+    filled = 0
+    for seconds, _ in Workspace.DURATION_CHOICES:
+        if seconds:
+            filled += Workspace.objects.using(using).filter(
+                mass_invitation_expiration=seconds,
+                mass_invitation_expires_at__isnull=True,
+            ).update(mass_invitation_expires_at=F('mass_invitation_created_at') + timedelta(seconds=seconds))
+    return filled
+
+
+def expire_chunk(queryset, chunk_size, **values):
+    """Обновляет values у одной пачки строк queryset и возвращает число обновленных"""
+    with transaction.atomic():
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return 0
+        # Условие queryset повторяется: строку могли принять, пока выбиралась пачка
+        return queryset.filter(pk__in=ids).update(**values)
@@ -0,0 +1,140 @@
+import random
+import re
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from workspace.filters import deadline_q
+from workspace.models import Workspace, WorkspaceMembership, Team, Task, OPEN_STATUSES
+from workspace.pagination import SORT_FIELDS, ordering_for
+from workspace.visibility import filter_visible_tasks
+
+User = get_user_model()
+
+# Признаки полного просмотра таблицы задач в выводе EXPLAIN
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on "?workspace_task"?'),
+    'sqlite': re.compile(r'\bSCAN (TABLE )?workspace_task\b(?! USING (COVERING )?INDEX)'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для основных запросов списка задач и завершается с ошибкой, '
+        'если какой-либо из них читает таблицу задач последовательно'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workspace',
+            help='url_hash рабочей области, на которой проверяются запросы'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Создать временную рабочую область с указанным числом задач (изменения откатываются)'
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Выводить планы всех запросов'
+        )
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'Проверка планов не поддерживается для {connection.vendor}')
+
+        if options['seed']:
+            with transaction.atomic():
+                workspace, user = self.seed(options['seed'])
+                failures = self.check_plans(workspace, user, pattern, options['verbose_plans'])
+                transaction.set_rollback(True)
+        else:
+            if not options['workspace']:
+                raise CommandError('Укажите --workspace или --seed')
+            try:
+                workspace = Workspace.objects.get(url_hash=options['workspace'])
+            except Workspace.DoesNotExist:
+                raise CommandError('Рабочая область не найдена')
+            # Видимость проверяется для обычного участника, если он есть
+            membership = WorkspaceMembership.objects.filter(workspace=workspace).exclude(role='owner').first()
+            user = membership.user if membership else workspace.user
+            failures = self.check_plans(workspace, user, pattern, options['verbose_plans'])
+
+        if failures:
+            raise CommandError(
+                'Последовательное чтение таблицы задач в запросах: ' + ', '.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Все запросы списка задач используют индексы'))
+
+    def seed(self, count):
+        """Создает рабочие области с задачами, чтобы планировщик выбирал индексы"""
+        owner = User.objects.create_user(username=f'explain_{uuid.uuid4().hex[:12]}')
+        user = User.objects.create_user(username=f'explain_{uuid.uuid4().hex[:12]}')
+        workspaces = [
+            Workspace.objects.create(name=f'explain-{index}', user=owner)
+            for index in range(10)
+        ]
+        WorkspaceMembership.objects.create(workspace=workspaces[0], user=user, role='member')
+        teams = [Team.objects.create(name='explain', workspace=workspace) for workspace in workspaces]
+
+        now = timezone.now()
+        statuses = [value for value, _ in Task.STATUS_CHOICES]
+        priorities = [value for value, _ in Task.PRIORITY_CHOICES]
+        tasks = []
+        for index in range(count):
+            workspace_index = index % len(workspaces)
+            tasks.append(Task(
+                workspace=workspaces[workspace_index],
+                team=teams[workspace_index] if index % 3 else None,
+                title=f'Задача {index}',
+                status=random.choice(statuses),
+                priority=random.choice(priorities),
+                reporter=user if index % 5 == 0 else owner,
+                assignee=user if index % 7 == 0 else None,
+                deadline=now + timezone.timedelta(hours=random.randint(-2000, 2000)) if index % 4 else None,
+                url_hash=uuid.uuid4().hex + uuid.uuid4().hex,
+            ))
+        Task.objects.bulk_create(tasks, batch_size=1000)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return workspaces[0], user
+
+    def get_queries(self, workspace, user):
+        """Запросы, которые выполняет TaskListView"""
+        now = timezone.now()
+        tasks = Task.objects.filter(workspace=workspace)
+        queries = {
+            f'sort {sort}': tasks.order_by(*ordering_for(sort))[:21]
+            for sort in SORT_FIELDS + tuple(f'-{field}' for field in SORT_FIELDS)
+        }
+        queries.update({
+            'status': tasks.filter(status='todo').order_by(*ordering_for('-created_at'))[:21],
+            'priority': tasks.filter(priority='high').order_by(*ordering_for('priority'))[:21],
+            'assignee': tasks.filter(assignee=user).order_by(*ordering_for('-created_at'))[:21],
+            'reporter': tasks.filter(reporter=user).order_by(*ordering_for('-created_at'))[:21],
+            'team': tasks.filter(team__in=Team.objects.filter(workspace=workspace)[:1])[:21],
+            'deadline today': tasks.filter(deadline_q('today', now)),
+            'expired counter': tasks.filter(deadline__lt=now, status__in=OPEN_STATUSES),
+            'visible to user': filter_visible_tasks(tasks, user, workspace).order_by(
+                *ordering_for('-created_at')
+            )[:21],
+        })
+        return queries
+
+    def check_plans(self, workspace, user, pattern, verbose):
+        failures = []
+        for name, queryset in self.get_queries(workspace, user).items():
+            plan = queryset.explain()
+            if verbose:
+                self.stdout.write(f'--- {name}\n{plan}')
+            if pattern.search(plan):
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: последовательное чтение\n{plan}'))
+        return failures
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from workspace.invitations import (
+    EXPIRY_DAYS, expire_chunk, expired_individual_invitations, expired_mass_invitations, fill_mass_invitation_expiry,
+)
+
+
+class Command(BaseCommand):
+    help = 'Помечает просроченные точечные приглашения и выключает просроченные массовые (запускать периодически)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Строк в одном UPDATE')
+        parser.add_argument('--sleep', type=float, default=0, help='Пауза между пачками в секундах')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать просроченные приглашения')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным')
+
+        now = timezone.now()
+        jobs = [
+            ('Точечные приглашения', expired_individual_invitations(now), {'status': 'expired'}),
+            ('Массовые приглашения', expired_mass_invitations(now), {'mass_invitation_is_active': False}),
+        ]
+
+        if options['dry_run']:
+            for title, queryset, _ in jobs:
+                self.stdout.write(f'{title}: просрочено {queryset.count()}')
+            return
+
+        filled = fill_mass_invitation_expiry()
+        if filled:
+            self.stdout.write(f'Заполнен срок массовых приглашений: {filled}')
+        if not EXPIRY_DAYS:
+            self.stdout.write('Точечные приглашения бессрочны (INVITATION_EXPIRY_DAYS = 0)')
+
+        started = time.monotonic()
+        for title, queryset, values in jobs:
+            expired = 0
+            while True:
+                count = expire_chunk(queryset, options['chunk_size'], **values)
+                if not count:
+                    break
+                expired += count
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+            self.stdout.write(f'{title}: истекло {expired}')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово за {time.monotonic() - started:.1f} с'))
@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from workspace.importer import TaskImporter, parse_rows
+from workspace.models import Workspace
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Импортирует задачи в рабочую область из CSV или JSON файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу .csv или .json')
+        parser.add_argument('--workspace', required=True, help='url_hash рабочей области')
+        parser.add_argument('--user', required=True, help='username автора задач')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Формат файла (по умолчанию - по расширению)')
+        parser.add_argument('--skip-invalid', action='store_true', help='Создать корректные строки, пропустив ошибочные')
+        parser.add_argument('--dry-run', action='store_true', help='Только проверить файл')
+
+    def handle(self, *args, **options):
+        try:
+            workspace = Workspace.objects.get(url_hash=options['workspace'])
+        except Workspace.DoesNotExist:
+            raise CommandError('Рабочая область не найдена')
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден')
+
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        try:
+            rows = parse_rows(path.read_bytes(), file_format)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Не удалось прочитать файл: {e}')
+
+        importer = TaskImporter(workspace, user)
+        if not importer.access.is_member:
+            raise CommandError('Пользователь не является участником рабочей области')
+
+        result = importer.run(rows, skip_invalid=options['skip_invalid'], dry_run=options['dry_run'])
+
+        for error in result.errors:
+            self.stderr.write(f"Строка {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        if result.errors and not options['skip_invalid']:
+            raise CommandError(f'Найдено ошибок: {len(result.errors)}, задачи не созданы')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено строк: {len(rows)}, создано задач: {result.created}, ошибок: {len(result.errors)}'
+        ))
@@ -0,0 +1,115 @@
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from workspace.models import Workspace, WorkspaceMembership
+
+User = get_user_model()
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Ответ 302 после вступления считается результатом, по редиректу не переходим"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест массового приглашения: создает временных пользователей и '
+        'одновременно открывает ссылку приглашения на запущенном сервере'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workspace', required=True, help='url_hash рабочей области')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Адрес запущенного сервера')
+        parser.add_argument('--users', type=int, default=1000, help='Число вступающих пользователей')
+        parser.add_argument('--concurrency', type=int, default=100, help='Одновременных запросов')
+        parser.add_argument('--keep', action='store_true', help='Не удалять временных пользователей')
+
+    def handle(self, *args, **options):
+        try:
+            workspace = Workspace.objects.get(url_hash=options['workspace'])
+        except Workspace.DoesNotExist:
+            raise CommandError('Рабочая область не найдена')
+        if not workspace.mass_invitation_token:
+            raise CommandError('У рабочей области нет массового приглашения')
+
+        prefix = f'loadtest_{int(time.time())}_'
+        User.objects.bulk_create([
+            User(username=f'{prefix}{number}', email=f'{prefix}{number}@example.com', password=make_password(None))
+            for number in range(options['users'])
+        ])
+        users = list(User.objects.filter(username__startswith=prefix))
+        self.stdout.write(f'Создано пользователей: {len(users)}')
+
+        session_keys = [self.create_session(user) for user in users]
+        uses_before = workspace.mass_invitation_current_uses
+        members_before = WorkspaceMembership.objects.filter(workspace=workspace).count()
+        url = options['base_url'].rstrip('/') + reverse(
+            'workspace:accept_invitation', kwargs={'token': workspace.mass_invitation_token}
+        )
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            statuses = list(executor.map(lambda session_key: self.join(url, session_key), session_keys))
+        elapsed = time.monotonic() - started
+
+        workspace.refresh_from_db()
+        joined = WorkspaceMembership.objects.filter(workspace=workspace, user__username__startswith=prefix).count()
+        uses = workspace.mass_invitation_current_uses - uses_before
+        members_added = WorkspaceMembership.objects.filter(workspace=workspace).count() - members_before
+
+        errors = len([status for status in statuses if status not in (200, 302)])
+        self.stdout.write(
+            f'Запросов: {len(statuses)} за {elapsed:.1f} с ({len(statuses) / elapsed:.0f} запросов/с), ошибок: {errors}'
+        )
+        self.stdout.write(
+            f'Вступили: {joined}, прирост счетчика: {uses}, '
+            f'лимит: {workspace.mass_invitation_max_uses or "нет"}, '
+            f'использовано: {workspace.mass_invitation_current_uses}'
+        )
+
+        problems = []
+        if uses != joined or members_added != joined:
+            problems.append('счетчик использований не совпадает с числом вступивших')
+        max_uses = workspace.mass_invitation_max_uses
+        if max_uses and workspace.mass_invitation_current_uses > max_uses:
+            problems.append('превышен лимит использований')
+
+        if not options['keep']:
+            Session.objects.filter(session_key__in=session_keys).delete()
+            User.objects.filter(username__startswith=prefix).delete()
+
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('Счетчик использований согласован'))
+
+    def create_session(self, user):
+        """Создает сессию входа пользователя и возвращает ее ключ"""
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session.session_key
+
+    def join(self, url, session_key):
+        opener = urllib.request.build_opener(NoRedirect)
+        request = urllib.request.Request(url, headers={'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}'})
+        try:
+            with opener.open(request, timeout=60) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return None
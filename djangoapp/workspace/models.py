@@ -30,6 +30,13 @@ class Workspace(models.Model):
     mass_invitation_current_uses = models.IntegerField(default=0, verbose_name="Текущее количество использований")
     mass_invitation_is_active = models.BooleanField(default=True, verbose_name="Активно")
     mass_invitation_created_at = models.DateTimeField(auto_now_add=True)
+    # Момент истечения массового приглашения (хранится готовым, чтобы проверять срок в SQL)
+    mass_invitation_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['mass_invitation_is_active', 'mass_invitation_expires_at'], name='ws_mass_invite_expiry_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.url_hash:
@@ -41,6 +48,12 @@ class Workspace(models.Model):
         if not self.mass_invitation_token:
             self.mass_invitation_token = self.generate_mass_invitation_token()
         
+        if self.mass_invitation_expiration:
+            created_at = self.mass_invitation_created_at or timezone.now()
+            self.mass_invitation_expires_at = created_at + timezone.timedelta(seconds=int(self.mass_invitation_expiration))
+        else:
+            self.mass_invitation_expires_at = None
+        
         super().save(*args, **kwargs)
         
         # После создания workspace добавляем владельца как участника с ролью owner
@@ -91,12 +104,9 @@ class Workspace(models.Model):
     
     def is_mass_invitation_expired(self):
         """Проверяет, истекло ли время действия массового приглашения"""
-        if not self.mass_invitation_expiration:
+        if not self.mass_invitation_expires_at:
             return False
-        
-        from django.utils import timezone
-        expiration_date = self.mass_invitation_created_at + timezone.timedelta(seconds=self.mass_invitation_expiration)
-        return timezone.now() > expiration_date
+        return timezone.now() > self.mass_invitation_expires_at
     
     def can_mass_invitation_be_used(self):
         """Проверяет, можно ли использовать массовое приглашение"""
@@ -231,10 +241,16 @@ class WorkspaceRoleAccess(models.Model):
         self.can_delete_tasks = ['owner', 'admin', 'member']
         self.can_invite_users = ['owner', 'admin', 'member']
 
-    def has_permission(self, user, permission_type):
-        """Проверяет, имеет ли пользователь указанное право"""
+    def has_permission(self, user, permission_type, access=None):
+        """
+        Проверяет, имеет ли пользователь указанное право.
+        access - AccessContext пользователя, позволяет не обращаться к базе
+        """
         # Получаем роль пользователя в workspace
-        user_role = self.workspace.get_user_role(user)
+        if access is not None:
+            user_role = access.workspace_role
+        else:
+            user_role = self.workspace.get_user_role(user)
         if not user_role:
             return False
         
@@ -388,19 +404,29 @@ class TeamRoleAccess(models.Model):
         self.can_delete_tasks = ['leader', 'admin', 'member']
         self.visibility = 'private'
 
-    def has_permission(self, user, permission_type):
-        """Проверяет, имеет ли пользователь указанное право в команде"""
-        # Проверяем, является ли пользователь владельцем или администратором workspace
-        workspace_role = self.team.workspace.get_user_role(user)
-        if workspace_role == 'owner':
-            return True
-        
-        # Получаем роль пользователя в команде
-        try:
-            team_membership = TeamMembership.objects.get(team=self.team, user=user)
-            user_role = team_membership.role
-        except TeamMembership.DoesNotExist:
-            return False
+    def has_permission(self, user, permission_type, access=None):
+        """
+        Проверяет, имеет ли пользователь указанное право в команде.
+        access - AccessContext пользователя, позволяет не обращаться к базе
+        """
+        if access is not None:
+            if access.is_owner:
+                return True
+            user_role = access.team_role(self.team_id)
+            if user_role is None:
+                return False
+        else:
+            # Проверяем, является ли пользователь владельцем или администратором workspace
+            workspace_role = self.team.workspace.get_user_role(user)
+            if workspace_role == 'owner':
+                return True
+            
+            # Получаем роль пользователя в команде
+            try:
+                team_membership = TeamMembership.objects.get(team=self.team, user=user)
+                user_role = team_membership.role
+            except TeamMembership.DoesNotExist:
+                return False
         
         # Лидер команды имеет все права администратора
         if user_role == 'leader':
@@ -410,8 +436,13 @@ class TeamRoleAccess(models.Model):
         permission_field = getattr(self, permission_type, [])
         return user_role in permission_field
 
-    def is_team_visible_to_user(self, user):
+    def is_team_visible_to_user(self, user, access=None):
         """Проверяет, видна ли команда пользователю"""
+        if access is not None:
+            if access.is_owner or access.is_team_member(self.team_id):
+                return True
+            return self.visibility == 'workspace' and access.is_member
+        
         # Владельцы workspace всегда видят все команды
         workspace_role = self.team.workspace.get_user_role(user)
         if workspace_role == 'owner':
@@ -433,6 +464,10 @@ class TeamRoleAccess(models.Model):
         return f'Права доступа для команды {self.team.name}'
 
 
+# Статусы незавершенных задач
+OPEN_STATUSES = ['backlog', 'todo', 'in_progress', 'review']
+
+
 class Task(models.Model):
     STATUS_CHOICES = [
         ('backlog', 'Бэклог'),
@@ -569,8 +604,26 @@ class Task(models.Model):
         verbose_name = 'Задача'
         verbose_name_plural = 'Задачи'
         ordering = ['-created_at']
+        indexes = [
+            # Фильтры списка задач внутри workspace
+            models.Index(fields=['workspace', 'status'], name='task_ws_status_idx'),
+            models.Index(fields=['workspace', 'priority', 'id'], name='task_ws_priority_idx'),
+            models.Index(fields=['workspace', 'assignee'], name='task_ws_assignee_idx'),
+            models.Index(fields=['workspace', 'reporter'], name='task_ws_reporter_idx'),
+            models.Index(fields=['team', 'created_at'], name='task_team_created_idx'),
+            # Сортировки и курсорная пагинация (колонка + id)
+            models.Index(fields=['workspace', 'created_at', 'id'], name='task_ws_created_idx'),
+            models.Index(fields=['workspace', 'deadline', 'id'], name='task_ws_deadline_idx'),
+            models.Index(fields=['workspace', 'title', 'id'], name='task_ws_title_idx'),
+            # Незавершенные задачи с дедлайном (просроченные, на сегодня, на неделю)
+            models.Index(
+                fields=['workspace', 'deadline'],
+                condition=models.Q(deadline__isnull=False, status__in=OPEN_STATUSES),
+                name='task_open_deadline_idx'
+            ),
+        ]
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, validate=True, **kwargs):
         # Генерируем URL hash если его нет
         if not self.url_hash:
             server_time = str(time.time())
@@ -578,39 +631,23 @@ class Task(models.Model):
             self.url_hash = hashlib.sha256(hash_input.encode('utf-8')).hexdigest()
         
         # Если это создание новой задачи, устанавливаем updated_by
-        if not self.pk and self.reporter:
-            self.updated_by = self.reporter
+        if not self.pk and self.reporter_id:
+            self.updated_by_id = self.reporter_id
         
-        # Выполняем валидацию
-        self.clean()
+        # Выполняем валидацию (validate=False, если задача уже проверена через full_clean)
+        if validate:
+            self.clean()
         super().save(*args, **kwargs)
 
-    def clean(self):
-        """Валидация данных задачи"""
-        errors = {}
-
-        # Проверяем, что автор состоит в workspace
-        if self.workspace and self.reporter:
-            if not self.workspace.has_access(self.reporter):
-                errors['reporter'] = 'Автор задачи должен быть участником рабочей области'
-
-        # Проверяем, что команда принадлежит workspace
-        if self.team and self.workspace:
-            if self.team.workspace != self.workspace:
-                errors['team'] = 'Команда должна принадлежать той же рабочей области'
-
-        # Проверяем, что исполнитель состоит в команде (если команда указана)
-        if self.assignee and self.team:
-            if not self.team.members.filter(id=self.assignee.id).exists():
-                errors['assignee'] = f'Исполнитель не состоит в команде {self.team.name}'
-
-        # Проверяем, что исполнитель состоит в workspace (если команда не указана)
-        if self.assignee and not self.team and self.workspace:
-            if not self.workspace.has_access(self.assignee):
-                errors['assignee'] = 'Исполнитель должен быть участником рабочей области'
-
-        if errors:
-            raise ValidationError(errors)
+    def clean(self, validator=None):
+        """
+        Валидация данных задачи.
+        validator - TaskValidator с предзагруженными участниками для массовых операций
+        """
+        from .validators import TaskValidator
+        if validator is None:
+            validator = TaskValidator.for_task(self)
+        validator.validate(self)
 
     def get_available_assignees(self):
         """Возвращает доступных исполнителей для задачи"""
@@ -640,7 +677,7 @@ class Task(models.Model):
         workspace_owner = WorkspaceMembership.objects.filter(
             workspace=self.workspace,
             role='owner'
-        ).first()
+        ).select_related('user').first()
         if workspace_owner:
             editors.add(workspace_owner.user)
         
@@ -649,7 +686,7 @@ class Task(models.Model):
             team_leader = TeamMembership.objects.filter(
                 team=self.team,
                 role='leader'
-            ).first()
+            ).select_related('user').first()
             if team_leader:
                 editors.add(team_leader.user)
         
@@ -658,24 +695,27 @@ class Task(models.Model):
             editors.add(self.assignee)
         
         # 5. Пользователи с правом редактирования задач в workspace/team
+        # Роли участников загружаются одним запросом, права проверяются в памяти
+        owner_id = workspace_owner.user_id if workspace_owner else None
         if self.team:
             # Для задач в команде - проверяем права в команде
             team_access, _ = TeamRoleAccess.objects.get_or_create(team=self.team)
-            team_members = TeamMembership.objects.filter(team=self.team)
+            team_members = TeamMembership.objects.filter(team=self.team).select_related('user')
             for member in team_members:
-                if team_access.has_permission(member.user, 'can_edit_tasks'):
+                if (member.user_id == owner_id or member.role == 'leader'
+                        or member.role in team_access.can_edit_tasks):
                     editors.add(member.user)
         else:
             # Для задач без команды - проверяем права в workspace
             workspace_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
-            workspace_members = WorkspaceMembership.objects.filter(workspace=self.workspace)
+            workspace_members = WorkspaceMembership.objects.filter(workspace=self.workspace).select_related('user')
             for member in workspace_members:
-                if workspace_access.has_permission(member.user, 'can_edit_tasks'):
+                if member.role == 'owner' or member.role in workspace_access.can_edit_tasks:
                     editors.add(member.user)
         
         return list(editors)
 
-    def is_special_editor(self, user):
+    def is_special_editor(self, user, access=None):
         """
         Проверяет, является ли пользователь особым редактором:
         - Создатель
@@ -683,6 +723,13 @@ class Task(models.Model):
         - Лидер команды (если задача в команде)
         Эти пользователи имеют ВСЕ права ВСЕГДА
         """
+        if access is not None:
+            return (
+                self.reporter_id == user.pk
+                or access.is_owner
+                or (self.team_id is not None and access.is_team_leader(self.team_id))
+            )
+        
         # 1. Создатель задачи (ВСЕГДА)
         if user == self.reporter:
             return True
@@ -708,12 +755,19 @@ class Task(models.Model):
         
         return False
 
-    def can_user_edit(self, user):
+    def can_user_edit(self, user, access=None):
         """Проверяет, может ли пользователь редактировать эту задачу"""
         # Специальные редакторы могут редактировать всегда
-        if self.is_special_editor(user):
+        if self.is_special_editor(user, access=access):
             return True
         
+        if access is not None:
+            if self.assignee_id is not None and self.assignee_id == user.pk:
+                return True
+            if self.team_id is not None:
+                return access.is_team_member(self.team_id) and access.has_team_permission(self.team_id, 'can_edit_tasks')
+            return access.is_member and access.has_workspace_permission('can_edit_tasks')
+        
         # Исполнитель задачи может редактировать
         if self.assignee and user == self.assignee:
             return True
@@ -736,55 +790,55 @@ class Task(models.Model):
             except WorkspaceMembership.DoesNotExist:
                 return False
 
-    def can_user_edit_content(self, user):
+    def can_user_edit_content(self, user, access=None):
         """Проверяет, может ли пользователь редактировать содержание задачи"""
-        if not self.can_user_edit(user):
+        if not self.can_user_edit(user, access=access):
             return False
         
         # Специальные редакторы могут редактировать всегда
-        if self.is_special_editor(user):
+        if self.is_special_editor(user, access=access):
             return True
         
         # Для обычных редакторов - проверяем настройки задачи
         return self.can_edit_content
 
-    def can_user_edit_team(self, user):
+    def can_user_edit_team(self, user, access=None):
         """Проверяет, может ли пользователь изменять команду задачи"""
-        if not self.can_user_edit(user):
+        if not self.can_user_edit(user, access=access):
             return False
         
         # Специальные редакторы могут редактировать всегда
-        if self.is_special_editor(user):
+        if self.is_special_editor(user, access=access):
             return True
         
         # Для обычных редакторов - проверяем настройки задачи
         return self.can_edit_team
 
-    def can_user_edit_assignee(self, user):
+    def can_user_edit_assignee(self, user, access=None):
         """Проверяет, может ли пользователь изменять исполнителя задачи"""
-        if not self.can_user_edit(user):
+        if not self.can_user_edit(user, access=access):
             return False
         
         # Специальные редакторы могут редактировать всегда
-        if self.is_special_editor(user):
+        if self.is_special_editor(user, access=access):
             return True
         
         # Для обычных редакторов - проверяем настройки задачи
         return self.can_edit_assignee
 
-    def can_user_edit_visibility(self, user):
+    def can_user_edit_visibility(self, user, access=None):
         """Проверяет, может ли пользователь изменять видимость задачи"""
-        if not self.can_user_edit(user):
+        if not self.can_user_edit(user, access=access):
             return False
         
         # Специальные редакторы могут редактировать всегда
-        if self.is_special_editor(user):
+        if self.is_special_editor(user, access=access):
             return True
         
         # Для обычных редакторов - проверяем настройки задачи
         return self.can_edit_visibility
 
-    def is_visible_to_user(self, user):
+    def is_visible_to_user(self, user, access=None):
         """
         Проверяет, видна ли задача пользователю
         Согласно правилам:
@@ -795,6 +849,10 @@ class Task(models.Model):
         5. Владелец workspace видит все задачи
         6. Для остальных: зависит от настройки visible
         """
+        if access is not None:
+            # Создатель, исполнитель, лидер команды и владелец workspace входят в число редакторов
+            return self.visible or self.can_user_edit(user, access=access)
+        
         # 1. Создатель всегда видит
         if user == self.reporter:
             return True
@@ -828,12 +886,12 @@ class Task(models.Model):
         # 6. Для остальных - зависит от настройки visible
         return self.visible
 
-    def can_user_change_permissions(self, user):
+    def can_user_change_permissions(self, user, access=None):
         """
         Проверяет, может ли пользователь изменять права доступа к задаче
         Только: создатель, владелец workspace, лидер команды (если есть)
         """
-        return self.is_special_editor(user)
+        return self.is_special_editor(user, access=access)
 
     def __str__(self):
         return f'{self.title} (Workspace: {self.workspace.name})'
@@ -869,6 +927,10 @@ class IndividualInvitation(models.Model):
     accepted_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
+        indexes = [
+            # Поиск просроченных ожидающих приглашений (manage.py expire_invitations)
+            models.Index(fields=['status', 'created_at'], name='invitation_status_created_idx'),
+        ]
         # Уникальное ограничение, чтобы нельзя было пригласить одного пользователя дважды
         constraints = [
             models.UniqueConstraint(
@@ -880,10 +942,14 @@ class IndividualInvitation(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.invitation_token:
-            self.invitation_token = hashlib.sha256(
-                f"{self.workspace.name}{time.time()}{uuid.uuid4()}".encode('utf-8')
-            ).hexdigest()
+            self.invitation_token = self.generate_token()
         super().save(*args, **kwargs)
     
+    def generate_token(self):
+        """Токен приглашения (bulk_create не вызывает save, поэтому вызывается и напрямую)"""
+        return hashlib.sha256(
+            f"{self.workspace.name}{time.time()}{uuid.uuid4()}".encode('utf-8')
+        ).hexdigest()
+    
     def __str__(self):
         return f"Приглашение для {self.invited_user.email} в {self.workspace.name}"
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Курсорная (keyset) пагинация списков задач.
+
+Страница выбирается условием по значению колонки сортировки и id последней
+(или первой) строки предыдущей страницы, а не через OFFSET. Поэтому
+дальние страницы стоят столько же, сколько первая, а новые задачи не
+сдвигают строки между страницами.
+
+Курсор подписан (django.core.signing) и содержит состояние фильтров, так что
+ссылка на следующую страницу не зависит от параметров в адресе.
+"""
+from django.core import signing
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SALT = 'workspace.pagination.cursor'
+
+# Поля, по которым возможна сортировка, и поля, допускающие NULL
+SORT_FIELDS = ('created_at', 'deadline', 'title', 'priority')
+DATETIME_SORT_FIELDS = ('created_at', 'deadline')
+NULLABLE_SORT_FIELDS = ('deadline',)
+
+
+class CursorPage:
+    """Страница курсорной пагинации (аналог django.core.paginator.Page)"""
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(state, key, direction):
+    """Упаковывает состояние фильтров и ключ строки в непрозрачную строку"""
+    return signing.dumps({'s': state, 'k': key, 'd': direction}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    """Возвращает (state, key, direction) или None для поврежденного курсора"""
+    if not cursor:
+        return None
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        value, pk = data['k']
+        if data['d'] not in ('next', 'prev'):
+            return None
+        return data['s'], [value, int(pk)], data['d']
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def ordering_for(sort, backwards=False):
+    """
+    Порядок сортировки: колонка + id в том же направлении.
+    NULL всегда в конце списка (при обратном проходе - в начале).
+    """
+    field = sort.lstrip('-')
+    descending = sort.startswith('-') != backwards
+    if field in NULLABLE_SORT_FIELDS:
+        expression = F(field).desc if descending else F(field).asc
+        field_order = expression(nulls_first=True) if backwards else expression(nulls_last=True)
+    else:
+        field_order = f'-{field}' if descending else field
+    return [field_order, '-id' if descending else 'id']
+
+
+def keyset_q(sort, value, pk, backwards=False):
+    """Q-выражение для строк, идущих после ключа (value, pk) в порядке сортировки"""
+    field = sort.lstrip('-')
+    op = 'lt' if sort.startswith('-') != backwards else 'gt'
+
+    if value is None:
+        q = Q(**{f'{field}__isnull': True, f'id__{op}': pk})
+        if backwards:
+            q |= Q(**{f'{field}__isnull': False})
+        return q
+
+    q = Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+    if field in NULLABLE_SORT_FIELDS and not backwards:
+        q |= Q(**{f'{field}__isnull': True})
+    return q
+
+
+def _dump_value(field, value):
+    if value is not None and field in DATETIME_SORT_FIELDS:
+        return value.isoformat()
+    return value
+
+
+def _load_value(field, value):
+    if value is not None and field in DATETIME_SORT_FIELDS:
+        return parse_datetime(value)
+    return value
+
+
+def paginate_by_cursor(queryset, sort, per_page, state, cursor=None):
+    """
+    Возвращает CursorPage для queryset.
+
+    sort - одно из SORT_FIELDS с необязательным '-', state - состояние
+    фильтров, которое сохраняется в курсорах, cursor - результат decode_cursor.
+    """
+    field = sort.lstrip('-')
+    backwards = False
+
+    if cursor is not None:
+        _, (value, pk), direction = cursor
+        backwards = direction == 'prev'
+        queryset = queryset.filter(keyset_q(sort, _load_value(field, value), pk, backwards=backwards))
+
+    rows = list(queryset.order_by(*ordering_for(sort, backwards=backwards))[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key(row):
+        return [_dump_value(field, getattr(row, field)), row.pk]
+
+    has_next = has_more if not backwards else True
+    has_previous = has_more if backwards else cursor is not None
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(state, key(rows[-1]), 'next') if rows and has_next else None,
+        previous_cursor=encode_cursor(state, key(rows[0]), 'prev') if rows and has_previous else None,
+    )
@@ -0,0 +1,98 @@
+"""
+Межзапросный кеш прав доступа.
+
+Данные хранятся в кеше Django (settings.PERMISSION_CACHE_ALIAS) под ключами,
+содержащими версию рабочей области. Любое изменение участников или настроек
+прав (см. workspace/signals.py) меняет версию, и старые записи перестают
+читаться - устаревший ответ из кеша получить нельзя.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+CACHE_ALIAS = getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300)
+
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _version_key(workspace_id):
+    return f'perm:ws:{workspace_id}:version'
+
+
+def get_version(workspace_id):
+    """
+    Возвращает текущую версию прав рабочей области.
+    Версия - случайный токен, поэтому вытеснение ключа из кеша
+    не может вернуть к жизни старые записи.
+    """
+    cache = _cache()
+    key = _version_key(workspace_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _set_new_version(workspace_id):
+    _cache().set(_version_key(workspace_id), uuid.uuid4().hex, timeout=None)
+
+
+def bump_version(workspace_id):
+    """
+    Инвалидирует все закешированные права рабочей области.
+    Внутри транзакции версия меняется повторно после коммита, чтобы
+    отбросить записи, прочитанные другими запросами до коммита.
+    """
+    if workspace_id is None:
+        return
+    _set_new_version(workspace_id)
+    _count('invalidations')
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _set_new_version(workspace_id))
+
+
+def get_or_load(workspace_id, name, loader):
+    """Возвращает значение из кеша или загружает его через loader()"""
+    cache = _cache()
+    key = f'perm:ws:{workspace_id}:{get_version(workspace_id)}:{name}'
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value
+
+    _count('misses')
+    value = loader()
+    # Незакоммиченные данные в кеш не попадают
+    if not connection.in_atomic_block:
+        cache.set(key, value, CACHE_TIMEOUT)
+    return value
+
+
+def stats():
+    """Счетчики попаданий и промахов кеша в текущем процессе"""
+    with _stats_lock:
+        result = dict(_stats)
+    total = result['hits'] + result['misses']
+    result['hit_rate'] = result['hits'] / total if total else 0.0
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,129 @@
+"""
+Полнотекстовый поиск задач по title и description.
+
+PostgreSQL: хранимая генерируемая колонка workspace_task.search_vector
+(tsvector) с GIN-индексом. SQLite: внешняя FTS5-таблица workspace_task_fts,
+которую поддерживают триггеры. Объекты создаются функцией install_task_search
+после migrate (см. workspace/signals.py), поэтому индекс обновляется
+при любых изменениях задач, включая queryset.update() и bulk_create.
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+TASK_TABLE = 'workspace_task'
+FTS_TABLE = 'workspace_task_fts'
+
+# Словарь PostgreSQL для разбора текста задач
+SEARCH_CONFIG = getattr(settings, 'TASK_SEARCH_CONFIG', 'russian')
+
+POSTGRESQL_SQL = [
+    f"""
+    ALTER TABLE {TASK_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS task_search_vector_idx ON {TASK_TABLE} USING GIN (search_vector)",
+]
+
+SQLITE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, content='{TASK_TABLE}', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TASK_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TASK_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON {TASK_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# Таблица FTS5 и ее триггеры: если чего-то из них нет, индекс перестраивается
+SQLITE_OBJECTS = (FTS_TABLE, f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au')
+SQLITE_REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def install_task_search(connection):
+    """
+    Создает колонку/таблицу поиска, индекс и триггеры (повторный вызов безопасен).
+    Индекс FTS5 заполняется заново, только если таблица или триггеры были созданы сейчас:
+    пока триггеры на месте, он уже совпадает с workspace_task.
+    Возвращает True, если индекс FTS5 был перестроен.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRESQL_SQL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                'SELECT count(*) FROM sqlite_master WHERE name IN ({})'.format(', '.join(['%s'] * len(SQLITE_OBJECTS))),
+                SQLITE_OBJECTS
+            )
+            if cursor.fetchone()[0] == len(SQLITE_OBJECTS):
+                return False
+            for sql in SQLITE_SQL:
+                cursor.execute(sql)
+            cursor.execute(SQLITE_REBUILD_SQL)
+            return True
+    return False
+
+
+def _fts_query(text):
+    """Экранирует ввод пользователя для FTS5: каждое слово - префиксная фраза"""
+    words = text.split()
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def search_tasks(queryset, text):
+    """
+    Оставляет в queryset задачи, подходящие под поисковый запрос,
+    и добавляет аннотацию search_rank (больше - релевантнее).
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}'::regconfig, %s)"
+        return queryset.filter(
+            RawSQL(f'{TASK_TABLE}.search_vector @@ {tsquery}', (text,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank({TASK_TABLE}.search_vector, {tsquery})', (text,), output_field=FloatField())
+        )
+
+    if vendor == 'sqlite':
+        match = _fts_query(text)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(
+            # bm25 тем меньше, чем релевантнее строка; совпадения в названии весят больше
+            search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TASK_TABLE}.id',
+                (match,),
+                output_field=FloatField()
+            )
+        )
+
+    # Остальные СУБД: поиск по подстроке без ранжирования
+    return queryset.filter(
+        Q(title__icontains=text) | Q(description__icontains=text)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
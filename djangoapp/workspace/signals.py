@@ -0,0 +1,48 @@
+from django.db import connections
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from .models import Team, WorkspaceMembership, TeamMembership, WorkspaceRoleAccess, TeamRoleAccess
+from .search import install_task_search
+from .invitations import fill_mass_invitation_expiry
+from . import permission_cache
+
+
+def get_team_workspace_id(instance):
+    """Возвращает id workspace команды, к которой относится объект"""
+    if 'team' in instance._state.fields_cache:
+        return instance.team.workspace_id
+    return Team.objects.filter(pk=instance.team_id).values_list('workspace_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=WorkspaceMembership)
+@receiver([post_save, post_delete], sender=WorkspaceRoleAccess)
+def invalidate_workspace_permissions(sender, instance, **kwargs):
+    permission_cache.bump_version(instance.workspace_id)
+
+
+@receiver([post_save, post_delete], sender=TeamMembership)
+@receiver([post_save, post_delete], sender=TeamRoleAccess)
+def invalidate_team_permissions(sender, instance, **kwargs):
+    permission_cache.bump_version(get_team_workspace_id(instance))
+
+
+@receiver(post_delete, sender=Team)
+def invalidate_deleted_team_permissions(sender, instance, **kwargs):
+    permission_cache.bump_version(instance.workspace_id)
+
+
+@receiver(post_migrate)
+def create_task_search_index(sender, using, **kwargs):
+    """Создает объекты полнотекстового поиска задач после migrate"""
+    if sender.name == 'workspace':
+        install_task_search(connections[using])
+
+
+@receiver(post_migrate)
+def fill_mass_invitation_deadlines(sender, using, **kwargs):
+    """
+    Заполняет mass_invitation_expires_at у приглашений, созданных до появления
+    поля, чтобы их срок соблюдался сразу, а не после expire_invitations
+    """
+    if sender.name == 'workspace':
+        fill_mass_invitation_expiry(using)
@@ -0,0 +1,24 @@
+from django import template
+from ..access import AccessContext, task_permission_matrix
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def task_permissions(context, tasks, workspace=None):
+    """
+    Матрица прав текущего пользователя на задачи:
+    {% task_permissions tasks workspace as permissions %}
+    """
+    request = context['request']
+    access = AccessContext.for_request(request, workspace) if workspace is not None else None
+    return task_permission_matrix(tasks, request.user, access=access)
+
+
+@register.filter
+def permissions_for(permissions, task):
+    """
+    Флаги прав для одной задачи из матрицы:
+    {% with task_perms=permissions|permissions_for:task %}
+    """
+    return permissions.get(task.pk, {})
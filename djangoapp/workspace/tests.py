@@ -1,3 +1,772 @@
+import csv
+import io
+import json
+import random
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.shortcuts import get_object_or_404
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .access import task_permission_matrix
+from .importer import TaskImporter, parse_rows
+from .invitations import (
+    expired_individual_invitations, fill_mass_invitation_expiry, pending_individual_invitations, usable_mass_invitations,
+)
+from .models import (
+    OPEN_STATUSES, IndividualInvitation, Task, Team, TeamMembership, TeamRoleAccess, Workspace, WorkspaceMembership,
+    WorkspaceRoleAccess,
+)
+from .pagination import CURSOR_SALT, SORT_FIELDS, decode_cursor, ordering_for, paginate_by_cursor
+from .search import install_task_search
+from .signals import fill_mass_invitation_deadlines
+from .validators import TaskValidator
+from .views import AcceptInvitationView
+from .visibility import filter_visible_tasks
+from user_profile.models import EmailOutbox, Notification
+
+User = get_user_model()
+
+WORKSPACE_ROLES = ['admin', 'member']
+TEAM_ROLES = ['leader', 'admin', 'member']
+
+
+class RandomWorkspaceMixin:
+    """Случайная рабочая область с командами, ролями, настройками прав и задачами"""
+
+    def build_workspace(self, rng, number):
+        users = [User.objects.create_user(f'user{number}_{i}', f'user{number}_{i}@example.com') for i in range(8)]
+        workspace = Workspace.objects.create(user=users[0], name=f'Workspace {number}')
+        # Последний пользователь не состоит в workspace
+        for user in users[1:-1]:
+            WorkspaceMembership.objects.create(workspace=workspace, user=user, role=rng.choice(WORKSPACE_ROLES))
+
+        role_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=workspace)
+        role_access.can_edit_tasks = rng.sample(WORKSPACE_ROLES, rng.randint(0, len(WORKSPACE_ROLES)))
+        role_access.save()
+
+        members = users[:-1]
+        teams = []
+        for team_number in range(3):
+            team = Team.objects.create(workspace=workspace, name=f'Team {team_number}')
+            for user in rng.sample(members, rng.randint(0, len(members))):
+                TeamMembership.objects.create(team=team, user=user, role=rng.choice(TEAM_ROLES))
+            team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
+            team_access.can_edit_tasks = rng.sample(TEAM_ROLES, rng.randint(0, len(TEAM_ROLES)))
+            team_access.visibility = rng.choice(['private', 'workspace'])
+            team_access.save()
+            teams.append(team)
+
+        # bulk_create без валидации: в выборку попадают и авторы/исполнители, покинувшие workspace или команду
+        Task.objects.bulk_create([
+            Task(
+                workspace=workspace,
+                team=rng.choice(teams + [None]),
+                title=f'Task {task_number}',
+                reporter=rng.choice(users),
+                assignee=rng.choice(users + [None]),
+                visible=rng.random() < 0.5,
+                status=rng.choice(Task.STATUS_CHOICES)[0],
+                deadline=rng.choice([None, timezone.now() + timedelta(days=rng.randint(-5, 5))]),
+            )
+            for task_number in range(40)
+        ])
+        return workspace, users
+
+
+class TaskVisibilityTest(RandomWorkspaceMixin, TestCase):
+    """SQL-фильтр видимости совпадает с проверками Task.is_visible_to_user на случайных данных"""
+
+    def python_visible_ids(self, user, workspace):
+        """Видимость по старым правилам: видимость задачи и видимость ее команды"""
+        visible = set()
+        for task in Task.objects.filter(workspace=workspace).select_related('team', 'reporter', 'assignee'):
+            if task.team is not None:
+                team_access, _ = TeamRoleAccess.objects.get_or_create(team=task.team)
+                if not team_access.is_team_visible_to_user(user):
+                    continue
+            if task.is_visible_to_user(user):
+                visible.add(task.pk)
+        return visible
+
+    def test_sql_matches_python_rules(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            workspace, users = self.build_workspace(rng, seed)
+            for user in users:
+                sql_ids = set(
+                    filter_visible_tasks(Task.objects.all(), user, workspace).values_list('pk', flat=True)
+                )
+                self.assertEqual(
+                    sql_ids,
+                    self.python_visible_ids(user, workspace),
+                    f'seed={seed}, user={user.username}'
+                )
+
+
+class TaskPermissionMatrixTest(RandomWorkspaceMixin, TestCase):
+    """task_permission_matrix совпадает с проверками Task.can_user_* и не зависит по запросам от числа задач"""
+
+    def legacy_permissions(self, task, user):
+        """Флаги по методам задачи без AccessContext"""
+        if task.team is not None:
+            team_access, _ = TeamRoleAccess.objects.get_or_create(team=task.team)
+            can_delete = team_access.has_permission(user, 'can_delete_tasks')
+        else:
+            workspace_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=task.workspace)
+            can_delete = workspace_access.has_permission(user, 'can_delete_tasks')
+        return {
+            'can_edit': task.can_user_edit(user),
+            'can_edit_content': task.can_user_edit_content(user),
+            'can_edit_team': task.can_user_edit_team(user),
+            'can_edit_assignee': task.can_user_edit_assignee(user),
+            'can_edit_visibility': task.can_user_edit_visibility(user),
+            'can_change_permissions': task.can_user_change_permissions(user),
+            'can_delete': can_delete,
+            'is_special_editor': task.is_special_editor(user),
+        }
+
+    def test_matrix_matches_per_task_methods(self):
+        for seed in range(3):
+            rng = random.Random(seed)
+            workspace, users = self.build_workspace(rng, seed)
+            tasks = list(Task.objects.filter(workspace=workspace).select_related('workspace', 'team', 'reporter', 'assignee'))
+            for user in users:
+                matrix = task_permission_matrix(tasks, user)
+                for task in tasks:
+                    self.assertEqual(
+                        matrix[task.pk],
+                        self.legacy_permissions(task, user),
+                        f'seed={seed}, user={user.username}, task={task.title}'
+                    )
+
+    def test_query_count_does_not_depend_on_task_count(self):
+        rng = random.Random(0)
+        workspace, users = self.build_workspace(rng, 0)
+        tasks = list(Task.objects.filter(workspace=workspace))
+        with CaptureQueriesContext(connection) as few:
+            task_permission_matrix(tasks, users[1])
+        # Вдвое больше задач в тех же командах
+        Task.objects.bulk_create([
+            Task(workspace=workspace, team_id=task.team_id, title=task.title, reporter_id=task.reporter_id)
+            for task in tasks
+        ])
+        tasks = list(Task.objects.filter(workspace=workspace))
+        with CaptureQueriesContext(connection) as many:
+            task_permission_matrix(tasks, users[1])
+        self.assertEqual(len(many), len(few))
+
+
+class TaskListCountersTest(RandomWorkspaceMixin, TestCase):
+    """Счетчики списка задач из одного агрегата совпадают с отдельными count()"""
+
+    def legacy_counters(self, user, workspace, **filters):
+        tasks = filter_visible_tasks(Task.objects.filter(workspace=workspace, **filters), user, workspace)
+        return {
+            'tasks_count': tasks.count(),
+            'tasks_expired_count': tasks.filter(deadline__lt=timezone.now(), status__in=OPEN_STATUSES).count(),
+            'my_assigned_tasks_count': tasks.filter(assignee=user).count(),
+            'my_reported_tasks_count': tasks.filter(reporter=user).count(),
+        }
+
+    def test_counters_match_separate_counts(self):
+        workspace, users = self.build_workspace(random.Random(1), 1)
+        url = reverse('workspace:task_list', kwargs={'workspace_url_hash': workspace.url_hash})
+        # Последний пользователь не состоит в workspace
+        for user in users[:-1]:
+            self.client.force_login(user)
+            for params, filters in (({}, {}), ({'status': 'todo'}, {'status': 'todo'})):
+                context = self.client.get(url, params).context
+                counters = {name: context[name] for name in self.legacy_counters(user, workspace)}
+                self.assertEqual(
+                    counters, self.legacy_counters(user, workspace, **filters), f'user={user.username}, {params}'
+                )
+
+
+class MassInvitationLimitTest(TestCase):
+    """Условный UPDATE счетчика не пускает сверх mass_invitation_max_uses"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        self.workspace.mass_invitation_max_uses = 2
+        self.workspace.save()
+
+    def join(self, username):
+        user = User.objects.create_user(username, f'{username}@example.com')
+        self.client.force_login(user)
+        self.client.get(reverse('workspace:accept_invitation', kwargs={'token': self.workspace.mass_invitation_token}))
+        return WorkspaceMembership.objects.filter(workspace=self.workspace, user=user).exists()
+
+    def test_claim_stops_at_limit(self):
+        view = AcceptInvitationView()
+        self.assertTrue(view.claim_mass_invitation_use(self.workspace))
+        self.assertTrue(view.claim_mass_invitation_use(self.workspace))
+        self.assertFalse(view.claim_mass_invitation_use(self.workspace))
+        self.workspace.refresh_from_db()
+        self.assertEqual(self.workspace.mass_invitation_current_uses, 2)
+
+    def test_claim_uses_current_counter_not_loaded_value(self):
+        # Объект загружен до того, как другой запрос занял последнее место
+        stale = Workspace.objects.get(pk=self.workspace.pk)
+        Workspace.objects.filter(pk=self.workspace.pk).update(mass_invitation_current_uses=2)
+        self.assertFalse(AcceptInvitationView().claim_mass_invitation_use(stale))
+
+    def test_join_over_limit_is_rolled_back(self):
+        self.assertTrue(self.join('first'))
+        self.assertTrue(self.join('second'))
+        self.assertFalse(self.join('third'))
+        self.workspace.refresh_from_db()
+        self.assertEqual(self.workspace.mass_invitation_current_uses, 2)
+        self.assertEqual(WorkspaceMembership.objects.filter(workspace=self.workspace).count(), 3)
+
+
+class WorkspaceSaveCounterTest(TestCase):
+    """Изменение настроек рабочей области не затирает счетчик массового приглашения"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        self.client.force_login(self.owner)
+
+    def post_with_join(self, name, data):
+        """Вступление по приглашению происходит после того, как представление загрузило workspace"""
+        original = get_object_or_404
+
+        def load_then_join(*args, **kwargs):
+            workspace = original(*args, **kwargs)
+            Workspace.objects.filter(pk=workspace.pk).update(mass_invitation_current_uses=F('mass_invitation_current_uses') + 1)
+            return workspace
+
+        with mock.patch('workspace.views.get_object_or_404', side_effect=load_then_join):
+            response = self.client.post(
+                reverse(f'workspace:{name}', kwargs={'workspace_url_hash': self.workspace.url_hash}),
+                data,
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+        self.assertTrue(response.json()['success'])
+        self.workspace.refresh_from_db()
+
+    def test_edit_keeps_counter(self):
+        self.post_with_join('workspace_edit', {'name': 'Renamed', 'description': ''})
+        self.assertEqual(self.workspace.name, 'Renamed')
+        self.assertEqual(self.workspace.mass_invitation_current_uses, 1)
+
+    def test_toggle_keeps_counter(self):
+        self.post_with_join('toggle_all_invitations', {'action': 'disable'})
+        self.assertFalse(self.workspace.mass_invitation_is_active)
+        self.assertEqual(self.workspace.mass_invitation_current_uses, 1)
+
+    def test_new_mass_invitation_resets_counter(self):
+        token = self.workspace.mass_invitation_token
+        self.post_with_join('create_mass_invitation', {'expiration_time': 86400, 'max_uses': 5})
+        self.assertNotEqual(self.workspace.mass_invitation_token, token)
+        self.assertEqual(self.workspace.mass_invitation_current_uses, 0)
+        self.assertEqual(self.workspace.mass_invitation_max_uses, 5)
+        self.assertIsNotNone(self.workspace.mass_invitation_expires_at)
+
+
+class TaskExportCsvTest(TestCase):
+    """Выгрузка CSV не оставляет ячеек, которые выполнятся как формулы"""
+
+    def test_formula_cells_are_escaped(self):
+        owner = User.objects.create_user('owner', 'owner@example.com')
+        workspace = Workspace.objects.create(user=owner, name='Workspace')
+        Task.objects.create(workspace=workspace, title='=HYPERLINK("http://example.com")', description='-1+2', reporter=owner)
+        self.client.force_login(owner)
+        response = self.client.get(reverse('workspace:task_export', kwargs={'workspace_url_hash': workspace.url_hash}))
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(rows[1][1], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(rows[1][2], "'-1+2")
+
+        ndjson = self.client.get(
+            reverse('workspace:task_export', kwargs={'workspace_url_hash': workspace.url_hash}), {'format': 'ndjson'}
+        )
+        self.assertEqual(json.loads(b''.join(ndjson.streaming_content))['description'], '-1+2')
+
+
+class TaskImporterTest(TestCase):
+    """Значения по умолчанию и поиск исполнителя при импорте"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        for username in ('Alex', 'alex', 'Maria'):
+            user = User.objects.create_user(username, f'{username.lower()}{len(username)}@example.com')
+            WorkspaceMembership.objects.create(workspace=self.workspace, user=user, role='member')
+        self.importer = TaskImporter(self.workspace, self.owner)
+
+    def test_status_defaults_to_model_default(self):
+        task, errors = self.importer.build_task({'title': 'Task'})
+        self.assertEqual(errors, {})
+        self.assertEqual(task.status, Task._meta.get_field('status').default)
+
+    def test_assignee_exact_match_wins(self):
+        task, errors = self.importer.build_task({'title': 'Task', 'assignee': 'alex'})
+        self.assertEqual(errors, {})
+        self.assertEqual(task.assignee_id, User.objects.get(username='alex').pk)
+
+    def test_assignee_case_insensitive_only_when_unambiguous(self):
+        task, errors = self.importer.build_task({'title': 'Task', 'assignee': 'MARIA'})
+        self.assertEqual(task.assignee_id, User.objects.get(username='Maria').pk)
+        _, errors = self.importer.build_task({'title': 'Task', 'assignee': 'ALEX'})
+        self.assertIn('assignee', errors)
+
+    def test_blank_flag_cell_uses_model_default(self):
+        rows = parse_rows('title,visible,can_edit_content\nTask,,no\n', 'csv')
+        task, errors = self.importer.build_task(rows[0])
+        self.assertEqual(errors, {})
+        self.assertEqual(task.visible, Task._meta.get_field('visible').default)
+        self.assertFalse(task.can_edit_content)
+
+    def test_malformed_csv_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            # Поле длиннее csv.field_size_limit вызывает csv.Error
+            parse_rows('title\n' + 'x' * (csv.field_size_limit() + 1) + '\n', 'csv')
+
+
+class TeamInviteMemberTest(TestCase):
+    """Добавление участников в команду одним набором"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        self.team = Team.objects.create(workspace=self.workspace, name='Team')
+        self.users = [User.objects.create_user(f'user{i}', f'user{i}@example.com') for i in range(3)]
+        for user in self.users[:2]:
+            WorkspaceMembership.objects.create(workspace=self.workspace, user=user, role='member')
+        self.client.force_login(self.owner)
+        self.url = reverse('workspace:team_invite_members', kwargs={
+            'workspace_url_hash': self.workspace.url_hash, 'team_url_hash': self.team.url_hash
+        })
+
+    def invite(self, users):
+        return self.client.post(
+            self.url, {'user_ids[]': [user.pk for user in users]}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ).json()
+
+    def test_adds_only_workspace_members(self):
+        response = self.invite(self.users)
+        self.assertEqual([user['username'] for user in response['added_users']], ['user0', 'user1'])
+        self.assertEqual(len(response['errors']), 1)
+
+    def test_member_added_by_parallel_request_is_not_reported(self):
+        # Строка появилась после проверки состава команды, но до вставки
+        original_filter = TeamMembership.objects.filter
+        calls = []
+
+        def filter_then_race(*args, **kwargs):
+            queryset = original_filter(*args, **kwargs)
+            if not calls:
+                calls.append(True)
+                list(queryset)
+                TeamMembership.objects.bulk_create([TeamMembership(team=self.team, user=self.users[0], role='member')])
+            return queryset
+
+        with mock.patch.object(TeamMembership.objects, 'filter', side_effect=filter_then_race):
+            response = self.invite(self.users[:2])
+        self.assertEqual([user['username'] for user in response['added_users']], ['user1'])
+        self.assertIn('Пользователь user0 уже в команде', response['errors'])
+        self.assertEqual(TeamMembership.objects.filter(team=self.team).count(), 2)
+
+
+class TaskSearchTest(TestCase):
+    """Поиск в списке задач: совпадения в названии и описании с учетом видимости"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.member = User.objects.create_user('member', 'member@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        WorkspaceMembership.objects.create(workspace=self.workspace, user=self.member, role='member')
+        # Редакторы видят скрытые задачи, поэтому участник их не редактирует
+        role_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
+        role_access.can_edit_tasks = ['admin']
+        role_access.save()
+        self.in_title = Task.objects.create(workspace=self.workspace, title='Сломан импорт', reporter=self.owner)
+        self.in_description = Task.objects.create(
+            workspace=self.workspace, title='Отчет', description='После импорта пропали строки', reporter=self.owner
+        )
+        self.hidden = Task.objects.create(
+            workspace=self.workspace, title='Скрытый импорт', reporter=self.owner, visible=False
+        )
+        Task.objects.create(workspace=self.workspace, title='Другое', reporter=self.owner)
+        self.url = reverse('workspace:task_list', kwargs={'workspace_url_hash': self.workspace.url_hash})
+
+    def search(self, user, text):
+        self.client.force_login(user)
+        response = self.client.get(self.url, {'q': text})
+        return [task.pk for task in response.context['tasks']]
+
+    def test_matches_title_and_description(self):
+        found = self.search(self.owner, 'импорт')
+        self.assertEqual(set(found), {self.in_title.pk, self.in_description.pk, self.hidden.pk})
+        # Совпадение в названии весит больше, чем в описании
+        self.assertLess(found.index(self.in_title.pk), found.index(self.in_description.pk))
+
+    def test_respects_visibility(self):
+        self.assertEqual(set(self.search(self.member, 'импорт')), {self.in_title.pk, self.in_description.pk})
+
+    def test_index_follows_updates(self):
+        Task.objects.filter(pk=self.in_description.pk).update(description='Ничего общего')
+        self.assertEqual(set(self.search(self.member, 'импорт')), {self.in_title.pk})
+
+    def test_repeated_install_does_not_rebuild(self):
+        self.assertFalse(install_task_search(connection))
+
+
+class TaskValidatorTest(TestCase):
+    """TaskValidator дает те же ошибки, что прежний Task.clean, за фиксированное число запросов"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.member = User.objects.create_user('member', 'member@example.com')
+        self.outsider = User.objects.create_user('outsider', 'outsider@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        self.other_workspace = Workspace.objects.create(user=self.outsider, name='Other')
+        WorkspaceMembership.objects.create(workspace=self.workspace, user=self.member, role='member')
+        self.team = Team.objects.create(workspace=self.workspace, name='Team')
+        TeamMembership.objects.create(team=self.team, user=self.owner, role='leader')
+        self.other_team = Team.objects.create(workspace=self.other_workspace, name='Other team')
+
+    def legacy_errors(self, task):
+        """Проверки Task.clean до переноса в TaskValidator"""
+        errors = {}
+        if task.workspace and task.reporter:
+            if not task.workspace.has_access(task.reporter):
+                errors['reporter'] = 'Автор задачи должен быть участником рабочей области'
+        if task.team and task.workspace:
+            if task.team.workspace != task.workspace:
+                errors['team'] = 'Команда должна принадлежать той же рабочей области'
+        if task.assignee and task.team:
+            if not task.team.members.filter(id=task.assignee.id).exists():
+                errors['assignee'] = f'Исполнитель не состоит в команде {task.team.name}'
+        if task.assignee and not task.team and task.workspace:
+            if not task.workspace.has_access(task.assignee):
+                errors['assignee'] = 'Исполнитель должен быть участником рабочей области'
+        return errors
+
+    def build_tasks(self):
+        tasks = []
+        for reporter in (self.owner, self.member, self.outsider):
+            for team in (None, self.team, self.other_team):
+                for assignee in (None, self.owner, self.member, self.outsider):
+                    tasks.append(Task(
+                        workspace=self.workspace, team=team, title='Task', reporter=reporter, assignee=assignee
+                    ))
+        return tasks
+
+    def test_same_errors_as_legacy_clean(self):
+        tasks = self.build_tasks()
+        batch = TaskValidator.for_workspaces([self.workspace.pk, self.other_workspace.pk])
+        for task in tasks:
+            expected = self.legacy_errors(task)
+            label = f'reporter={task.reporter}, team={task.team}, assignee={task.assignee}'
+            self.assertEqual(TaskValidator.for_task(task).get_errors(task), expected, label)
+            self.assertEqual(batch.get_errors(task), expected, label)
+        # В наборе есть все виды ошибок
+        self.assertEqual(
+            set().union(*(self.legacy_errors(task) for task in tasks)), {'reporter', 'team', 'assignee'}
+        )
+
+    def test_query_count(self):
+        tasks = self.build_tasks()
+        task = tasks[-1]
+        with self.assertNumQueries(1):
+            TaskValidator.for_task(task).get_errors(task)
+        with self.assertNumQueries(2):
+            validator = TaskValidator.for_workspaces([self.workspace.pk, self.other_workspace.pk])
+            for task in tasks:
+                validator.get_errors(task)
+
+
+class TaskQueryPlanTest(TestCase):
+    """Запросы списка задач используют индексы (manage.py check_task_query_plans)"""
+
+    def test_task_list_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command('check_task_query_plans', seed=2000, stdout=out)
+        self.assertIn('Все запросы списка задач используют индексы', out.getvalue())
+
+
+class TaskBulkUpdateTest(TestCase):
+    """Массовое изменение задач: итог по каждой задаче и уведомление исполнителю"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.member = User.objects.create_user('member', 'member@example.com')
+        self.assignee = User.objects.create_user('assignee', 'assignee@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        for user in (self.member, self.assignee):
+            WorkspaceMembership.objects.create(workspace=self.workspace, user=user, role='member')
+        # Участник редактирует только свои задачи
+        role_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
+        role_access.can_edit_tasks = ['admin']
+        role_access.save()
+        team = Team.objects.create(workspace=self.workspace, name='Team')
+        TeamMembership.objects.create(team=team, user=self.member, role='member')
+
+        self.own_tasks = [
+            Task.objects.create(workspace=self.workspace, title=f'Own {i}', reporter=self.member) for i in range(2)
+        ]
+        # Исполнитель не состоит в команде задачи
+        self.invalid_task = Task.objects.create(workspace=self.workspace, team=team, title='Team', reporter=self.member)
+        self.foreign_task = Task.objects.create(workspace=self.workspace, title='Foreign', reporter=self.owner)
+        self.url = reverse('workspace:task_bulk_update', kwargs={'workspace_url_hash': self.workspace.url_hash})
+        self.client.force_login(self.member)
+
+    def update(self, tasks, **changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url,
+                {'task_hashes[]': [task.url_hash for task in tasks] + ['missing'], **changes},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            ).json()
+
+    def test_per_task_outcomes(self):
+        response = self.update(
+            self.own_tasks + [self.invalid_task, self.foreign_task], status='done', assignee=self.assignee.pk
+        )
+        results = response['results']
+        self.assertEqual(response['updated_count'], 2)
+        for task in self.own_tasks:
+            self.assertEqual(results[task.url_hash]['updated_fields'], ['assignee', 'status'])
+        self.assertEqual(results[self.invalid_task.url_hash]['errors'], ['Исполнитель не состоит в команде Team'])
+        self.assertEqual(
+            results[self.foreign_task.url_hash]['error'], 'У вас нет прав для редактирования этой задачи'
+        )
+        self.assertEqual(results['missing']['error'], 'Задача не найдена')
+
+    def test_partial_failure_keeps_rejected_tasks_unchanged(self):
+        self.update(self.own_tasks + [self.invalid_task, self.foreign_task], status='done', assignee=self.assignee.pk)
+        statuses = dict(Task.objects.values_list('pk', 'status'))
+        for task in self.own_tasks:
+            self.assertEqual(statuses[task.pk], 'done')
+            task.refresh_from_db()
+            self.assertEqual(task.updated_by, self.member)
+        default_status = Task._meta.get_field('status').default
+        self.assertEqual(statuses[self.invalid_task.pk], default_status)
+        self.assertEqual(statuses[self.foreign_task.pk], default_status)
+
+    def test_assignee_gets_one_notification(self):
+        self.update(self.own_tasks + [self.foreign_task], assignee=self.assignee.pk)
+        notifications = Notification.objects.filter(user=self.assignee)
+        self.assertEqual(notifications.count(), 1)
+        self.assertIn('назначил вам задач: 2', notifications.get().message)
+
+        # Повторное назначение ничего не меняет и не уведомляет
+        self.update(self.own_tasks, assignee=self.assignee.pk)
+        self.assertEqual(notifications.count(), 1)
+
+    def test_self_assignment_is_not_notified(self):
+        self.update(self.own_tasks, assignee=self.member.pk)
+        self.assertFalse(Notification.objects.exists())
+
+
+class CursorPaginationTest(TestCase):
+    """Курсорная пагинация списка задач по всем вариантам сортировки"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        now = timezone.now()
+        priorities = [value for value, _ in Task.PRIORITY_CHOICES]
+        # Повторяющиеся значения и NULL в дедлайнах, чтобы порядок решал id
+        Task.objects.bulk_create([
+            Task(
+                workspace=self.workspace,
+                title=f'Task {index % 4}',
+                priority=priorities[index % len(priorities)],
+                reporter=self.owner,
+                deadline=None if index % 3 == 0 else now + timedelta(days=index % 5),
+                url_hash=f'{index:064d}',
+            )
+            for index in range(23)
+        ])
+        self.tasks = Task.objects.filter(workspace=self.workspace)
+        self.sorts = SORT_FIELDS + tuple(f'-{field}' for field in SORT_FIELDS)
+
+    def page(self, sort, cursor=None):
+        return paginate_by_cursor(self.tasks, sort, 5, state={'sort': sort}, cursor=decode_cursor(cursor))
+
+    def test_forward_pages_follow_full_ordering(self):
+        for sort in self.sorts:
+            expected = list(self.tasks.order_by(*ordering_for(sort)).values_list('pk', flat=True))
+            collected, page = [], self.page(sort)
+            collected += [task.pk for task in page]
+            while page.has_next():
+                page = self.page(sort, page.next_cursor)
+                collected += [task.pk for task in page]
+            self.assertEqual(collected, expected, sort)
+            # Дедлайны NULL идут в конце в обоих направлениях
+            if sort.lstrip('-') == 'deadline':
+                deadlines = list(self.tasks.filter(pk__in=collected[-8:]).values_list('deadline', flat=True))
+                self.assertEqual(deadlines, [None] * 8, sort)
+
+    def test_backward_pages_match_forward_pages(self):
+        for sort in self.sorts:
+            pages, page = [], self.page(sort)
+            pages.append([task.pk for task in page])
+            while page.has_next():
+                page = self.page(sort, page.next_cursor)
+                pages.append([task.pk for task in page])
+
+            # Обратный проход от последней страницы возвращает те же страницы
+            for expected in reversed(pages[:-1]):
+                page = self.page(sort, page.previous_cursor)
+                self.assertEqual([task.pk for task in page], expected, sort)
+            self.assertFalse(page.has_previous(), sort)
+
+    def test_tampered_cursor_is_ignored(self):
+        cursor = self.page('-created_at').next_cursor
+        tampered_cursor = cursor[:-1] + ('B' if cursor.endswith('A') else 'A')
+        self.assertIsNotNone(decode_cursor(cursor))
+        self.assertIsNone(decode_cursor(tampered_cursor))
+        self.assertIsNone(decode_cursor('garbage'))
+        forged = signing.dumps({'s': {}, 'k': [None, 1], 'd': 'sideways'}, salt=CURSOR_SALT, compress=True)
+        self.assertIsNone(decode_cursor(forged))
+
+        # Список с поврежденным курсором открывается с первой страницы
+        self.client.force_login(self.owner)
+        url = reverse('workspace:task_list', kwargs={'workspace_url_hash': self.workspace.url_hash})
+        first = self.client.get(url)
+        tampered = self.client.get(url, {'cursor': tampered_cursor})
+        self.assertEqual(tampered.status_code, 200)
+        self.assertEqual(
+            [task.pk for task in tampered.context['tasks']], [task.pk for task in first.context['tasks']]
+        )
+
+
+class IndividualInvitationTest(TestCase):
+    """Точечные приглашения одним набором: повторы и приглашения параллельных запросов"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        self.users = [User.objects.create_user(f'user{i}', f'user{i}@example.com') for i in range(3)]
+        self.client.force_login(self.owner)
+        self.url = reverse('workspace:create_individual_invitations', kwargs={'workspace_url_hash': self.workspace.url_hash})
+
+    def invite(self, identifiers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url, {'identifiers': ' '.join(identifiers)}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            ).json()
+
+    def test_duplicate_identifiers_create_one_invitation(self):
+        user = self.users[0]
+        response = self.invite([user.email, user.profile.unique_code, user.email, 'missing@example.com'])
+        self.assertEqual(response['created_count'], 1)
+        self.assertEqual(response['errors'], [
+            'Пользователь user0@example.com уже приглашен',
+            'Пользователь с email missing@example.com не найден',
+        ])
+        self.assertEqual(IndividualInvitation.objects.filter(invited_user=user).count(), 1)
+
+        # Повторный запрос не создает второе ожидающее приглашение
+        response = self.invite([user.email])
+        self.assertEqual((response['created_count'], response['errors']), (0, ['Пользователь user0@example.com уже приглашен']))
+
+    def test_invitation_created_by_parallel_request_is_skipped(self):
+        # Приглашение появилось после проверки уже приглашенных, но до вставки
+        original_filter = IndividualInvitation.objects.filter
+        calls = []
+
+        def filter_then_race(*args, **kwargs):
+            queryset = original_filter(*args, **kwargs)
+            if not calls:
+                calls.append(True)
+                list(queryset)
+                IndividualInvitation.objects.create(workspace=self.workspace, created_by=self.owner, invited_user=self.users[0])
+            return queryset
+
+        with mock.patch.object(IndividualInvitation.objects, 'filter', side_effect=filter_then_race):
+            response = self.invite([user.email for user in self.users])
+
+        self.assertEqual(response['created_count'], 2)
+        self.assertEqual(response['errors'], ['Пользователь user0@example.com уже приглашен'])
+        self.assertEqual(IndividualInvitation.objects.filter(workspace=self.workspace, status='pending').count(), 3)
+        # Письма и уведомления - только по созданным этим запросом приглашениям
+        self.assertEqual(
+            sorted(recipient for row in EmailOutbox.objects.all() for recipient in row.recipients),
+            ['user1@example.com', 'user2@example.com']
+        )
+        self.assertFalse(Notification.objects.filter(user=self.users[0]).exists())
+
+
+class InvitationExpiryTest(TestCase):
+    """Срок действия приглашений: отсечка в SQL, заполнение срока и expire_invitations"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com')
+        self.invitee = User.objects.create_user('invitee', 'invitee@example.com')
+        self.workspace = Workspace.objects.create(user=self.owner, name='Workspace')
+        self.invitation = IndividualInvitation.objects.create(
+            workspace=self.workspace, created_by=self.owner, invited_user=self.invitee
+        )
+        IndividualInvitation.objects.filter(pk=self.invitation.pk).update(created_at=timezone.now() - timedelta(days=8))
+
+    def pending_ids(self):
+        return set(pending_individual_invitations().values_list('pk', flat=True))
+
+    def expire(self):
+        call_command('expire_invitations', stdout=io.StringIO())
+
+    def accept(self):
+        self.client.force_login(self.invitee)
+        self.client.get(reverse('workspace:accept_invitation', kwargs={'token': self.invitation.invitation_token}))
+        return WorkspaceMembership.objects.filter(workspace=self.workspace, user=self.invitee).exists()
+
+    def test_individual_invitations_do_not_expire_by_default(self):
+        self.assertEqual(self.pending_ids(), {self.invitation.pk})
+        self.expire()
+        self.invitation.refresh_from_db()
+        self.assertEqual(self.invitation.status, 'pending')
+        self.assertTrue(self.accept())
+
+    def test_individual_cutoff(self):
+        fresh = IndividualInvitation.objects.create(workspace=self.workspace, created_by=self.owner, invited_user=self.owner)
+        with mock.patch('workspace.invitations.EXPIRY_DAYS', 7):
+            self.assertEqual(self.pending_ids(), {fresh.pk})
+            self.assertEqual(list(expired_individual_invitations().values_list('pk', flat=True)), [self.invitation.pk])
+
+            # Просроченное приглашение не принимается, даже если команда еще не пометила его
+            self.assertFalse(self.accept())
+
+            self.expire()
+        self.assertEqual(
+            dict(IndividualInvitation.objects.values_list('pk', 'status')),
+            {self.invitation.pk: 'expired', fresh.pk: 'pending'}
+        )
+
+    def test_mass_invitation_deadline_backfill(self):
+        created_at = timezone.now() - timedelta(hours=2)
+        # Строка, созданная до появления mass_invitation_expires_at
+        Workspace.objects.filter(pk=self.workspace.pk).update(
+            mass_invitation_expiration=3600, mass_invitation_created_at=created_at, mass_invitation_expires_at=None
+        )
+        fill_mass_invitation_deadlines(sender=apps.get_app_config('workspace'), using='default')
+        self.workspace.refresh_from_db()
+        self.assertEqual(self.workspace.mass_invitation_expires_at, created_at + timedelta(seconds=3600))
+        self.assertFalse(usable_mass_invitations().filter(pk=self.workspace.pk).exists())
+
+        # Повторный запуск ничего не меняет
+        self.assertEqual(fill_mass_invitation_expiry(), 0)
+
+        self.expire()
+        self.workspace.refresh_from_db()
+        self.assertFalse(self.workspace.mass_invitation_is_active)
 
-# Create your tests here.
+    def test_unlimited_mass_invitation_stays_active(self):
+        self.expire()
+        self.workspace.refresh_from_db()
+        self.assertIsNone(self.workspace.mass_invitation_expires_at)
+        self.assertTrue(self.workspace.mass_invitation_is_active)
@@ -23,6 +23,10 @@ urlpatterns = [
 
     # === TASKS ===
     path('<str:workspace_url_hash>/tasks/', views.TaskListView.as_view(), name='task_list'),
+    path('<str:workspace_url_hash>/tasks/export/', views.TaskExportView.as_view(), name='task_export'),
+    path('<str:workspace_url_hash>/tasks/import/', views.TaskImportView.as_view(), name='task_import'),
+    path('<str:workspace_url_hash>/tasks/bulk-update/', views.TaskBulkUpdateView.as_view(), name='task_bulk_update'),
+    path('<str:workspace_url_hash>/tasks/permissions/', views.TaskPermissionsView.as_view(), name='task_permissions'),
     path('<str:workspace_url_hash>/task/create/', views.TaskCreateView.as_view(), name='task_create'),
     path('<str:workspace_url_hash>/task/<str:task_url_hash>/', views.TaskDetailView.as_view(), name='task_detail'),
 
@@ -0,0 +1,104 @@
+"""
+Проверка связей задачи с участниками (автор, команда, исполнитель).
+
+TaskValidator работает на заранее загруженных множествах участников:
+для одной задачи они загружаются одним запросом (for_task), для массовых
+операций - один раз на набор рабочих областей (for_workspaces), после чего
+проверка каждой строки не обращается к базе.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Value
+
+from .models import TeamMembership, WorkspaceMembership
+
+User = get_user_model()
+
+
+class TaskValidator:
+    """Правила Task.clean на множествах (workspace_id, user_id) и (team_id, user_id)"""
+
+    def __init__(self, workspace_members, team_members, team_workspaces=None):
+        self.workspace_members = workspace_members
+        self.team_members = team_members
+        # {team_id: workspace_id}; если команды нет, используется task.team
+        self.team_workspaces = team_workspaces or {}
+
+    @classmethod
+    def for_workspaces(cls, workspace_ids):
+        """Загружает участников рабочих областей и их команд (два запроса)"""
+        workspace_ids = list(workspace_ids)
+        workspace_members = set(
+            WorkspaceMembership.objects.filter(workspace_id__in=workspace_ids).values_list('workspace_id', 'user_id')
+        )
+        team_members = set()
+        team_workspaces = {}
+        for team_id, workspace_id, user_id in TeamMembership.objects.filter(
+            team__workspace_id__in=workspace_ids
+        ).values_list('team_id', 'team__workspace_id', 'user_id'):
+            team_members.add((team_id, user_id))
+            team_workspaces[team_id] = workspace_id
+        return cls(workspace_members, team_members, team_workspaces)
+
+    @classmethod
+    def for_task(cls, task):
+        """Загружает членство автора и исполнителя одной задачи одним запросом"""
+        user_ids = {user_id for user_id in (task.reporter_id, task.assignee_id) if user_id is not None}
+        if not user_ids or task.workspace_id is None:
+            return cls(set(), set())
+
+        in_team = Value(False)
+        if task.team_id is not None:
+            in_team = Exists(TeamMembership.objects.filter(team_id=task.team_id, user=OuterRef('pk')))
+        rows = User.objects.filter(pk__in=user_ids).annotate(
+            in_workspace=Exists(
+                WorkspaceMembership.objects.filter(workspace_id=task.workspace_id, user=OuterRef('pk'))
+            ),
+            in_team=in_team,
+        ).values_list('pk', 'in_workspace', 'in_team')
+
+        workspace_members = set()
+        team_members = set()
+        for user_id, is_workspace_member, is_team_member in rows:
+            if is_workspace_member:
+                workspace_members.add((task.workspace_id, user_id))
+            if is_team_member:
+                team_members.add((task.team_id, user_id))
+        return cls(workspace_members, team_members)
+
+    def team_workspace_id(self, task):
+        if task.team_id in self.team_workspaces:
+            return self.team_workspaces[task.team_id]
+        return task.team.workspace_id
+
+    def get_errors(self, task):
+        """Возвращает словарь ошибок задачи (пустой, если ошибок нет)"""
+        errors = {}
+
+        # Проверяем, что автор состоит в workspace
+        if task.workspace_id and task.reporter_id:
+            if (task.workspace_id, task.reporter_id) not in self.workspace_members:
+                errors['reporter'] = 'Автор задачи должен быть участником рабочей области'
+
+        # Проверяем, что команда принадлежит workspace
+        if task.team_id and task.workspace_id:
+            if self.team_workspace_id(task) != task.workspace_id:
+                errors['team'] = 'Команда должна принадлежать той же рабочей области'
+
+        # Проверяем, что исполнитель состоит в команде (если команда указана)
+        if task.assignee_id and task.team_id:
+            if (task.team_id, task.assignee_id) not in self.team_members:
+                errors['assignee'] = f'Исполнитель не состоит в команде {task.team.name}'
+
+        # Проверяем, что исполнитель состоит в workspace (если команда не указана)
+        if task.assignee_id and not task.team_id and task.workspace_id:
+            if (task.workspace_id, task.assignee_id) not in self.workspace_members:
+                errors['assignee'] = 'Исполнитель должен быть участником рабочей области'
+
+        return errors
+
+    def validate(self, task):
+        """Выбрасывает ValidationError, как Task.clean"""
+        errors = self.get_errors(task)
+        if errors:
+            raise ValidationError(errors)
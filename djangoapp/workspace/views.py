@@ -3,22 +3,35 @@ from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, ListView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.views import View
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.contrib.auth import authenticate
+import csv
 import json
+from urllib.parse import urlencode
 User = get_user_model()
-from .models import Workspace, WorkspaceMembership, Team, TeamMembership, Task, IndividualInvitation, WorkspaceRoleAccess, TeamRoleAccess
+from .models import Workspace, WorkspaceMembership, Team, TeamMembership, Task, IndividualInvitation, WorkspaceRoleAccess, TeamRoleAccess, OPEN_STATUSES
+from .access import AccessContext, task_permission_matrix
+from .visibility import filter_visible_tasks
+from .filters import DEADLINE_FILTERS, deadline_q
+from .pagination import SORT_FIELDS, decode_cursor, ordering_for, paginate_by_cursor
+from .search import search_tasks
+from .importer import TaskImporter, parse_rows
+from .validators import TaskValidator
+from . import permission_cache
+from .invitations import expired_individual_invitations, pending_individual_invitations, usable_mass_invitations
 from .forms import WorkspaceCreateForm, TeamCreateForm, TaskCreateForm, MassInvitationForm, IndividualInvitationForm
 from user_profile.models import UserProfile, Notification
+from user_profile.notifications import notify_many, send_notifications
+from user_profile.outbox import queue_emails
 from django import forms
 
 
@@ -64,59 +77,44 @@ class WorkspaceDetailView(LoginRequiredMixin, DetailView):
         context = super().get_context_data(**kwargs)
         workspace = self.get_object()
         
+        # Загружаем права пользователя один раз на запрос
+        access = AccessContext.for_request(self.request, workspace)
+        
         # Получаем настройки прав доступа
-        role_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=workspace)
+        role_access = access.workspace_access
         context['role_access'] = role_access
         
         # Право создавать задачи в workspace
-        can_create_task_in_workspace = role_access.has_permission(self.request.user, 'can_create_tasks')
+        can_create_task_in_workspace = access.has_workspace_permission('can_create_tasks')
         
         # Право создавать задачи в командах, где он состоит
-        user_teams = Team.objects.filter(
-            workspace=workspace,
-            members=self.request.user
+        can_create_in_any_team = any(
+            access.has_team_permission(team_id, 'can_create_tasks')
+            for team_id in access.team_roles
         )
         
-        can_create_in_any_team = False
-        for team in user_teams:
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-            if team_access.has_permission(self.request.user, 'can_create_tasks'):
-                can_create_in_any_team = True
-                break
-        
         if can_create_task_in_workspace or can_create_in_any_team: context['can_create_tasks'] = True
         else: context['can_create_tasks'] = False
 
 
         # ДОБАВЛЯЕМ ПРАВА ПОЛЬЗОВАТЕЛЯ В КОНТЕКСТ
-        context['can_edit_workspace'] = role_access.has_permission(self.request.user, 'can_edit_workspace')
-        context['can_manage_access'] = role_access.has_permission(self.request.user, 'can_manage_access')
-        context['can_create_teams'] = role_access.has_permission(self.request.user, 'can_create_teams')
-        # context['can_create_tasks'] = role_access.has_permission(self.request.user, 'can_create_tasks')
-        context['can_invite_users'] = role_access.has_permission(self.request.user, 'can_invite_users')
-        context['can_edit_tasks'] = role_access.has_permission(self.request.user, 'can_edit_tasks')
-        context['can_delete_tasks'] = role_access.has_permission(self.request.user, 'can_delete_tasks')
-        context['can_view_all_tasks'] = role_access.has_permission(self.request.user, 'can_view_all_tasks')
-        context['can_view_all_teams'] = role_access.has_permission(self.request.user, 'can_view_all_teams')
-        
-        # Получаем команды с учетом видимости
-        user_teams = Team.objects.filter(
-            workspace=workspace,
-            teammembership__user=self.request.user
-        )
+        context['can_edit_workspace'] = access.has_workspace_permission('can_edit_workspace')
+        context['can_manage_access'] = access.has_workspace_permission('can_manage_access')
+        context['can_create_teams'] = access.has_workspace_permission('can_create_teams')
+        # context['can_create_tasks'] = access.has_workspace_permission('can_create_tasks')
+        context['can_invite_users'] = access.has_workspace_permission('can_invite_users')
+        context['can_edit_tasks'] = access.has_workspace_permission('can_edit_tasks')
+        context['can_delete_tasks'] = access.has_workspace_permission('can_delete_tasks')
+        context['can_view_all_tasks'] = access.has_workspace_permission('can_view_all_tasks')
+        context['can_view_all_teams'] = access.has_workspace_permission('can_view_all_teams')
         
         # Все команды workspace для владельцев и администраторов
-        if workspace.get_user_role(self.request.user) in ['owner', 'admin'] or context['can_view_all_teams']:
-            context['teams'] = Team.objects.filter(workspace=workspace)
+        all_teams = Team.objects.filter(workspace=workspace)
+        if access.workspace_role in ['owner', 'admin'] or context['can_view_all_teams']:
+            context['teams'] = all_teams
         else:
             # Для обычных пользователей - только команды, которые они видят
-            visible_teams = []
-            all_teams = Team.objects.filter(workspace=workspace)
-            for team in all_teams:
-                team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-                if team_access.is_team_visible_to_user(self.request.user):
-                    visible_teams.append(team)
-            context['teams'] = visible_teams
+            context['teams'] = access.filter_visible_teams(all_teams)
         
         # Получаем membership текущего пользователя
         workspace_user_membership = WorkspaceMembership.objects.filter(
@@ -134,12 +132,12 @@ class WorkspaceDetailView(LoginRequiredMixin, DetailView):
             # Показываем только задачи команд, в которых состоит пользователь
             context['tasks'] = Task.objects.filter(
                 workspace=workspace, 
-                team__in=user_teams
+                team_id__in=list(access.team_roles)
             )
         
         # Добавляем информацию о членах workspace
         context['members'] = WorkspaceMembership.objects.filter(workspace=workspace).select_related('user')
-        context['user_role'] = workspace.get_user_role(self.request.user)
+        context['user_role'] = access.workspace_role
         
         # Добавляем данные массового приглашения в контекст
         context['mass_invitation_url'] = workspace.get_mass_invitation_url(self.request)
@@ -197,7 +195,8 @@ class WorkspaceEditView(LoginRequiredMixin, View):
                 # Обновляем данные рабочей области
                 workspace.name = name
                 workspace.description = description if description else None
-                workspace.save()
+                # Только измененные поля: полный save() перезаписал бы счетчик массового приглашения
+                workspace.save(update_fields=['name', 'description'])
                 
                 # Логируем изменения
                 changes = []
@@ -331,6 +330,9 @@ class WorkspaceDeleteView(LoginRequiredMixin, View):
                 workspace_id = workspace.id
                 workspace_owner = request.user
                 
+                # Получателей собираем до удаления: членства удаляются каскадно
+                member_ids = self.get_member_ids(workspace_id, workspace_owner)
+                
                 # Удаляем рабочую область (каскадное удаление настроено в моделях)
                 workspace.delete()
                 
@@ -338,7 +340,7 @@ class WorkspaceDeleteView(LoginRequiredMixin, View):
                 self.create_deletion_notification(request.user, workspace_name, stats)
                 
                 # Отправляем уведомления участникам
-                self.notify_workspace_members(workspace_id, workspace_name, workspace_owner)
+                self.notify_workspace_members(member_ids, workspace_name)
                 
                 return JsonResponse({
                     'success': True,
@@ -392,20 +394,18 @@ class WorkspaceDeleteView(LoginRequiredMixin, View):
             level='warning',
         )
     
-    def notify_workspace_members(self, workspace_id, workspace_name, owner):
+    def get_member_ids(self, workspace_id, owner):
+        """Возвращает id всех участников рабочей области кроме владельца"""
+        return list(
+            WorkspaceMembership.objects.filter(workspace_id=workspace_id)
+            .exclude(user=owner)
+            .values_list('user_id', flat=True)
+        )
+    
+    def notify_workspace_members(self, member_ids, workspace_name):
         """Отправляет уведомления всем участникам рабочей области"""
-        # Получаем всех участников рабочей области кроме владельца
-        memberships = WorkspaceMembership.objects.filter(workspace_id=workspace_id)
-        
-        for membership in memberships:
-            if membership.user != owner:
-                message = f'Рабочая область "{workspace_name}", в которой вы участвовали, была удалена её владельцем.'
-                
-                Notification.objects.create(
-                    user=membership.user,
-                    message=message,
-                    level='info',
-                )
+        message = f'Рабочая область "{workspace_name}", в которой вы участвовали, была удалена её владельцем.'
+        notify_many(member_ids, message, level='info')
 
 
 class TeamCreateView(LoginRequiredMixin, CreateView):
@@ -464,13 +464,13 @@ class TeamDetailView(LoginRequiredMixin, DetailView):
     def dispatch(self, request, *args, **kwargs):
         # Проверяем видимость команды
         team = get_object_or_404(
-            Team,
+            Team.objects.select_related('workspace'),
             url_hash=kwargs['team_url_hash'],
             workspace__url_hash=kwargs['workspace_url_hash']
         )
         
-        team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-        if not team_access.is_team_visible_to_user(request.user):
+        self.access = AccessContext.for_request(request, team.workspace)
+        if not self.access.is_team_visible(team):
             from django.http import Http404
             raise Http404("У вас нет доступа к этой команде")
             
@@ -487,28 +487,29 @@ class TeamDetailView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        team = self.get_object()
+        team = self.object
+        access = self.access
         
         # Получаем настройки прав доступа команды
-        team_access, created = TeamRoleAccess.objects.get_or_create(team=team)
-        workspace_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=team.workspace)
+        team_access = access.get_team_access(team)
+        workspace_access = access.workspace_access
 
         context['team_access'] = team_access
         context['workspace_access'] = workspace_access  # Добавляем workspace_access для шаблона
         
         # Права для workspace
-        context['can_create_tasks_in_workspace'] = workspace_access.has_permission(self.request.user, 'can_create_tasks')
-        context['can_edit_tasks_in_workspace'] = workspace_access.has_permission(self.request.user, 'can_edit_tasks')
-        context['can_delete_tasks_in_workspace'] = workspace_access.has_permission(self.request.user, 'can_delete_tasks')
+        context['can_create_tasks_in_workspace'] = access.has_workspace_permission('can_create_tasks')
+        context['can_edit_tasks_in_workspace'] = access.has_workspace_permission('can_edit_tasks')
+        context['can_delete_tasks_in_workspace'] = access.has_workspace_permission('can_delete_tasks')
 
         # Права для команды
-        context['is_member'] = team.members.filter(id=self.request.user.id).exists()
-        context['can_manage_access'] = team_access.has_permission(self.request.user, 'can_manage_access')
-        context['can_edit_team'] = team_access.has_permission(self.request.user, 'can_edit_team')
-        context['can_invite_users'] = team_access.has_permission(self.request.user, 'can_invite_users')
-        context['can_create_tasks_in_team'] = team_access.has_permission(self.request.user, 'can_create_tasks')
-        context['can_edit_tasks_in_team'] = team_access.has_permission(self.request.user, 'can_edit_tasks')
-        context['can_delete_tasks_in_team'] = team_access.has_permission(self.request.user, 'can_delete_tasks')
+        context['is_member'] = access.is_team_member(team)
+        context['can_manage_access'] = access.has_team_permission(team, 'can_manage_access')
+        context['can_edit_team'] = access.has_team_permission(team, 'can_edit_team')
+        context['can_invite_users'] = access.has_team_permission(team, 'can_invite_users')
+        context['can_create_tasks_in_team'] = access.has_team_permission(team, 'can_create_tasks')
+        context['can_edit_tasks_in_team'] = access.has_team_permission(team, 'can_edit_tasks')
+        context['can_delete_tasks_in_team'] = access.has_team_permission(team, 'can_delete_tasks')
         
         # Получаем текущих участников команды
         team_members = TeamMembership.objects.filter(team=team).select_related('user')
@@ -543,7 +544,7 @@ class TeamDetailView(LoginRequiredMixin, DetailView):
         members_for_demotion = [member for member in team_members if member.role == 'admin']
         
         context['tasks'] = Task.objects.filter(team=team)
-        context['is_team_member'] = team.members.filter(id=self.request.user.id).exists()
+        context['is_team_member'] = access.is_team_member(team)
         context['team_members'] = team_members
         context['workspace_members'] = available_users
         context['team_members_users'] = [member.user for member in team_members]
@@ -704,58 +705,85 @@ class TaskListView(LoginRequiredMixin, ListView):
     model = Task
     template_name = 'workspace/task_list.html'
     context_object_name = 'tasks'
-    # paginate_by = 20
+    paginate_by = 20
+    filter_params = ('q', 'team', 'priority', 'status', 'deadline', 'assignee', 'reporter', 'sort')
 
     def dispatch(self, request, *args, **kwargs):
         self.workspace = get_object_or_404(
             Workspace, 
             url_hash=kwargs['workspace_url_hash']
         )
-        if not self.workspace.has_access(request.user):
+        self.access = AccessContext.for_request(request, self.workspace)
+        if not self.access.is_member:
             from django.http import Http404
             raise Http404("У вас нет доступа к этой рабочей области")
         
+        # Курсор следующей/предыдущей страницы несет состояние фильтров
+        self.cursor = decode_cursor(request.GET.get('cursor'))
+        if self.cursor is not None:
+            params = self.cursor[0]
+        else:
+            params = request.GET
+        self.filters = {name: params.get(name) or None for name in self.filter_params}
+        if self.filters['sort'] not in self.get_sort_choices():
+            # Результаты поиска по умолчанию упорядочены по релевантности
+            self.filters['sort'] = None if self.filters['q'] else '-created_at'
+        
         return super().dispatch(request, *args, **kwargs)
 
+    def get_sort_choices(self):
+        return SORT_FIELDS + tuple(f'-{field}' for field in SORT_FIELDS)
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Курсорная пагинация по колонке сортировки и id.
+        Пагинация через ?page=N остается для небольших выборок
+        и используется для результатов поиска, упорядоченных по релевантности.
+        """
+        if 'page' in self.request.GET or not self.filters['sort']:
+            return super().paginate_queryset(queryset, page_size)
+        
+        page = paginate_by_cursor(
+            queryset,
+            self.filters['sort'],
+            page_size,
+            state=self.filters,
+            cursor=self.cursor
+        )
+        return (None, page, page.object_list, page.has_other_pages())
+
     def get_queryset(self):
+        # Queryset собирается один раз за запрос
+        if getattr(self, '_queryset', None) is None:
+            self._queryset = self.build_queryset()
+        return self._queryset
+
+    def build_queryset(self):
         # Начинаем с фильтрации по workspace
         queryset = Task.objects.filter(workspace=self.workspace)
         
         # Фильтрация по команде через GET параметр
-        team_filter = self.request.GET.get('team')
+        team_filter = self.filters['team']
         if team_filter:
             queryset = queryset.filter(team__url_hash=team_filter)
         
         # Фильтрация по приоритету через GET параметр
-        priority_filter = self.request.GET.get('priority')
+        priority_filter = self.filters['priority']
         if priority_filter:
             queryset = queryset.filter(priority=priority_filter)
         
         # Фильтрация по статусу через GET параметр
-        status_filter = self.request.GET.get('status')
+        status_filter = self.filters['status']
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         
         # Фильтрация по дедлайну через GET параметр
-        deadline_filter = self.request.GET.get('deadline')
-        if deadline_filter:
-            if deadline_filter == 'expired':
-                queryset = queryset.filter(deadline__lt=timezone.now())
-            elif deadline_filter == 'today':
-                today = timezone.now().date()
-                queryset = queryset.filter(
-                    deadline__date=today
-                )
-            elif deadline_filter == 'week':
-                week_end = timezone.now() + timezone.timedelta(days=7)
-                queryset = queryset.filter(
-                    deadline__range=[timezone.now(), week_end]
-                )
-            elif deadline_filter == 'future':
-                queryset = queryset.filter(deadline__gt=timezone.now())
+        deadline_filter = deadline_q(self.filters['deadline'])
+        if deadline_filter is not None:
+            queryset = queryset.filter(deadline_filter)
         
         # Фильтрация по назначенному исполнителю
-        assignee_filter = self.request.GET.get('assignee')
+        assignee_filter = self.filters['assignee']
         if assignee_filter:
             if assignee_filter == 'me':
                 queryset = queryset.filter(assignee=self.request.user)
@@ -771,7 +799,7 @@ class TaskListView(LoginRequiredMixin, ListView):
                     pass
         
         # Фильтрация по автору задачи
-        reporter_filter = self.request.GET.get('reporter')
+        reporter_filter = self.filters['reporter']
         if reporter_filter:
             if reporter_filter == 'me':
                 queryset = queryset.filter(reporter=self.request.user)
@@ -785,82 +813,39 @@ class TaskListView(LoginRequiredMixin, ListView):
                     pass
         
         # Сортировка через GET параметр
-        sort_by = self.request.GET.get('sort', '-created_at')
-        if sort_by in ['created_at', '-created_at', 'deadline', '-deadline', 'title', '-title', 'priority', '-priority']:
-            queryset = queryset.order_by(sort_by)
+        if self.filters['sort']:
+            queryset = queryset.order_by(*ordering_for(self.filters['sort']))
         
-        # Права доступа через WorkspaceRoleAccess
-        role_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
+        # Полнотекстовый поиск по названию и описанию
+        if self.filters['q']:
+            queryset = search_tasks(queryset, self.filters['q'])
+            if not self.filters['sort']:
+                queryset = queryset.order_by('-search_rank', '-id')
         
-        # Если пользователь имеет право просматривать все задачи
-        if role_access.has_permission(self.request.user, 'can_view_all_tasks'):
-            # Владелец или администратор видит все задачи
-            filtered_tasks = []
-            for task in queryset.select_related('team', 'assignee', 'reporter', 'updated_by'):
-                # Проверяем видимость для каждого пользователя
-                if task.is_visible_to_user(self.request.user):
-                    filtered_tasks.append(task.id)
-            
-            # Возвращаем отфильтрованные задачи
-            if filtered_tasks:
-                return Task.objects.filter(id__in=filtered_tasks).select_related(
-                    'team', 'assignee', 'reporter', 'updated_by'
-                ).order_by(sort_by)
-            else:
-                return Task.objects.none()
-        else:
-            # Фильтрация с учетом видимости команд и задач
-            visible_teams = []
-            all_teams = Team.objects.filter(workspace=self.workspace)
-            for team in all_teams:
-                team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-                if team_access.is_team_visible_to_user(self.request.user):
-                    visible_teams.append(team)
-            
-            # Фильтруем задачи по видимым командам или отсутствию команды
-            queryset = queryset.filter(
-                Q(team__in=visible_teams) | Q(team__isnull=True)
-            )
-            
-            # Дополнительная фильтрация по видимости задач
-            filtered_tasks = []
-            for task in queryset.select_related('team', 'assignee', 'reporter', 'updated_by'):
-                if task.is_visible_to_user(self.request.user):
-                    filtered_tasks.append(task.id)
-            
-            # Возвращаем отфильтрованные задачи
-            if filtered_tasks:
-                return Task.objects.filter(id__in=filtered_tasks).select_related(
-                    'team', 'assignee', 'reporter', 'updated_by'
-                ).order_by(sort_by)
-            else:
-                return Task.objects.none()
+        # Фильтрация с учетом видимости команд и задач одним SQL-запросом
+        queryset = filter_visible_tasks(queryset, self.request.user, self.workspace, access=self.access)
+        
+        return queryset.select_related('team', 'assignee', 'reporter', 'updated_by')
 
         
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['workspace'] = self.workspace
+        access = self.access
         
         # Получаем настройки прав доступа
-        role_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
+        role_access = access.workspace_access
 
         # Право создавать задачи в workspace
-        can_create_task_in_workspace = role_access.has_permission(self.request.user, 'can_create_tasks')
+        can_create_task_in_workspace = access.has_workspace_permission('can_create_tasks')
         context['role_access'] = role_access
 
         # Право создавать задачи в командах, где он состоит
-        user_teams = Team.objects.filter(
-            workspace=self.workspace,
-            members=self.request.user
+        can_create_in_any_team = any(
+            access.has_team_permission(team_id, 'can_create_tasks')
+            for team_id in access.team_roles
         )
         
-        can_create_in_any_team = False
-        for team in user_teams:
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-            if team_access.has_permission(self.request.user, 'can_create_tasks'):
-                can_create_in_any_team = True
-                break
-        
         if can_create_task_in_workspace or can_create_in_any_team: context['can_create_tasks'] = True
         else: context['can_create_tasks'] = False
                 
@@ -871,24 +856,14 @@ class TaskListView(LoginRequiredMixin, ListView):
         # Получаем все возможные значения для фильтров
         context['priority_choices'] = Task.PRIORITY_CHOICES
         context['status_choices'] = Task.STATUS_CHOICES
-        context['deadline_filters'] = [
-            ('expired', 'Просроченные'),
-            ('today', 'На сегодня'),
-            ('week', 'На неделю'),
-            ('future', 'Будущие'),
-        ]
+        context['deadline_filters'] = DEADLINE_FILTERS
         
         # Получаем команды с учетом видимости
-        if role_access.has_permission(self.request.user, 'can_view_all_teams'):
-            context['teams'] = Team.objects.filter(workspace=self.workspace)
+        all_teams = Team.objects.filter(workspace=self.workspace)
+        if access.has_workspace_permission('can_view_all_teams'):
+            context['teams'] = all_teams
         else:
-            visible_teams = []
-            all_teams = Team.objects.filter(workspace=self.workspace)
-            for team in all_teams:
-                team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-                if team_access.is_team_visible_to_user(self.request.user):
-                    visible_teams.append(team)
-            context['teams'] = visible_teams
+            context['teams'] = access.filter_visible_teams(all_teams)
         
         # Получаем всех участников workspace для фильтра по исполнителю/автору
         workspace_members = WorkspaceMembership.objects.filter(
@@ -897,18 +872,11 @@ class TaskListView(LoginRequiredMixin, ListView):
         context['workspace_members'] = [member.user for member in workspace_members]
         
         # Добавляем выбранные фильтры для сохранения состояния формы
-        context['selected_filters'] = {
-            'team': self.request.GET.get('team'),
-            'priority': self.request.GET.get('priority'),
-            'status': self.request.GET.get('status'),
-            'deadline': self.request.GET.get('deadline'),
-            'assignee': self.request.GET.get('assignee'),
-            'reporter': self.request.GET.get('reporter'),
-            'sort': self.request.GET.get('sort', '-created_at'),
-        }
+        context['selected_filters'] = self.filters
+        context['filter_query'] = urlencode({name: value for name, value in self.filters.items() if value})
         
         # Если выбран фильтр по команде, добавляем команду в контекст
-        selected_team_hash = self.request.GET.get('team')
+        selected_team_hash = self.filters['team']
         if selected_team_hash:
             try:
                 context['selected_team'] = Team.objects.get(
@@ -919,7 +887,7 @@ class TaskListView(LoginRequiredMixin, ListView):
                 context['selected_team'] = None
         
         # Если выбран фильтр по исполнителю, добавляем информацию в контекст
-        selected_assignee = self.request.GET.get('assignee')
+        selected_assignee = self.filters['assignee']
         if selected_assignee:
             context['selected_assignee_filter'] = selected_assignee
             if selected_assignee == 'me':
@@ -934,7 +902,7 @@ class TaskListView(LoginRequiredMixin, ListView):
                     context['selected_assignee_user'] = None
         
         # Если выбран фильтр по автору, добавляем информацию в контекст
-        selected_reporter = self.request.GET.get('reporter')
+        selected_reporter = self.filters['reporter']
         if selected_reporter:
             context['selected_reporter_filter'] = selected_reporter
             if selected_reporter == 'me':
@@ -946,23 +914,19 @@ class TaskListView(LoginRequiredMixin, ListView):
                 except (ValueError, TypeError, User.DoesNotExist):
                     context['selected_reporter_user'] = None
         
-        # Добавляем статистику по задачам
-        tasks_queryset = self.get_queryset()
-        context['tasks_count'] = tasks_queryset.count()
-        context['tasks_expired_count'] = tasks_queryset.filter(
-            deadline__lt=timezone.now(),
-            status__in=['backlog', 'todo', 'in_progress', 'review']
-        ).count()
-        
-        # Задачи, назначенные на текущего пользователя
-        context['my_assigned_tasks_count'] = tasks_queryset.filter(
-            assignee=self.request.user
-        ).count()
-        
-        # Задачи, созданные текущим пользователем
-        context['my_reported_tasks_count'] = tasks_queryset.filter(
-            reporter=self.request.user
-        ).count()
+        # Добавляем статистику по задачам одним агрегирующим запросом
+        stats = self.get_queryset().order_by().aggregate(
+            tasks_count=Count('id'),
+            tasks_expired_count=Count('id', filter=Q(
+                deadline__lt=timezone.now(),
+                status__in=OPEN_STATUSES
+            )),
+            # Задачи, назначенные на текущего пользователя
+            my_assigned_tasks_count=Count('id', filter=Q(assignee=self.request.user)),
+            # Задачи, созданные текущим пользователем
+            my_reported_tasks_count=Count('id', filter=Q(reporter=self.request.user)),
+        )
+        context.update(stats)
         
         # Добавляем форму для быстрого создания задачи (если есть права)
         # if context['can_create_tasks']:
@@ -991,6 +955,310 @@ class TaskListView(LoginRequiredMixin, ListView):
         return context
 
 
+# Первые символы ячейки, с которых табличные редакторы начинают формулу
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class EchoBuffer:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи"""
+    def write(self, value):
+        return value
+
+
+class TaskExportView(TaskListView):
+    """
+    Потоковая выгрузка задач в CSV или NDJSON.
+    Использует фильтры и видимость TaskListView и читает строки через
+    серверный курсор, поэтому память не зависит от размера выгрузки.
+    """
+    chunk_size = 2000
+    export_fields = (
+        ('url_hash', 'url_hash'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('status', 'status'),
+        ('priority', 'priority'),
+        ('team', 'team__name'),
+        ('assignee', 'assignee__username'),
+        ('reporter', 'reporter__username'),
+        ('deadline', 'deadline'),
+        ('visible', 'visible'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return JsonResponse({'success': False, 'error': 'Неподдерживаемый формат выгрузки'})
+        
+        rows = self.get_queryset().values_list(
+            *[field for _, field in self.export_fields]
+        ).iterator(chunk_size=self.chunk_size)
+        
+        if export_format == 'csv':
+            content = self.stream_csv(rows)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            content = self.stream_ndjson(rows)
+            content_type = 'application/x-ndjson; charset=utf-8'
+        
+        filename = f'tasks-{timezone.now():%Y%m%d-%H%M%S}.{export_format}'
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def stream_csv(self, rows):
+        writer = csv.writer(EchoBuffer())
+        # BOM, чтобы Excel открыл файл в UTF-8
+        yield '\ufeff' + writer.writerow([name for name, _ in self.export_fields])
+        for row in rows:
+            yield writer.writerow([self.csv_cell(value) for value in row])
+
+    def csv_cell(self, value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        # Ячейки, которые Excel/Sheets выполнят как формулу, экранируем апострофом (CSV injection)
+        if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+            return "'" + value
+        return value
+
+    def stream_ndjson(self, rows):
+        names = [name for name, _ in self.export_fields]
+        for row in rows:
+            yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class TaskImportView(LoginRequiredMixin, View):
+    """Массовый импорт задач из CSV или JSON файла"""
+    def post(self, request, *args, **kwargs):
+        if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({'success': False, 'error': 'Invalid request'})
+
+        workspace = get_object_or_404(
+            Workspace,
+            url_hash=kwargs['workspace_url_hash']
+        )
+        access = AccessContext.for_request(request, workspace)
+        if not access.is_member:
+            return JsonResponse({'success': False, 'error': 'No access to workspace'})
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return JsonResponse({'success': False, 'error': 'Файл не выбран'})
+
+        file_format = request.POST.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        try:
+            rows = parse_rows(upload.read(), file_format)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': f'Не удалось прочитать файл: {str(e)}'})
+
+        importer = TaskImporter(workspace, request.user, access=access)
+        result = importer.run(rows, skip_invalid=request.POST.get('skip_invalid') == 'true')
+
+        return JsonResponse({
+            'success': not result.errors or result.created > 0,
+            **result.as_dict()
+        })
+
+
+class TaskPermissionsView(LoginRequiredMixin, View):
+    """Матрица прав пользователя на набор задач (task_hashes[]) в JSON"""
+    def post(self, request, *args, **kwargs):
+        if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({'success': False, 'error': 'Invalid request'})
+
+        workspace = get_object_or_404(
+            Workspace,
+            url_hash=kwargs['workspace_url_hash']
+        )
+        access = AccessContext.for_request(request, workspace)
+        if not access.is_member:
+            return JsonResponse({'success': False, 'error': 'No access to workspace'})
+
+        task_hashes = request.POST.getlist('task_hashes[]')
+        if not task_hashes:
+            return JsonResponse({'success': False, 'error': 'Не выбраны задачи'})
+
+        # Недоступные пользователю задачи в ответ не попадают
+        tasks = filter_visible_tasks(
+            Task.objects.filter(workspace=workspace, url_hash__in=task_hashes),
+            request.user,
+            workspace,
+            access=access
+        ).only('id', 'url_hash', 'workspace_id', 'team_id', 'reporter_id', 'assignee_id', 'visible',
+               'can_edit_content', 'can_edit_team', 'can_edit_assignee', 'can_edit_visibility')
+        tasks = list(tasks)
+        matrix = task_permission_matrix(tasks, request.user, access=access)
+
+        return JsonResponse({
+            'success': True,
+            'permissions': {task.url_hash: matrix[task.pk] for task in tasks}
+        })
+
+
+class TaskBulkUpdateView(LoginRequiredMixin, View):
+    """
+    Одно изменение (статус, приоритет, исполнитель, команда, видимость)
+    для набора задач (task_hashes[]).
+    Права проверяются по одному снимку AccessContext, изменения
+    записываются одним UPDATE на каждую группу изменяемых полей.
+    Новый исполнитель получает одно уведомление на все назначенные задачи.
+    """
+    # Поле изменения -> флаг прав из TASK_PERMISSION_FLAGS
+    field_permissions = {
+        'status': 'can_edit_content',
+        'priority': 'can_edit_content',
+        'assignee': 'can_edit_assignee',
+        'team': 'can_edit_team',
+        'visible': 'can_edit_visibility',
+    }
+
+    def post(self, request, *args, **kwargs):
+        if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({'success': False, 'error': 'Invalid request'})
+
+        workspace = get_object_or_404(
+            Workspace,
+            url_hash=kwargs['workspace_url_hash']
+        )
+        access = AccessContext.for_request(request, workspace)
+        if not access.is_member:
+            return JsonResponse({'success': False, 'error': 'No access to workspace'})
+
+        task_hashes = request.POST.getlist('task_hashes[]')
+        if not task_hashes:
+            return JsonResponse({'success': False, 'error': 'Не выбраны задачи'})
+
+        changes, errors = self.get_changes(request, workspace)
+        if errors:
+            return JsonResponse({'success': False, 'errors': errors})
+        if not changes:
+            return JsonResponse({'success': False, 'error': 'Не получены данные для обновления'})
+
+        tasks = filter_visible_tasks(
+            Task.objects.filter(workspace=workspace, url_hash__in=task_hashes),
+            request.user,
+            workspace,
+            access=access
+        ).select_related('team')
+
+        validator = TaskValidator.for_workspaces([workspace.pk])
+        can_remove_team = access.has_workspace_permission('can_create_tasks')
+        results = {url_hash: {'success': False, 'error': 'Задача не найдена'} for url_hash in task_hashes}
+        groups = {}
+
+        for task in tasks:
+            permissions = access.task_permissions(task)
+            if not permissions['can_edit']:
+                results[task.url_hash] = {
+                    'success': False,
+                    'error': 'У вас нет прав для редактирования этой задачи'
+                }
+                continue
+
+            updated, skipped = {}, []
+            for field, value in changes.items():
+                if not permissions[self.field_permissions[field]]:
+                    skipped.append(field)
+                    continue
+                if field == 'team' and value is None and task.team_id is not None and not can_remove_team:
+                    skipped.append(field)
+                    continue
+                current = getattr(task, f'{field}_id' if field in ('assignee', 'team') else field)
+                new = value.pk if field in ('assignee', 'team') and value is not None else value
+                if current != new:
+                    updated[field] = value
+
+            # Проверки Task.clean для итогового состояния задачи
+            for field, value in updated.items():
+                setattr(task, field, value)
+            task_errors = validator.get_errors(task)
+            if task_errors:
+                results[task.url_hash] = {'success': False, 'errors': list(task_errors.values())}
+                continue
+
+            results[task.url_hash] = {
+                'success': True,
+                'updated_fields': sorted(updated),
+                'skipped_fields': skipped,
+            }
+            if updated:
+                groups.setdefault(tuple(sorted(updated)), []).append(task.pk)
+
+        # Один UPDATE на группу задач с одинаковым набором изменяемых полей
+        now = timezone.now()
+        with transaction.atomic():
+            for fields, task_ids in groups.items():
+                Task.objects.filter(id__in=task_ids).update(
+                    updated_by=request.user,
+                    updated_at=now,
+                    **{field: changes[field] for field in fields}
+                )
+
+            # Новый исполнитель получает одно уведомление на весь набор задач
+            assigned_count = sum(len(task_ids) for fields, task_ids in groups.items() if 'assignee' in fields)
+            assignee = changes.get('assignee')
+            if assigned_count and assignee is not None and assignee != request.user:
+                self.create_assignee_notification(assignee, assigned_count, workspace, request)
+
+        return JsonResponse({
+            'success': True,
+            'updated_count': sum(len(task_ids) for task_ids in groups.values()),
+            'results': results
+        })
+
+    def create_assignee_notification(self, assignee, count, workspace, request):
+        """Уведомляет исполнителя о назначенных ему задачах"""
+        tasks_url = request.build_absolute_uri(
+            reverse('workspace:task_list', kwargs={'workspace_url_hash': workspace.url_hash})
+        ) + '?assignee=me'
+        message = f'Пользователь {request.user.username} назначил вам задач: {count} в рабочей области "{workspace.name}"'
+        notify_many([assignee], message, level='info', related_url=tasks_url, kind='task_assigned', target=f'workspace:{workspace.pk}')
+
+    def get_changes(self, request, workspace):
+        """Разбирает набор изменений из POST; возвращает (changes, errors)"""
+        changes = {}
+        errors = []
+
+        if request.POST.get('status'):
+            if request.POST['status'] in dict(Task.STATUS_CHOICES):
+                changes['status'] = request.POST['status']
+            else:
+                errors.append('Некорректный статус')
+
+        if request.POST.get('priority'):
+            if request.POST['priority'] in dict(Task.PRIORITY_CHOICES):
+                changes['priority'] = request.POST['priority']
+            else:
+                errors.append('Некорректный приоритет')
+
+        if 'assignee' in request.POST:
+            assignee_id = request.POST['assignee'].strip()
+            if assignee_id:
+                try:
+                    changes['assignee'] = User.objects.get(id=int(assignee_id))
+                except (ValueError, User.DoesNotExist):
+                    errors.append('Выбранный исполнитель не найден')
+            else:
+                changes['assignee'] = None
+
+        if 'team' in request.POST:
+            team_id = request.POST['team'].strip()
+            if team_id:
+                try:
+                    changes['team'] = Team.objects.get(id=int(team_id), workspace=workspace)
+                except (ValueError, Team.DoesNotExist):
+                    errors.append('Выбранная команда не найдена')
+            else:
+                changes['team'] = None
+
+        if 'visible' in request.POST:
+            changes['visible'] = (request.POST['visible'] == 'on')
+
+        return changes, errors
+
+
 class TaskCreateView(LoginRequiredMixin, CreateView):
     model = Task
     form_class = TaskCreateForm
@@ -1003,24 +1271,17 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         )
         
         # Проверяем, имеет ли пользователь право создавать задачи где-либо
-        workspace_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
+        self.access = AccessContext.for_request(request, self.workspace)
         
         # Проверяем право на создание задач в workspace
-        can_create_in_workspace = workspace_access.has_permission(request.user, 'can_create_tasks')
+        can_create_in_workspace = self.access.has_workspace_permission('can_create_tasks')
         
         # Проверяем, есть ли у пользователя право создавать задачи в командах, где он состоит
-        user_teams = Team.objects.filter(
-            workspace=self.workspace,
-            members=request.user
+        can_create_in_any_team = any(
+            self.access.has_team_permission(team_id, 'can_create_tasks')
+            for team_id in self.access.team_roles
         )
         
-        can_create_in_any_team = False
-        for team in user_teams:
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-            if team_access.has_permission(request.user, 'can_create_tasks'):
-                can_create_in_any_team = True
-                break
-        
         # Если у пользователя нет прав нигде - показываем 404
         if not can_create_in_workspace and not can_create_in_any_team:
             from django.http import Http404
@@ -1034,8 +1295,7 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         kwargs['user'] = self.request.user
         
         # Получаем права пользователя
-        workspace_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
-        can_create_in_workspace = workspace_access.has_permission(self.request.user, 'can_create_tasks')
+        can_create_in_workspace = self.access.has_workspace_permission('can_create_tasks')
         
         # Получаем команду из GET параметра если есть
         team_from_get = self.request.GET.get('team')
@@ -1053,28 +1313,24 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         # Добавляем информацию о правах пользователя
         kwargs['can_create_in_workspace'] = can_create_in_workspace
         kwargs['user_teams_with_task_create_rights'] = self.get_user_teams_with_task_create_rights()
+        kwargs['access'] = self.access
         
         return kwargs
 
     def get_user_teams_with_task_create_rights(self):
         """Возвращает список команд, где пользователь может создавать задачи"""
-        user_teams = Team.objects.filter(
-            workspace=self.workspace,
-            members=self.request.user
-        )
-        
-        teams_with_rights = []
-        for team in user_teams:
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-            if team_access.has_permission(self.request.user, 'can_create_tasks'):
-                teams_with_rights.append(team)
+        if not hasattr(self, '_teams_with_task_create_rights'):
+            user_teams = Team.objects.filter(
+                workspace=self.workspace,
+                id__in=list(self.access.team_roles)
+            )
+            self._teams_with_task_create_rights = self.access.teams_with_permission(user_teams, 'can_create_tasks')
         
-        return teams_with_rights
+        return self._teams_with_task_create_rights
 
     def get_form_class(self):
         """Возвращаем форму с учетом прав пользователя"""
-        workspace_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
-        can_create_in_workspace = workspace_access.has_permission(self.request.user, 'can_create_tasks')
+        can_create_in_workspace = self.access.has_workspace_permission('can_create_tasks')
         user_teams_with_rights = self.get_user_teams_with_task_create_rights()
         
         # Создаем динамическую форму на основе прав пользователя
@@ -1129,11 +1385,10 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         context['workspace'] = self.workspace
         
         # Получаем настройки прав доступа
-        role_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
-        context['role_access'] = role_access
+        context['role_access'] = self.access.workspace_access
         
         # Добавляем информацию о правах пользователя
-        context['can_create_in_workspace'] = role_access.has_permission(self.request.user, 'can_create_tasks')
+        context['can_create_in_workspace'] = self.access.has_workspace_permission('can_create_tasks')
         context['user_teams_with_task_create_rights'] = self.get_user_teams_with_task_create_rights()
         
         # Добавляем team_from_get в контекст для шаблона
@@ -1145,9 +1400,8 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
                     workspace=self.workspace
                 )
                 # Проверяем, имеет ли пользователь право создавать задачи в этой команде
-                team_access, _ = TeamRoleAccess.objects.get_or_create(team=context['team'])
-                context['can_create_in_selected_team'] = team_access.has_permission(
-                    self.request.user, 'can_create_tasks'
+                context['can_create_in_selected_team'] = self.access.has_team_permission(
+                    context['team'], 'can_create_tasks'
                 )
             except Team.DoesNotExist:
                 context['team'] = None
@@ -1171,60 +1425,67 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             Workspace, 
             url_hash=kwargs['workspace_url_hash']
         )
-        if not self.workspace.has_access(request.user):
+        self.access = AccessContext.for_request(request, self.workspace)
+        if not self.access.is_member:
             from django.http import Http404
             raise Http404("У вас нет доступа к этой рабочей области")
         return super().dispatch(request, *args, **kwargs)
 
     def get_object(self, queryset=None):
         """Получаем объект задачи с проверкой видимости"""
+        if getattr(self, 'object', None) is not None:
+            return self.object
+        
         task = super().get_object(queryset)
         
         # Проверяем, видна ли задача пользователю
-        if not task.is_visible_to_user(self.request.user):
+        if not task.is_visible_to_user(self.request.user, access=self.access):
             from django.http import Http404
             raise Http404("У вас нет доступа к этой задаче")
         
+        self.object = task
         return task
 
     def get_queryset(self):
-        return Task.objects.filter(workspace=self.workspace)
+        return Task.objects.filter(workspace=self.workspace).select_related(
+            'team', 'assignee', 'reporter', 'updated_by'
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         task = self.get_object()
+        access = self.access
+        user = self.request.user
         context['workspace'] = self.workspace
         context['now'] = timezone.now()
         
         # Получаем настройки прав доступа workspace
-        workspace_access, created = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
+        workspace_access = access.workspace_access
         context['workspace_access'] = workspace_access
         
         # Определяем, является ли пользователь редактором задачи
-        context['is_editor'] = task.can_user_edit(self.request.user)
-        context['is_special_editor'] = task.is_special_editor(self.request.user)
+        context['is_editor'] = task.can_user_edit(user, access=access)
+        context['is_special_editor'] = task.is_special_editor(user, access=access)
         
         # Проверяем права редактирования для конкретных полей
         if task.team:
             # Задача привязана к команде
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=task.team)
+            team_access = access.get_team_access(task.team)
             context['team_access'] = team_access
             
             # Получаем информацию о лидере команды
-            try:
-                team_leader = TeamMembership.objects.get(team=task.team, role='leader')
-                context['team_leader'] = team_leader.user
-                context['is_team_leader'] = (team_leader.user == self.request.user)
-            except TeamMembership.DoesNotExist:
-                context['team_leader'] = None
-                context['is_team_leader'] = False
+            team_leader = TeamMembership.objects.filter(
+                team=task.team,
+                role='leader'
+            ).select_related('user').first()
+            context['team_leader'] = team_leader.user if team_leader else None
+            context['is_team_leader'] = access.is_team_leader(task.team)
             
             # Определяем, является ли пользователь обычным редактором команды
-            try:
-                team_membership = TeamMembership.objects.get(team=task.team, user=self.request.user)
-                context['is_team_editor'] = team_access.has_permission(self.request.user, 'can_edit_tasks')
-            except TeamMembership.DoesNotExist:
-                context['is_team_editor'] = False
+            context['is_team_editor'] = (
+                access.is_team_member(task.team)
+                and access.has_team_permission(task.team, 'can_edit_tasks')
+            )
         else:
             context['team_access'] = None
             context['team_leader'] = None
@@ -1232,48 +1493,33 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             context['is_team_editor'] = False
         
         # Получаем информацию о владельце workspace
-        try:
-            workspace_owner_membership = WorkspaceMembership.objects.get(
-                workspace=self.workspace,
-                role='owner'
-            )
-            context['workspace_owner'] = workspace_owner_membership.user
-            context['is_workspace_owner'] = (workspace_owner_membership.user == self.request.user)
-        except WorkspaceMembership.DoesNotExist:
-            context['workspace_owner'] = None
-            context['is_workspace_owner'] = False
+        workspace_owner_membership = WorkspaceMembership.objects.filter(
+            workspace=self.workspace,
+            role='owner'
+        ).select_related('user').first()
+        context['workspace_owner'] = workspace_owner_membership.user if workspace_owner_membership else None
+        context['is_workspace_owner'] = access.is_owner
         
         # Для workspace задач определяем, является ли пользователь редактором workspace
         if not task.team:
-            try:
-                workspace_membership = WorkspaceMembership.objects.get(
-                    workspace=self.workspace,
-                    user=self.request.user
-                )
-                context['is_workspace_editor'] = workspace_access.has_permission(self.request.user, 'can_edit_tasks')
-            except WorkspaceMembership.DoesNotExist:
-                context['is_workspace_editor'] = False
+            context['is_workspace_editor'] = access.is_member and access.has_workspace_permission('can_edit_tasks')
         else:
             context['is_workspace_editor'] = False
         
         # Права на редактирование конкретных аспектов задачи
-        context['can_edit_content'] = task.can_user_edit_content(self.request.user)
-        context['can_edit_team'] = task.can_user_edit_team(self.request.user)
-        context['can_edit_assignee'] = task.can_user_edit_assignee(self.request.user)
-        context['can_edit_visibility'] = task.can_user_edit_visibility(self.request.user)
+        context['can_edit_content'] = task.can_user_edit_content(user, access=access)
+        context['can_edit_team'] = task.can_user_edit_team(user, access=access)
+        context['can_edit_assignee'] = task.can_user_edit_assignee(user, access=access)
+        context['can_edit_visibility'] = task.can_user_edit_visibility(user, access=access)
         
         # Права на изменение прав доступа к задаче
-        context['can_change_permissions'] = task.can_user_change_permissions(self.request.user)
+        context['can_change_permissions'] = task.can_user_change_permissions(user, access=access)
         
         # Права на удаление задачи
-        if task.team:
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=task.team)
-            context['can_delete_task'] = team_access.has_permission(self.request.user, 'can_delete_tasks')
-        else:
-            context['can_delete_task'] = workspace_access.has_permission(self.request.user, 'can_delete_tasks')
+        context['can_delete_task'] = access.can_delete_task(task)
         
         # Общие права для шаблона
-        context['can_create_tasks'] = workspace_access.has_permission(self.request.user, 'can_create_tasks')
+        context['can_create_tasks'] = access.has_workspace_permission('can_create_tasks')
         
         # Получаем список всех редакторов задачи
         context['editors'] = task.get_editors()
@@ -1290,13 +1536,11 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
         # Добавляем команды, где пользователь может создавать задачи
         user_teams = Team.objects.filter(
             workspace=self.workspace,
-            members=self.request.user
+            id__in=list(access.team_roles)
         )
-        for team in user_teams:
-            team_access, _ = TeamRoleAccess.objects.get_or_create(team=team)
-            if team_access.has_permission(self.request.user, 'can_create_tasks'):
-                if team not in available_teams:
-                    available_teams.append(team)
+        for team in access.teams_with_permission(user_teams, 'can_create_tasks'):
+            if team not in available_teams:
+                available_teams.append(team)
         
         context['available_teams'] = available_teams
         
@@ -1319,8 +1563,8 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             context['is_overdue'] = False
         
         # Добавляем информацию о правах для отображения в интерфейсе
-        context['user_is_reporter'] = (self.request.user == task.reporter)
-        context['user_is_assignee'] = (task.assignee and self.request.user == task.assignee)
+        context['user_is_reporter'] = (user == task.reporter)
+        context['user_is_assignee'] = (task.assignee and user == task.assignee)
         
         # Добавляем текущие права задачи для отображения
         context['task_permissions'] = {
@@ -1356,7 +1600,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
         """Обработка обновления параметров задачи"""
         try:
             # Проверяем, является ли пользователь редактором
-            if not task.can_user_edit(request.user):
+            if not task.can_user_edit(request.user, access=self.access):
                 return JsonResponse({
                     'success': False, 
                     'error': 'У вас нет прав для редактирования этой задачи'
@@ -1374,7 +1618,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             content_fields = ['title', 'description', 'status', 'priority']
             for field in content_fields:
                 if field in request.POST:
-                    if not task.can_user_edit_content(request.user):
+                    if not task.can_user_edit_content(request.user, access=self.access):
                         # Пропускаем поле, если нет прав
                         continue
                     
@@ -1393,7 +1637,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             
             # Особенная обработка дедлайна с UTC (упрощенная версия)
             if 'deadline' in request.POST:
-                if not task.can_user_edit_content(request.user):
+                if not task.can_user_edit_content(request.user, access=self.access):
                     # Пропускаем, если нет прав
                     pass
                 else:
@@ -1436,7 +1680,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             
             # Команда
             if 'team' in request.POST:
-                if not task.can_user_edit_team(request.user):
+                if not task.can_user_edit_team(request.user, access=self.access):
                     # Пропускаем, если нет прав
                     pass
                 else:
@@ -1457,11 +1701,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
                         else:
                             # Проверяем, может ли пользователь убрать команду
                             if task.team is not None:
-                                workspace_access, _ = WorkspaceRoleAccess.objects.get_or_create(
-                                    workspace=self.workspace
-                                )
-                                can_create_task_in_workspace = workspace_access.has_permission(
-                                    self.request.user, 
+                                can_create_task_in_workspace = self.access.has_workspace_permission(
                                     'can_create_tasks'
                                 )
                                 
@@ -1476,7 +1716,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             
             # Исполнитель
             if 'assignee' in request.POST:
-                if not task.can_user_edit_assignee(request.user):
+                if not task.can_user_edit_assignee(request.user, access=self.access):
                     # Пропускаем, если нет прав
                     pass
                 else:
@@ -1497,7 +1737,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
             
             # Видимость
             if 'visible' in request.POST:
-                if not task.can_user_edit_visibility(request.user):
+                if not task.can_user_edit_visibility(request.user, access=self.access):
                     # Пропускаем, если нет прав
                     pass
                 else:
@@ -1529,9 +1769,9 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
                 # Устанавливаем, кто обновил задачу
                 task.updated_by = request.user
                 
-                # Выполняем полную валидацию перед сохранением
+                # Выполняем полную валидацию перед сохранением (повторно save ее не выполняет)
                 task.full_clean()
-                task.save()
+                task.save(validate=False)
 
                 # Добавляем информацию о просроченности задачи
                 if task.deadline and task.deadline < timezone.now() and task.status != 'done':
@@ -1598,7 +1838,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     def handle_permissions_update(self, request, task):
         """Обработка обновления прав доступа к задаче"""
         try:
-            if not task.can_user_change_permissions(request.user):
+            if not task.can_user_change_permissions(request.user, access=self.access):
                 return JsonResponse({
                     'success': False,
                     'error': 'У вас нет прав для изменения прав доступа к этой задаче'
@@ -1649,14 +1889,7 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
         """Обработка удаления задачи"""
         try:
             # Проверяем права на удаление
-            if task.team:
-                team_access, _ = TeamRoleAccess.objects.get_or_create(team=task.team)
-                can_delete = team_access.has_permission(request.user, 'can_delete_tasks')
-            else:
-                workspace_access, _ = WorkspaceRoleAccess.objects.get_or_create(workspace=self.workspace)
-                can_delete = workspace_access.has_permission(request.user, 'can_delete_tasks')
-            
-            if not can_delete:
+            if not self.access.can_delete_task(task):
                 return JsonResponse({   
                     'success': False,
                     'error': 'У вас нет прав для удаления этой задачи'
@@ -1725,7 +1958,12 @@ class CreateMassInvitationView(LoginRequiredMixin, View):
             workspace.mass_invitation_current_uses = 0  # Сбрасываем счетчик использований
             workspace.mass_invitation_is_active = True
             workspace.mass_invitation_created_at = timezone.now()
-            workspace.save()
+            # Счетчик сбрасывается вместе с новым токеном, остальные поля не перезаписываются
+            workspace.save(update_fields=[
+                'mass_invitation_token', 'mass_invitation_expiration', 'mass_invitation_max_uses',
+                'mass_invitation_current_uses', 'mass_invitation_is_active', 'mass_invitation_created_at',
+                'mass_invitation_expires_at',
+            ])
             
             # Генерируем полную ссылку для приглашения
             invitation_url = workspace.get_mass_invitation_url(request)
@@ -1763,63 +2001,85 @@ class CreateIndividualInvitationsView(LoginRequiredMixin, View):
         if not identifiers:
             return JsonResponse({'success': False, 'error': 'No identifiers provided'})
         
-        # Разделяем идентификаторы по пробелам
-        identifier_list = [id.strip() for id in identifiers.split() if id.strip()]
+        # Разделяем идентификаторы по пробелам (повторы убираем, порядок сохраняем)
+        identifier_list = list(dict.fromkeys(id.strip() for id in identifiers.split() if id.strip()))
+        
+        users_by_identifier = self.resolve_identifiers(identifier_list)
+        resolved_ids = [user.pk for user in users_by_identifier.values()]
+        
+        # Просроченные, но еще не помеченные приглашения не мешают пригласить заново
+        expired_individual_invitations().filter(
+            workspace=workspace, invited_user_id__in=resolved_ids
+        ).update(status='expired')
         
-        created_invitations = []
+        # Участники и уже приглашенные - по одному запросу на всех
+        member_ids = set(
+            WorkspaceMembership.objects.filter(workspace=workspace, user_id__in=resolved_ids)
+            .values_list('user_id', flat=True)
+        )
+        invited_ids = set(
+            IndividualInvitation.objects.filter(workspace=workspace, invited_user_id__in=resolved_ids, status='pending')
+            .values_list('invited_user_id', flat=True)
+        )
+        
+        invitations = []
         errors = []
         
         for identifier in identifier_list:
-            # Определяем тип идентификатора (email или код) и находим пользователя
-            invited_user = None
-            
-            if '@' in identifier:
-                # Это email - ищем пользователя по email
-                try:
-                    invited_user = User.objects.get(email=identifier)
-                except User.DoesNotExist:
+            invited_user = users_by_identifier.get(identifier)
+            if invited_user is None:
+                if '@' in identifier:
                     errors.append(f"Пользователь с email {identifier} не найден")
-                    continue
-            else:
-                # Это уникальный код - ищем пользователя по коду профиля
-                try:
-                    profile = UserProfile.objects.get(unique_code=identifier)
-                    invited_user = profile.user
-                except UserProfile.DoesNotExist:
+                else:
                     errors.append(f"Пользователь с кодом {identifier} не найден")
-                    continue
+                continue
             
             # Проверяем, не является ли пользователь уже участником workspace
-            if WorkspaceMembership.objects.filter(workspace=workspace, user=invited_user).exists():
+            if invited_user.pk in member_ids:
                 errors.append(f"Пользователь {invited_user.email} уже является участником рабочей области")
                 continue
             
-            # Проверяем, не приглашен ли уже этот пользователь
-            existing_invitation = IndividualInvitation.objects.filter(
-                workspace=workspace,
-                invited_user=invited_user,
-                status='pending'
-            ).exists()
-            
-            if existing_invitation:
+            # Проверяем, не приглашен ли уже этот пользователь (в том числе другим идентификатором из списка)
+            if invited_user.pk in invited_ids:
                 errors.append(f"Пользователь {invited_user.email} уже приглашен")
                 continue
             
-            # Создаем приглашение
             invitation = IndividualInvitation(
                 workspace=workspace,
                 created_by=request.user,
                 invited_user=invited_user
             )
+            invitation.invitation_token = invitation.generate_token()
+            invitations.append(invitation)
+            invited_ids.add(invited_user.pk)
+        
+        # Создаем приглашения и письма о них в одной транзакции
+        with transaction.atomic():
+            # Приглашение, созданное параллельным запросом, пропускается ограничением
+            # unique_pending_invitation_per_user; созданные строки находим по токенам
+            IndividualInvitation.objects.bulk_create(invitations, ignore_conflicts=True)
+            inserted_tokens = set(
+                IndividualInvitation.objects.filter(
+                    invitation_token__in=[invitation.invitation_token for invitation in invitations]
+                ).values_list('invitation_token', flat=True)
+            ) if invitations else set()
+            
+            created_invitations = []
+            for invitation in invitations:
+                if invitation.invitation_token in inserted_tokens:
+                    created_invitations.append(invitation)
+                else:
+                    errors.append(f"Пользователь {invitation.invited_user.email} уже приглашен")
             
-            invitation.save()
-            created_invitations.append(invitation)
-            
-            # Отправляем уведомление по email
-            self.send_invitation_notification(invitation, request)
-            
-            # Создаем уведомление в системе для приглашенного пользователя
-            self.create_system_notification(invitation, request)
+            # Ставим email уведомления в очередь (отправляет run_email_worker)
+            if created_invitations:
+                queue_emails(
+                    [self.invitation_email(invitation, request) for invitation in created_invitations],
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                )
+        
+        # Создаем уведомления в системе для приглашенных пользователей
+        self.create_system_notifications(created_invitations, request)
         
         # Создаем уведомление для создателя приглашений
         if created_invitations:
@@ -1831,8 +2091,26 @@ class CreateIndividualInvitationsView(LoginRequiredMixin, View):
             'errors': errors
         })
     
-    def send_invitation_notification(self, invitation, request):
-        """Отправляет email уведомление о приглашении"""
+    def resolve_identifiers(self, identifier_list):
+        """
+        Находит пользователей по email и уникальным кодам двумя запросами IN.
+        Возвращает {идентификатор: пользователь} для найденных.
+        """
+        emails = [identifier for identifier in identifier_list if '@' in identifier]
+        codes = [identifier for identifier in identifier_list if '@' not in identifier]
+        
+        users_by_identifier = {}
+        if emails:
+            # При нескольких пользователях с одним email берется первый зарегистрированный
+            for user in User.objects.filter(email__in=emails).order_by('-pk'):
+                users_by_identifier[user.email] = user
+        if codes:
+            for profile in UserProfile.objects.filter(unique_code__in=codes).select_related('user'):
+                users_by_identifier[profile.unique_code] = profile.user
+        return users_by_identifier
+    
+    def invitation_email(self, invitation, request):
+        """Тема, текст и получатели email уведомления о приглашении"""
         invitation_url = request.build_absolute_uri(
             reverse('workspace:accept_invitation', kwargs={'token': invitation.invitation_token})
         )
@@ -1845,28 +2123,24 @@ class CreateIndividualInvitationsView(LoginRequiredMixin, View):
         {invitation_url}
         '''
         
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [invitation.invited_user.email],
-            fail_silently=True,
-        )
+        return subject, message, [invitation.invited_user.email]
     
-    def create_system_notification(self, invitation, request):
-        """Создает системное уведомление для приглашенного пользователя"""
-        invitation_url = request.build_absolute_uri(
-            reverse('workspace:accept_invitation', kwargs={'token': invitation.invitation_token})
-        )
-        
-        message = f'Вас пригласили присоединиться к рабочей области "{invitation.workspace.name}"'
-        
-        Notification.objects.create(
-            user=invitation.invited_user,
-            message=message,
-            level='info',
-            related_url=invitation_url
-        )
+    def create_system_notifications(self, invitations, request):
+        """Создает системные уведомления для приглашенных пользователей"""
+        notifications = [
+            Notification(
+                user_id=invitation.invited_user_id,
+                message=f'Вас пригласили присоединиться к рабочей области "{invitation.workspace.name}"',
+                level='info',
+                related_url=request.build_absolute_uri(
+                    reverse('workspace:accept_invitation', kwargs={'token': invitation.invitation_token})
+                ),
+                kind='invitation',
+                target=f'workspace:{invitation.workspace_id}'
+            )
+            for invitation in invitations
+        ]
+        send_notifications(notifications, count=len(notifications))
     
     def create_creator_notification(self, creator, created_invitations, workspace):
         """Создает уведомление для пользователя, который отправил приглашения"""
@@ -1876,11 +2150,7 @@ class CreateIndividualInvitationsView(LoginRequiredMixin, View):
         else:
             message = f'Вы отправили {len(created_invitations)} приглашений в рабочую область "{workspace.name}"'
         
-        Notification.objects.create(
-            user=creator,
-            message=message,
-            level='info'
-        )
+        notify_many([creator], message, level='info', kind='invitation_summary', target=f'workspace:{workspace.pk}')
 
 
 class ToggleAllInvitationsView(LoginRequiredMixin, View):
@@ -1907,7 +2177,8 @@ class ToggleAllInvitationsView(LoginRequiredMixin, View):
         elif action == 'enable':
             workspace.mass_invitation_is_active = True
         
-        workspace.save()
+        # Без счетчика использований: его меняет условный UPDATE при вступлении
+        workspace.save(update_fields=['mass_invitation_is_active'])
         
         return JsonResponse({'success': True})
 
@@ -1933,22 +2204,14 @@ class AcceptInvitationView(LoginRequiredMixin, View):
         return redirect('workspace:workspace_index')
     
     def get_individual_invitation(self, token):
-        """Находит индивидуальное приглашение по токену"""
-        try:
-            return IndividualInvitation.objects.get(
-                invitation_token=token,
-                status='pending'
-            )
-        except IndividualInvitation.DoesNotExist:
-            return None
+        """Находит действующее индивидуальное приглашение по токену (один запрос по уникальному индексу)"""
+        return pending_individual_invitations().select_related('workspace', 'invited_user').filter(
+            invitation_token=token
+        ).first()
     
     def get_mass_invitation(self, token):
-        """Находит workspace по массовому токену"""
-        try:
-            workspace = Workspace.objects.get(mass_invitation_token=token)
-            return workspace if workspace.can_mass_invitation_be_used() else None
-        except Workspace.DoesNotExist:
-            return None
+        """Находит workspace с действующим массовым приглашением по токену"""
+        return usable_mass_invitations().filter(mass_invitation_token=token).first()
     
     def handle_individual_invitation(self, request, invitation):
         """Обрабатывает индивидуальное приглашение"""
@@ -1985,15 +2248,24 @@ class AcceptInvitationView(LoginRequiredMixin, View):
             messages.info(request, f'Вы уже являетесь участником рабочей области {workspace.name}')
             return redirect('workspace:workspace_detail', workspace_url_hash=workspace.url_hash)
         
-        # Добавляем пользователя в workspace через WorkspaceMembership
-        WorkspaceMembership.objects.create(
-            workspace=workspace,
-            user=request.user,
-            role='member'  # По умолчанию добавляем как участника
-        )
-        
-        workspace.mass_invitation_current_uses += 1
-        workspace.save()
+        try:
+            with transaction.atomic():
+                # Добавляем пользователя в workspace через WorkspaceMembership
+                WorkspaceMembership.objects.create(
+                    workspace=workspace,
+                    user=request.user,
+                    role='member'  # По умолчанию добавляем как участника
+                )
+                
+                # Занимаем использование приглашения и откатываем вступление, если мест нет
+                if not self.claim_mass_invitation_use(workspace):
+                    transaction.set_rollback(True)
+                    messages.error(request, 'Приглашение недействительно или истекло')
+                    return redirect('workspace:workspace_index')
+        except IntegrityError:
+            # Параллельный запрос того же пользователя уже добавил его
+            messages.info(request, f'Вы уже являетесь участником рабочей области {workspace.name}')
+            return redirect('workspace:workspace_detail', workspace_url_hash=workspace.url_hash)
         
         # Создаем уведомление о присоединении через массовое приглашение
         self.create_mass_invitation_notification(request.user, workspace)
@@ -2001,6 +2273,17 @@ class AcceptInvitationView(LoginRequiredMixin, View):
         messages.success(request, f'Вы успешно присоединились к рабочей области {workspace.name}')
         return redirect('workspace:workspace_detail', workspace_url_hash=workspace.url_hash)
     
+    def claim_mass_invitation_use(self, workspace):
+        """
+        Увеличивает счетчик использований одним условным UPDATE.
+        Условие проверяется в базе под блокировкой строки, поэтому параллельные
+        вступления не теряют приращения и не превышают mass_invitation_max_uses.
+        """
+        return usable_mass_invitations().filter(
+            pk=workspace.pk,
+            mass_invitation_token=workspace.mass_invitation_token,
+        ).update(mass_invitation_current_uses=F('mass_invitation_current_uses') + 1) == 1
+    
     def user_matches_invitation(self, user, invitation):
         """Проверяет, соответствует ли пользователь приглашению"""
         # Простая проверка - пользователь должен совпадать с приглашенным
@@ -2058,48 +2341,73 @@ class TeamInviteMemberView(LoginRequiredMixin, View):
         if not user_ids:
             return JsonResponse({'success': False, 'error': 'No users selected'})
         
-        added_users = []
         errors = []
-        
+        requested_ids = []
         for user_id in user_ids:
             try:
-                user_to_add = User.objects.get(id=user_id)
-                
-                # Проверяем, что пользователь является участником workspace
-                if not WorkspaceMembership.objects.filter(
-                    workspace=team.workspace, 
-                    user=user_to_add
-                ).exists():
-                    errors.append(f"Пользователь {user_to_add.username} не является участником рабочей области")
-                    continue
-                
-                # Проверяем, не является ли пользователь уже участником команды
-                if TeamMembership.objects.filter(team=team, user=user_to_add).exists():
-                    errors.append(f"Пользователь {user_to_add.username} уже в команде")
-                    continue
-                
-                # Добавляем пользователя в команду с ролью участника
-                TeamMembership.objects.create(
-                    team=team,
-                    user=user_to_add,
-                    role='member'
-                )
-                
-                added_users.append({
-                    'id': user_to_add.id,
-                    'username': user_to_add.username,
-                    'email': user_to_add.email
-                })
-                
-                # Создаем уведомление для добавленного пользователя
-                self.create_team_join_notification(user_to_add, team, request)
-                
-            except User.DoesNotExist:
+                requested_ids.append(int(user_id))
+            except (TypeError, ValueError):
                 errors.append(f"Пользователь с ID {user_id} не найден")
-                continue
+        requested_ids = list(dict.fromkeys(requested_ids))
+        
+        # Один запрос: выбранные пользователи и признак участия в workspace
+        users = {
+            user.pk: user
+            for user in User.objects.filter(pk__in=requested_ids).annotate(
+                is_workspace_member=Exists(WorkspaceMembership.objects.filter(
+                    workspace_id=team.workspace_id, user=OuterRef('pk')
+                ))
+            ).only('id', 'username', 'email')
+        }
+        # Второй запрос: кто из них уже в команде
+        team_member_ids = set(
+            TeamMembership.objects.filter(team=team, user_id__in=list(users)).values_list('user_id', flat=True)
+        )
+        
+        users_to_add = []
+        for user_id in requested_ids:
+            user_to_add = users.get(user_id)
+            if user_to_add is None:
+                errors.append(f"Пользователь с ID {user_id} не найден")
+            elif not user_to_add.is_workspace_member:
+                errors.append(f"Пользователь {user_to_add.username} не является участником рабочей области")
+            elif user_id in team_member_ids:
+                errors.append(f"Пользователь {user_to_add.username} уже в команде")
+            else:
+                users_to_add.append(user_to_add)
+        
+        # Участие в workspace уже проверено запросом выше, поэтому строки создаются
+        # bulk_create без TeamMembership.clean(); сигналы при этом не вызываются,
+        # и кеш прав сбрасывается явно
+        while users_to_add:
+            try:
+                with transaction.atomic():
+                    TeamMembership.objects.bulk_create(
+                        [TeamMembership(team=team, user=user, role='member') for user in users_to_add]
+                    )
+                break
+            except IntegrityError:
+                # Параллельный запрос добавил кого-то из них: убираем их и повторяем
+                added_meanwhile = set(TeamMembership.objects.filter(
+                    team=team, user_id__in=[user.pk for user in users_to_add]
+                ).values_list('user_id', flat=True))
+                if not added_meanwhile:
+                    raise
+                for user in users_to_add:
+                    if user.pk in added_meanwhile:
+                        errors.append(f"Пользователь {user.username} уже в команде")
+                users_to_add = [user for user in users_to_add if user.pk not in added_meanwhile]
+        if users_to_add:
+            permission_cache.bump_version(team.workspace_id)
+        
+        added_users = [
+            {'id': user.id, 'username': user.username, 'email': user.email}
+            for user in users_to_add
+        ]
         
-        # Создаем уведомление для приглашающего
+        # Создаем уведомления для добавленных пользователей и приглашающего
         if added_users:
+            self.create_team_join_notifications([user['id'] for user in added_users], team, request)
             self.create_inviter_notification(request.user, added_users, team)
         
         return JsonResponse({
@@ -2110,8 +2418,8 @@ class TeamInviteMemberView(LoginRequiredMixin, View):
             'errors': errors
         })
     
-    def create_team_join_notification(self, user, team, request):
-        """Создает уведомление о добавлении в команду"""
+    def create_team_join_notifications(self, user_ids, team, request):
+        """Создает уведомления о добавлении в команду"""
         team_url = request.build_absolute_uri(
             reverse('workspace:team_detail', kwargs={
                 'workspace_url_hash': team.workspace.url_hash,
@@ -2121,12 +2429,7 @@ class TeamInviteMemberView(LoginRequiredMixin, View):
         
         message = f'Вас добавили в команду "{team.name}" рабочей области "{team.workspace.name}"'
         
-        Notification.objects.create(
-            user=user,
-            message=message,
-            level='info',
-            related_url=team_url
-        )
+        notify_many(user_ids, message, level='info', related_url=team_url, kind='membership_added', target=f'team:{team.pk}')
     
     def create_inviter_notification(self, inviter, added_users, team):
         """Создает уведомление для пользователя, который добавил участников"""
@@ -2136,11 +2439,7 @@ class TeamInviteMemberView(LoginRequiredMixin, View):
         else:
             message = f'Вы добавили {len(added_users)} пользователей в команду "{team.name}"'
         
-        Notification.objects.create(
-            user=inviter,
-            message=message,
-            level='info'
-        )
+        notify_many([inviter], message, level='info', kind='membership_added_summary', target=f'team:{team.pk}')
 
 
 class TeamJoinView(LoginRequiredMixin, View):
@@ -2369,8 +2668,8 @@ class WorkspaceTransferOwnerRoleView(LoginRequiredMixin, View):
                 new_owner_membership.save()
                 
                 # Обновляем владельца в модели Workspace
-                workspace.owner = new_owner_membership.user
-                workspace.save()
+                workspace.user = new_owner_membership.user
+                workspace.save(update_fields=['user'])
             
             # Создаем уведомления для участников
             self.create_notifications(request.user, new_owner_membership.user, workspace)
@@ -2686,15 +2985,14 @@ class TeamDeleteView(LoginRequiredMixin, View):
                 team.delete()
                 
                 # Создаем уведомления для всех бывших участников команды
-                for member in team_members:
-                    if member != request.user:  # Не создаем уведомление для того, кто удалил команду
-                        self.create_team_deleted_notification(
-                            member, 
-                            team_name, 
-                            workspace_name, 
-                            tasks_count,
-                            request
-                        )
+                # (кроме того, кто удалил команду)
+                self.create_team_deleted_notifications(
+                    [member for member in team_members if member != request.user],
+                    team_name,
+                    workspace_name,
+                    tasks_count,
+                    request
+                )
                 
                 # Создаем уведомление для пользователя, который удалил команду
                 self.create_deleter_notification(
@@ -2729,8 +3027,8 @@ class TeamDeleteView(LoginRequiredMixin, View):
                 'debug_info': str(e) if settings.DEBUG else None
             })
     
-    def create_team_deleted_notification(self, user, team_name, workspace_name, tasks_count, request):
-        """Создает уведомление об удалении команды для участников"""
+    def create_team_deleted_notifications(self, users, team_name, workspace_name, tasks_count, request):
+        """Создает уведомления об удалении команды для участников"""
         workspace_url = request.build_absolute_uri(
             reverse('workspace:workspace_detail', kwargs={
                 'workspace_url_hash': request.resolver_match.kwargs['workspace_url_hash']
@@ -2741,12 +3039,7 @@ class TeamDeleteView(LoginRequiredMixin, View):
         if tasks_count > 0:
             message += f'\nВместе с командой удалено {tasks_count} задач'
         
-        Notification.objects.create(
-            user=user,
-            message=message,
-            level='warning',
-            related_url=workspace_url
-        )
+        notify_many(users, message, level='warning', related_url=workspace_url)
     
     def create_deleter_notification(self, user, team_name, workspace_name, tasks_count, members_count):
         """Создает уведомление для пользователя, который удалил команду"""
@@ -2824,15 +3117,13 @@ class WorkspaceKickMemberView(LoginRequiredMixin, View):
                     'email': user_to_remove.email
                 })
                 
-                # Создаем уведомление для удаленного пользователя
-                self.create_workspace_leave_notification(user_to_remove, workspace, request)
-                
             except User.DoesNotExist:
                 errors.append(f"Пользователь с ID {user_id} не найден")
                 continue
         
-        # Создаем уведомление для удаляющего
+        # Создаем уведомления для удаленных пользователей и удаляющего
         if removed_users:
+            self.create_workspace_leave_notifications([user['id'] for user in removed_users], workspace)
             self.create_kicker_notification(request.user, removed_users, workspace)
         
         return JsonResponse({
@@ -2878,15 +3169,11 @@ class WorkspaceKickMemberView(LoginRequiredMixin, View):
             user=user
         ).delete()
     
-    def create_workspace_leave_notification(self, user, workspace, request):
-        """Создает уведомление об удалении из рабочей области"""
+    def create_workspace_leave_notifications(self, user_ids, workspace):
+        """Создает уведомления об удалении из рабочей области"""
         message = f'Вас удалили из рабочей области "{workspace.name}"'
         
-        Notification.objects.create(
-            user=user,
-            message=message,
-            level='warning'
-        )
+        notify_many(user_ids, message, level='warning', kind='membership_removed', target=f'workspace:{workspace.pk}')
     
     def create_kicker_notification(self, kicker, removed_users, workspace):
         """Создает уведомление для пользователя, который удалил участников"""
@@ -2896,11 +3183,7 @@ class WorkspaceKickMemberView(LoginRequiredMixin, View):
         else:
             message = f'Вы удалили {len(removed_users)} пользователей из рабочей области "{workspace.name}"'
         
-        Notification.objects.create(
-            user=kicker,
-            message=message,
-            level='info'
-        )
+        notify_many([kicker], message, level='info', kind='membership_removed_summary', target=f'workspace:{workspace.pk}')
 
 class TeamKickMemberView(LoginRequiredMixin, View):
     """Удаление пользователей из команды"""
@@ -2981,15 +3264,13 @@ class TeamKickMemberView(LoginRequiredMixin, View):
                         'tasks_updated': user_tasks_count
                     })
                     
-                    # Создаем уведомление для удаленного пользователя
-                    self.create_team_leave_notification(user_to_remove, team, request, user_tasks_count)
-                    
                 except User.DoesNotExist:
                     errors.append(f"Пользователь с ID {user_id} не найден")
                     continue
             
-            # Создаем уведомление для удаляющего
+            # Создаем уведомления для удаленных пользователей и удаляющего
             if removed_users:
+                self.create_team_leave_notifications(removed_users, team, request)
                 self.create_kicker_notification(request.user, removed_users, team, total_tasks_updated)
         
         if errors and not removed_users:
@@ -3070,25 +3351,33 @@ class TeamKickMemberView(LoginRequiredMixin, View):
             
             return "Недостаточно прав для удаления"
     
-    def create_team_leave_notification(self, user, team, request, tasks_updated_count):
-        """Создает уведомление об удалении из команды"""
+    def create_team_leave_notifications(self, removed_users, team, request):
+        """Создает уведомления об удалении из команды"""
         workspace_url = request.build_absolute_uri(
             reverse('workspace:workspace_detail', kwargs={
                 'workspace_url_hash': team.workspace.url_hash
             })
         )
         
-        message = f'Вас удалили из команды "{team.name}" рабочей области "{team.workspace.name}"'
+        base_message = f'Вас удалили из команды "{team.name}" рабочей области "{team.workspace.name}"'
         
-        if tasks_updated_count > 0:
-            message += f'\nВы были сняты с исполнения {tasks_updated_count} задач этой команды'
+        notifications = []
+        for removed_user in removed_users:
+            # Число снятых задач у каждого пользователя свое
+            message = base_message
+            if removed_user['tasks_updated'] > 0:
+                message += f'\nВы были сняты с исполнения {removed_user["tasks_updated"]} задач этой команды'
+            
+            notifications.append(Notification(
+                user_id=removed_user['id'],
+                message=message,
+                level='warning',
+                related_url=workspace_url,
+                kind='membership_removed',
+                target=f'team:{team.pk}'
+            ))
         
-        Notification.objects.create(
-            user=user,
-            message=message,
-            level='warning',
-            related_url=workspace_url
-        )
+        send_notifications(notifications, count=len(notifications))
     
     def create_kicker_notification(self, kicker, removed_users, team, total_tasks_updated):
         """Создает уведомление для пользователя, который удалил участников"""
@@ -3104,11 +3393,7 @@ class TeamKickMemberView(LoginRequiredMixin, View):
             if total_tasks_updated > 0:
                 message += f'\nПользователи сняты с исполнения {total_tasks_updated} задач'
         
-        Notification.objects.create(
-            user=kicker,
-            message=message,
-            level='info'
-        )
+        notify_many([kicker], message, level='info', kind='membership_removed_summary', target=f'team:{team.pk}')
 
 class WorkspaceChangeMemberRoleView(LoginRequiredMixin, View):
     """Изменение ролей участников рабочей области"""
@@ -3206,17 +3491,17 @@ class WorkspaceChangeMemberRoleView(LoginRequiredMixin, View):
     
     def create_role_change_notifications(self, changer, updated_users, workspace, action):
         """Создает уведомления об изменении ролей"""
-        for updated_user in updated_users:
-            if action == 'promote':
-                message = f'Вам назначена роль администратора в рабочей области "{workspace.name}"'
-            else:
-                message = f'Вы разжалованы до участника в рабочей области "{workspace.name}"'
-            
-            Notification.objects.create(
-                user_id=updated_user['id'],
-                message=message,
-                level='info'
-            )
+        # Повышения и понижения - разные виды, чтобы они не сливались друг с другом
+        kind = 'role_promoted' if action == 'promote' else 'role_demoted'
+        if action == 'promote':
+            message = f'Вам назначена роль администратора в рабочей области "{workspace.name}"'
+        else:
+            message = f'Вы разжалованы до участника в рабочей области "{workspace.name}"'
+        
+        notify_many(
+            [updated_user['id'] for updated_user in updated_users], message, level='info',
+            kind=kind, target=f'workspace:{workspace.pk}'
+        )
         
         # Уведомление для того, кто изменил роли
         if len(updated_users) == 1:
@@ -3231,11 +3516,7 @@ class WorkspaceChangeMemberRoleView(LoginRequiredMixin, View):
             else:
                 message = f'Вы разжаловали {len(updated_users)} пользователей до участников'
         
-        Notification.objects.create(
-            user=changer,
-            message=message,
-            level='info'
-        )
+        notify_many([changer], message, level='info', kind=f'{kind}_summary', target=f'workspace:{workspace.pk}')
 
 class TeamChangeMemberRoleView(LoginRequiredMixin, View):
     """Изменение ролей участников команды"""
@@ -3334,17 +3615,17 @@ class TeamChangeMemberRoleView(LoginRequiredMixin, View):
     
     def create_role_change_notifications(self, changer, updated_users, team, action):
         """Создает уведомления об изменении ролей"""
-        for updated_user in updated_users:
-            if action == 'promote':
-                message = f'Вам назначена роль администратора в команде "{team.name}"'
-            else:
-                message = f'Вы разжалованы до участника в команде "{team.name}"'
-            
-            Notification.objects.create(
-                user_id=updated_user['id'],
-                message=message,
-                level='info'
-            )
+        # Повышения и понижения - разные виды, чтобы они не сливались друг с другом
+        kind = 'role_promoted' if action == 'promote' else 'role_demoted'
+        if action == 'promote':
+            message = f'Вам назначена роль администратора в команде "{team.name}"'
+        else:
+            message = f'Вы разжалованы до участника в команде "{team.name}"'
+        
+        notify_many(
+            [updated_user['id'] for updated_user in updated_users], message, level='info',
+            kind=kind, target=f'team:{team.pk}'
+        )
         
         # Уведомление для того, кто изменил роли
         if len(updated_users) == 1:
@@ -3359,11 +3640,7 @@ class TeamChangeMemberRoleView(LoginRequiredMixin, View):
             else:
                 message = f'Вы разжаловали {len(updated_users)} пользователей до участников команды "{team.name}"'
         
-        Notification.objects.create(
-            user=changer,
-            message=message,
-            level='info'
-        )
+        notify_many([changer], message, level='info', kind=f'{kind}_summary', target=f'team:{team.pk}')
 
 class SaveWorkspaceAccessSettingsView(LoginRequiredMixin, View):
     """Сохранение настроек прав доступа для рабочей области"""
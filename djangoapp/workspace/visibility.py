@@ -0,0 +1,61 @@
+"""
+Движок видимости задач.
+
+Правила из Task.is_visible_to_user, Task.can_user_edit и
+TeamRoleAccess.is_team_visible_to_user собираются в одно Q-выражение,
+поэтому список задач выбирается одним SQL-запросом вместо проверки
+каждой задачи в Python.
+"""
+from django.db.models import Q
+
+from .access import AccessContext
+
+
+def visible_tasks_q(user, workspace, access=None):
+    """
+    Q-выражение для задач workspace, видимых пользователю.
+
+    Повторяет правила Task.is_visible_to_user:
+    1. Создатель задачи всегда видит ее
+    2. Исполнитель задачи всегда видит ее
+    3. Редакторы задачи всегда видят ее
+    4. Лидер команды видит все задачи в команде
+    5. Владелец workspace видит все задачи
+    6. Для остальных: зависит от настройки visible
+    а также видимость команды задачи для пользователя.
+    """
+    if access is None:
+        access = AccessContext(user, workspace)
+
+    # Владелец workspace видит все задачи всех команд
+    if access.is_owner:
+        return Q(workspace=workspace)
+
+    # Команды, в которых пользователь редактирует задачи (лидер - всегда)
+    editor_team_ids = [
+        team_id for team_id in access.team_roles
+        if access.has_team_permission(team_id, 'can_edit_tasks')
+    ]
+
+    # Видимость задачи
+    task_q = (
+        Q(reporter=user)
+        | Q(assignee=user)
+        | Q(visible=True)
+        | Q(team_id__in=editor_team_ids)
+    )
+    # Редактор задач без команды определяется настройками workspace
+    if access.is_member and access.has_workspace_permission('can_edit_tasks'):
+        task_q |= Q(team__isnull=True)
+
+    # Видимость команды задачи
+    team_q = Q(team__isnull=True) | Q(team_id__in=list(access.team_roles))
+    if access.is_member:
+        team_q |= Q(team__role_access__visibility='workspace')
+
+    return Q(workspace=workspace) & team_q & task_q
+
+
+def filter_visible_tasks(queryset, user, workspace, access=None):
+    """Оставляет в queryset только задачи, видимые пользователю"""
+    return queryset.filter(visible_tasks_q(user, workspace, access=access))